@@ -1,9 +1,10 @@
 """Pharmacy Agent - LangGraph orchestration module."""
 
-from apps.api.agent.graph import get_pharmacy_agent
+from apps.api.agent.graph import aget_pharmacy_agent, get_pharmacy_agent
 from apps.api.agent.streaming import stream_agent_response
 
 __all__ = [
+    "aget_pharmacy_agent",
     "get_pharmacy_agent",
     "stream_agent_response",
 ]
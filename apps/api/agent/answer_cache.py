@@ -0,0 +1,94 @@
+"""Whole-turn answer cache for repeated anonymous first-turn questions.
+
+Many conversations open with the same question ("Tell me about Ibuprofen").
+For single-message conversations without a user identifier the answer only
+depends on the question, the model, the system prompt and the catalog and
+stock data, so the recorded SSE stream of a previous answer can be replayed
+instead of running the agent. Only turns that called nothing but read-only
+catalog and inventory tools are recorded (see CACHEABLE_TOOLS): prescription,
+interaction and reservation tools read or write one user's data, which must
+never be replayed to someone else. For the same reason a turn is not recorded
+when a tool was given a user identifier or returned prescription fields (as
+get_medication_availability does for an identified user).
+"""
+
+import hashlib
+import re
+from typing import Hashable
+
+from apps.api.agent.prompts import SYSTEM_PROMPTS
+from apps.api.cache import TTLCache
+from apps.api.config import get_settings
+from apps.api.tools.catalog import get_catalog_version
+from apps.api.tools.holds import get_hold_registry
+
+PROMPT_HASH = hashlib.sha256(
+    "".join(SYSTEM_PROMPTS[language] for language in sorted(SYSTEM_PROMPTS)).encode("utf-8")
+).hexdigest()[:16]
+
+# Read-only tools whose results depend only on catalog/stock data (covered
+# by the key's data versions)
+CACHEABLE_TOOLS = frozenset(
+    {"get_medication_by_name", "check_inventory", "get_medication_availability"}
+)
+
+# Tool inputs and result fields that tie a cacheable tool's call to one user
+USER_SCOPED_INPUTS = frozenset({"user_identifier"})
+USER_SCOPED_RESULT_FIELDS = frozenset({"has_active_prescription", "prescription"})
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Normalize a question so trivially different spellings share an entry."""
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+async def answer_cache_key(
+    messages: list[dict],
+    user_identifier: str | None = None,
+) -> Hashable | None:
+    """
+    Key a conversation for the answer cache.
+
+    The key includes the catalog data version and the reservation hold
+    version, so any change to medications, interactions, inventory or held
+    stock moves new requests to fresh entries.
+
+    Returns:
+        The key, or None if the conversation is not cacheable (more than one
+        message, a user identifier, or no data version available)
+    """
+    if user_identifier or len(messages) != 1 or messages[0]["role"] != "user":
+        return None
+
+    question = normalize_question(messages[0]["content"])
+    if not question:
+        return None
+
+    catalog_version = await get_catalog_version()
+    if catalog_version is None:
+        return None
+
+    return (
+        question,
+        get_settings().openai_model,
+        PROMPT_HASH,
+        catalog_version,
+        get_hold_registry().version(),
+    )
+
+
+_answer_cache: TTLCache[Hashable, tuple[str, ...]] | None = None
+
+
+def get_answer_cache() -> TTLCache[Hashable, tuple[str, ...]]:
+    """Get the process-wide cache of recorded SSE answer streams."""
+    global _answer_cache
+    if _answer_cache is None:
+        settings = get_settings()
+        _answer_cache = TTLCache(
+            maxsize=settings.answer_cache_size,
+            ttl_seconds=settings.answer_cache_ttl_seconds,
+        )
+    return _answer_cache
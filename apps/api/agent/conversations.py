@@ -0,0 +1,220 @@
+"""Server-side conversation state for the optional stateful chat mode.
+
+With CONVERSATION_STATE_ENABLED the agent graph is compiled with a LangGraph
+checkpointer backed by a local SQLite file. Each conversation is a thread
+keyed by its conversation_id: clients send only the new message, and the
+graph resumes from the last checkpoint, which also keeps earlier tool calls
+and results in the state. That state can hold a user's prescription data,
+so each conversation is bound to the user who started it (see
+create_conversation) and only that user can resume it. Conversations not
+used for CONVERSATION_TTL_SECONDS are deleted by run_conversation_pruner.
+"""
+
+import asyncio
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import aiosqlite
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+
+from apps.api.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+logger = get_logger(__name__)
+
+_conn: aiosqlite.Connection | None = None
+_saver: "AsyncSqliteSaver | None" = None
+
+
+async def open_conversation_store(db_path: str) -> "AsyncSqliteSaver":
+    """
+    Open the checkpoint database, creating it and its tables if needed.
+
+    Args:
+        db_path: SQLite file for checkpoints (kept apart from the pharmacy
+            database so checkpoint writes don't queue behind its writer)
+
+    Returns:
+        The process-wide checkpointer
+    """
+    # Imported here so the stateless mode never loads LangGraph's saver
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    global _conn, _saver
+    if _saver is not None:
+        return _saver
+
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = await aiosqlite.connect(db_path)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    await conn.execute(
+        "CREATE TABLE IF NOT EXISTS conversation_owners "
+        "(conversation_id TEXT PRIMARY KEY, user_id INTEGER, last_used REAL)"
+    )
+    async with conn.execute("PRAGMA table_info(conversation_owners)") as cursor:
+        columns = {row[1] for row in await cursor.fetchall()}
+    if "last_used" not in columns:
+        # Stores created before conversations expired: start their clock now
+        await conn.execute("ALTER TABLE conversation_owners ADD COLUMN last_used REAL")
+        await conn.execute("UPDATE conversation_owners SET last_used = ?", (time.time(),))
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conversation_owners_last_used "
+        "ON conversation_owners(last_used)"
+    )
+    await conn.commit()
+
+    _conn, _saver = conn, saver
+    logger.info(f"Conversation store opened at {db_path}")
+    return saver
+
+
+async def close_conversation_store() -> None:
+    """Close the checkpoint database."""
+    global _conn, _saver
+    if _conn is not None:
+        await _conn.close()
+    _conn, _saver = None, None
+
+
+def get_conversation_store() -> "AsyncSqliteSaver | None":
+    """Get the checkpointer, or None if the store is not open."""
+    return _saver
+
+
+def new_conversation_id() -> str:
+    """Generate an ID for a new conversation."""
+    return uuid.uuid4().hex
+
+
+async def create_conversation(user_id: int | None) -> str:
+    """
+    Start a conversation owned by user_id.
+
+    Args:
+        user_id: Resolved user starting the conversation (None if anonymous)
+
+    Returns:
+        The new conversation_id
+    """
+    conversation_id = new_conversation_id()
+    if _conn is not None:
+        await _conn.execute(
+            "INSERT INTO conversation_owners (conversation_id, user_id, last_used) "
+            "VALUES (?, ?, ?)",
+            (conversation_id, user_id, time.time()),
+        )
+        await _conn.commit()
+    return conversation_id
+
+
+async def touch_conversation(conversation_id: str) -> None:
+    """Record that a conversation was resumed, restarting its expiry clock."""
+    if _conn is None:
+        return
+    await _conn.execute(
+        "UPDATE conversation_owners SET last_used = ? WHERE conversation_id = ?",
+        (time.time(), conversation_id),
+    )
+    await _conn.commit()
+
+
+async def prune_conversations(max_age_seconds: float) -> int:
+    """
+    Delete conversations not used for max_age_seconds.
+
+    The owner row goes first, so a conversation resumed meanwhile (which
+    moves its last_used past the cutoff) keeps its state.
+
+    Returns:
+        Number of conversations deleted
+    """
+    if _conn is None or _saver is None:
+        return 0
+    cutoff = time.time() - max_age_seconds
+    async with _conn.execute(
+        "SELECT conversation_id FROM conversation_owners WHERE last_used < ?", (cutoff,)
+    ) as cursor:
+        candidates = [row[0] for row in await cursor.fetchall()]
+
+    pruned = 0
+    for conversation_id in candidates:
+        cursor = await _conn.execute(
+            "DELETE FROM conversation_owners WHERE conversation_id = ? AND last_used < ?",
+            (conversation_id, cutoff),
+        )
+        if cursor.rowcount:
+            await _saver.adelete_thread(conversation_id)  # also commits the row delete
+            pruned += 1
+    await _conn.commit()
+
+    if pruned:
+        logger.info(f"Pruned {pruned} conversation(s) unused for {max_age_seconds:.0f}s")
+    return pruned
+
+
+async def run_conversation_pruner(interval_seconds: float, max_age_seconds: float) -> None:
+    """Prune expired conversations every interval_seconds until cancelled."""
+    while True:
+        try:
+            await prune_conversations(max_age_seconds)
+        except Exception as e:
+            logger.error(f"Conversation prune failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def conversation_owned_by(conversation_id: str, user_id: int | None) -> bool:
+    """
+    Check that a conversation exists and was started by user_id.
+
+    An anonymous conversation can only be resumed anonymously, and one started
+    by a verified user only by that user.
+    """
+    if _conn is None:
+        return False
+    async with _conn.execute(
+        "SELECT user_id FROM conversation_owners WHERE conversation_id = ?",
+        (conversation_id,),
+    ) as cursor:
+        row = await cursor.fetchone()
+    return row is not None and row[0] == user_id
+
+
+def conversation_config(conversation_id: str) -> RunnableConfig:
+    """Get the graph config that selects a conversation's thread."""
+    return {"configurable": {"thread_id": conversation_id}}
+
+
+async def conversation_tail(conversation_id: str) -> list[dict]:
+    """
+    Get the conversation's last assistant reply, for routing the next turn.
+
+    Stateful requests only carry the new message, so "yes, go ahead" would
+    otherwise be classified without the question it answers.
+
+    Returns:
+        [{"role": "assistant", "content": ...}] if the saved state ends with
+        an assistant text reply, else []
+    """
+    if _saver is None:
+        return []
+    checkpoint = await _saver.aget_tuple(conversation_config(conversation_id))
+    if checkpoint is None:
+        return []
+    messages = checkpoint.checkpoint["channel_values"].get("messages", [])
+    if messages and isinstance(messages[-1], AIMessage) and messages[-1].text:
+        return [{"role": "assistant", "content": messages[-1].text}]
+    return []
+
+
+async def conversation_exists(conversation_id: str) -> bool:
+    """Check whether a conversation has any saved state."""
+    if _saver is None:
+        return False
+    return await _saver.aget_tuple(conversation_config(conversation_id)) is not None
@@ -0,0 +1,201 @@
+"""Deterministic fast path for simple medication lookups.
+
+A cheap bilingual keyword classifier plus the medication name catalog
+recognize messages like "is Ibuprofen in stock?" or "tell me about
+אומפרזול". When exactly one intent and one medication are found, the tool
+is called directly and its result rendered from a template, skipping the
+agent's LLM round trips. Anything else falls through to the agent.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+from apps.api.agent.templates import detect_language
+from apps.api.logging_config import get_logger
+from apps.api.tools.catalog import (
+    HEBREW_PREFIXES,
+    CatalogEntry,
+    get_medication_catalog,
+)
+
+logger = get_logger(__name__)
+
+# Longer messages are rarely simple lookups
+MAX_WORDS = 12
+
+
+class FastPathIntent(str, Enum):
+    """Intents the fast path can answer on its own."""
+
+    MEDICATION_INFO = "medication_info"
+    INVENTORY = "inventory"
+
+
+# Tool that answers each intent
+INTENT_TOOLS = {
+    FastPathIntent.MEDICATION_INFO: "get_medication_by_name",
+    FastPathIntent.INVENTORY: "check_inventory",
+}
+
+# Composite tool whose result answers either intent
+COMPOSITE_TOOL = "get_medication_availability"
+
+
+def keyword_pattern(*phrases: str, prefixed: bool = True) -> re.Pattern:
+    """
+    Compile phrases into one pattern matching any of them as whole words
+    (Hebrew words may carry one attached prefix letter, e.g. "המינון",
+    unless prefixed is False).
+    """
+    alternatives = "|".join(re.escape(p) for p in phrases)
+    prefix = f"[{HEBREW_PREFIXES}]?" if prefixed else ""
+    return re.compile(rf"(?<![\w]){prefix}(?:{alternatives})(?![\w])", re.IGNORECASE)
+
+
+_INTENT_PATTERNS = {
+    FastPathIntent.INVENTORY: keyword_pattern(
+        "in stock", "stock", "available", "availability", "do you have",
+        "do you carry", "inventory",
+        "במלאי", "מלאי", "זמין", "זמינה", "יש לכם", "יש במלאי",
+    ),
+    FastPathIntent.MEDICATION_INFO: keyword_pattern(
+        "tell me about", "info", "information", "details", "dosage",
+        "ingredients", "active ingredient", "warnings", "what is",
+        "ספר לי על", "ספרי לי על", "מידע", "פרטים", "מינון", "רכיבים",
+        "רכיב פעיל", "אזהרות", "מה זה",
+    ),
+}
+
+# Anything that may need judgment, policy handling or another tool goes
+# through the agent. Matched without prefixes: short words like "או", "עם"
+# and "לא" would otherwise match inside other words ("מלא", "העם").
+_FALLTHROUGH_PATTERN = keyword_pattern(
+    "should", "recommend", "safe", "better", "instead", "used for", "treat",
+    "pregnant", "pregnancy", "child", "children", "kid", "kids", "with", "and",
+    "or", "prescription", "prescriptions", "refill", "reserve", "hold",
+    "interaction", "interactions", "why", "not",
+    "כדאי", "מומלץ", "להמליץ", "תמליץ", "בטוח", "במקום", "משמש", "נגד",
+    "הריון", "בהריון", "ילד", "ילדים", "עם", "או", "מרשם", "מרשמים",
+    "חידוש", "לשריין", "להזמין", "שמור", "למה", "לא",
+    prefixed=False,
+)
+
+
+@dataclass(frozen=True)
+class FastPathMatch:
+    """A confidently classified message and the tool call that answers it."""
+
+    intent: FastPathIntent
+    language: str
+    medication: CatalogEntry
+
+    @property
+    def tool_name(self) -> str:
+        return INTENT_TOOLS[self.intent]
+
+    @property
+    def tool_input(self) -> dict[str, Any]:
+        if self.intent == FastPathIntent.INVENTORY:
+            return {"medication_id": self.medication.med_id}
+        # get_medication_by_name only takes a name; the catalog name is exact
+        name = self.medication.name_he if self.language == "he" else self.medication.name_en
+        return {"medication_name": name}
+
+
+def classify_intent(text: str) -> FastPathIntent | None:
+    """
+    Classify a message into a single simple-lookup intent.
+
+    Returns:
+        The intent only when the message is short, matches exactly one
+        intent and contains no fall-through keyword; otherwise None
+    """
+    if len(text.split()) > MAX_WORDS or _FALLTHROUGH_PATTERN.search(text):
+        return None
+
+    intents = [intent for intent, p in _INTENT_PATTERNS.items() if p.search(text)]
+    return intents[0] if len(intents) == 1 else None
+
+
+def classify(text: str, medications: list[CatalogEntry]) -> FastPathMatch | None:
+    """
+    Classify a message given the medications mentioned in it.
+
+    Returns:
+        FastPathMatch when classify_intent is confident and exactly one
+        medication is mentioned; otherwise None
+    """
+    if len(medications) != 1:
+        return None
+
+    intent = classify_intent(text)
+    if intent is None:
+        return None
+
+    return FastPathMatch(
+        intent=intent,
+        language=detect_language(text),
+        medication=medications[0],
+    )
+
+
+class FastPathStats:
+    """Process-wide fast path hit counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_stats = FastPathStats()
+
+
+def get_fast_path_stats() -> FastPathStats:
+    """Get the process-wide fast path counters."""
+    return _stats
+
+
+async def match_fast_path(messages: list[dict]) -> FastPathMatch | None:
+    """
+    Try to classify the latest user message for the fast path.
+
+    Only a conversation's first user turn is tried: a later message may
+    depend on earlier ones ("and in Hebrew?", "yes, reserve it"), which
+    the classifier can't see.
+
+    Args:
+        messages: Conversation history as list of dicts
+
+    Returns:
+        FastPathMatch, or None to fall through to the agent
+    """
+    if not messages or messages[-1]["role"] != "user":
+        return None
+    if any(message["role"] == "user" for message in messages[:-1]):
+        return None
+
+    text = messages[-1]["content"].strip()
+    catalog = await get_medication_catalog()
+    match = classify(text, catalog.find(text))
+    if match:
+        logger.info(
+            f"Fast path match: intent={match.intent.value}, "
+            f"med_id={match.medication.med_id}, language={match.language}"
+        )
+    return match
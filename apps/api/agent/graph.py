@@ -1,88 +1,335 @@
-"""LangGraph pharmacy agent definition - compiled once at startup."""
+"""LangGraph pharmacy agent definition - compiled once, on first use.
 
-from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
+LangGraph and the OpenAI client are imported when the first agent is built
+rather than with this module, so importing the API (every worker, every
+test) doesn't pay for them. See scripts/bench_startup.py.
+"""
 
-from apps.api.agent.prompts import PHARMACY_AGENT_SYSTEM_PROMPT
+import asyncio
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Mapping, Sequence
+
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+from apps.api.agent.fast_path import COMPOSITE_TOOL, INTENT_TOOLS, classify_intent
+from apps.api.agent.history import count_tokens, manage_history
+from apps.api.agent.prompts import DEFAULT_PROMPT_LANGUAGE, SYSTEM_PROMPTS, prompt_language
+from apps.api.agent.templates import detect_language, render_tool_answer
+from apps.api.agent.tiers import ModelTier, tier_models
 from apps.api.config import get_settings
+from apps.api.deadline import run_within_deadline
+from apps.api.http_client import openai_client_kwargs
+from apps.api.llm_gateway import get_llm_gateway
 from apps.api.logging_config import get_logger
+from apps.api.request_context import get_request_context
 from apps.api.tools import PHARMACY_TOOLS
 
+if TYPE_CHECKING:
+    from langgraph.checkpoint.base import BaseCheckpointSaver
+
 logger = get_logger(__name__)
 
+# Custom event carrying a templated answer; streamed as TOKEN events
+DIRECT_ANSWER_EVENT = "direct_answer"
 
-def _build_pharmacy_agent():
+
+def _direct_answer(messages: Sequence[Any]) -> str | None:
     """
-    Build and compile the pharmacy agent graph.
+    Render the final answer from the last tool result, if eligible.
 
-    Called once at module initialization. The compiled graph is reused
-    for all requests. User-specific context (user_identifier) is injected
-    at runtime by prepending to the conversation messages.
+    Eligible when the last model turn made exactly one tool call, that call
+    succeeded and has a template, and the user's latest message is a simple
+    lookup whose intent is answered by that tool or by the composite
+    get_medication_availability (so the model would only have rephrased the
+    result, not chained another call).
 
     Returns:
-        Compiled LangGraph agent, or None if API key not configured
+        The answer text, or None to hand the result back to the model
     """
-    settings = get_settings()
+    if not messages or not isinstance(messages[-1], ToolMessage):
+        return None
+    tool_message = messages[-1]
 
-    # Skip compilation if no API key (allows tests to import without failing)
-    if not settings.openai_api_key:
-        logger.warning("OPENAI_API_KEY not set - agent will fail at runtime")
+    call_message = next(
+        (m for m in reversed(messages) if isinstance(m, AIMessage)), None
+    )
+    if call_message is None or len(call_message.tool_calls) != 1:
         return None
 
-    logger.info(f"Compiling pharmacy agent with model: {settings.openai_model}")
+    user_message = next(
+        (m for m in reversed(messages) if isinstance(m, HumanMessage)), None
+    )
+    if user_message is None or not isinstance(user_message.content, str):
+        return None
+    intent = classify_intent(user_message.content)
+    if intent is None or tool_message.name not in (INTENT_TOOLS[intent], COMPOSITE_TOOL):
+        return None
+
+    try:
+        result = json.loads(tool_message.content)
+    except (TypeError, ValueError):
+        return None
+
+    return render_tool_answer(
+        tool_message.name, result, detect_language(user_message.content)
+    )
+
+
+def build_agent_graph(
+    model: BaseChatModel,
+    tools: Sequence[BaseTool],
+    prompts: Mapping[str, str] = SYSTEM_PROMPTS,
+    direct_answer: bool = False,
+    history_token_budget: int = 0,
+    history_summary_max_tokens: int = 500,
+    checkpointer: "BaseCheckpointSaver | None" = None,
+):
+    """
+    Build and compile the ReAct agent graph.
+
+    agent -> tools -> agent ... until the model answers without tool calls.
+    With direct_answer, a tool result that can be rendered from a template
+    (see _direct_answer) ends the run through the direct_answer node instead
+    of another model call. Before each model call the history is fitted
+    into history_token_budget (see manage_history) and the estimated prompt
+    size is recorded in the request's trace, along with the prompt and cached
+    prompt tokens the provider reports.
+
+    Each call starts with the system prompt for the language of the latest
+    user message, unchanged, so calls in the same language share a cacheable
+    prefix. A per-request user context prompt is read from
+    config["configurable"]["user_context"] and sent after it, so it never
+    breaks that prefix or becomes part of the (checkpointed) state. Model
+    calls go through the LLM gateway (concurrency limit, retries, hedging,
+    circuit breaker) and are bounded by the request deadline, if any.
+
+    Args:
+        model: Chat model supporting tool calling
+        tools: Tools the model may call
+        prompts: System prompt per language; must include DEFAULT_PROMPT_LANGUAGE
+        direct_answer: Enable templated answers for simple lookups
+        history_token_budget: Max estimated history tokens; 0 disables windowing
+        history_summary_max_tokens: Max estimated tokens of the history summary
+        checkpointer: Saver for per-conversation state (stateful mode); runs
+            then need config["configurable"]["thread_id"]
+
+    Returns:
+        Compiled LangGraph graph
+    """
+    from langgraph.graph import END, START, MessagesState, StateGraph
+    from langgraph.prebuilt import ToolNode, tools_condition
+
+    bound_model = model.bind_tools(tools)
+    system_messages = {
+        language: SystemMessage(content=prompt) for language, prompt in prompts.items()
+    }
+    system_tokens = {
+        language: count_tokens([message]) for language, message in system_messages.items()
+    }
+
+    async def call_model(state: MessagesState, config: RunnableConfig) -> dict:
+        history = manage_history(
+            state["messages"], history_token_budget, history_summary_max_tokens
+        )
+        language = prompt_language(state["messages"])
+        if language not in system_messages:
+            language = DEFAULT_PROMPT_LANGUAGE
+        ctx = get_request_context()
+        if ctx and ctx.trace:
+            if ctx.trace.history_tokens is None:
+                ctx.trace.history_tokens = history.history_tokens
+            ctx.trace.prompt_language = language
+            ctx.trace.prompt_tokens.append(system_tokens[language] + history.tokens)
+            ctx.trace.summarized_turns = max(
+                ctx.trace.summarized_turns, history.summarized_turns
+            )
+
+        prompt_messages = [system_messages[language]]
+        user_context = config.get("configurable", {}).get("user_context")
+        if user_context:
+            prompt_messages.append(SystemMessage(content=user_context))
+
+        response = await run_within_deadline(
+            get_llm_gateway().ainvoke(bound_model, prompt_messages + history.messages, config),
+            "llm",
+        )
+        if ctx and ctx.trace and response.usage_metadata:
+            ctx.trace.record_prompt_usage(response.usage_metadata)
+        return {"messages": [response]}
+
+    async def answer_directly(state: MessagesState, config: RunnableConfig) -> dict:
+        text = _direct_answer(state["messages"])
+        await adispatch_custom_event(DIRECT_ANSWER_EVENT, {"text": text}, config=config)
+        return {"messages": [AIMessage(content=text)]}
+
+    def route_after_tools(state: MessagesState) -> str:
+        if direct_answer and _direct_answer(state["messages"]) is not None:
+            return "direct_answer"
+        return "agent"
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("agent", call_model)
+    graph.add_node("tools", ToolNode(tools))
+    graph.add_edge(START, "agent")
+    graph.add_conditional_edges("agent", tools_condition, {"tools": "tools", END: END})
+    if direct_answer:
+        graph.add_node("direct_answer", answer_directly)
+        graph.add_conditional_edges(
+            "tools", route_after_tools, ["agent", "direct_answer"]
+        )
+        graph.add_edge("direct_answer", END)
+    else:
+        graph.add_edge("tools", "agent")
+    return graph.compile(checkpointer=checkpointer)
+
+
+def _build_pharmacy_agent(
+    model_name: str,
+    checkpointer: "BaseCheckpointSaver | None" = None,
+):
+    """
+    Build and compile the pharmacy agent graph for one model.
+
+    Called once per tier model on first use (see get_pharmacy_agent). The
+    compiled graphs are reused for all requests. User-specific context (the
+    resolved user) is injected at runtime through the run config and the
+    request context read by tools.
+
+    Args:
+        model_name: OpenAI model the graph calls
+        checkpointer: Conversation store for the stateful agent
+
+    Returns:
+        Compiled LangGraph agent
+    """
+    from langchain_openai import ChatOpenAI
+
+    settings = get_settings()
+    logger.info(f"Compiling pharmacy agent with model: {model_name}")
 
     # Initialize LLM with streaming (created once, reused for all requests)
+    # on the shared, tuned HTTP client
     llm = ChatOpenAI(
-        model=settings.openai_model,
+        model=model_name,
         api_key=settings.openai_api_key,
         temperature=0,  # Deterministic for factual responses
         streaming=True,
+        # Reports prompt and cached prompt tokens (off by default with a
+        # custom HTTP client)
+        stream_usage=True,
+        max_retries=0,  # retried by the LLM gateway
+        **openai_client_kwargs(),
     )
 
-    # Create agent with base system prompt
-    # User-specific context is injected at runtime via messages
-    try:
-        agent = create_react_agent(
-            model=llm,
-            tools=PHARMACY_TOOLS,
-            prompt=PHARMACY_AGENT_SYSTEM_PROMPT,
-        )
-    except TypeError:
-        # Fallback for older LangGraph versions that use state_modifier
-        def state_modifier(state):
-            return {
-                "messages": [
-                    SystemMessage(content=PHARMACY_AGENT_SYSTEM_PROMPT)
-                ] + state["messages"]
-            }
-
-        agent = create_react_agent(
-            model=llm,
-            tools=PHARMACY_TOOLS,
-            state_modifier=state_modifier,
-        )
+    agent = build_agent_graph(
+        model=llm,
+        tools=PHARMACY_TOOLS,
+        prompts=SYSTEM_PROMPTS,
+        direct_answer=settings.direct_answer_enabled,
+        history_token_budget=settings.history_token_budget,
+        history_summary_max_tokens=settings.history_summary_max_tokens,
+        checkpointer=checkpointer,
+    )
 
     logger.info("Pharmacy agent compiled successfully")
     return agent
 
 
-# Compile agent once at module initialization
-_pharmacy_agent = _build_pharmacy_agent()
+def _build_tier_agents(
+    checkpointer: "BaseCheckpointSaver | None" = None,
+) -> dict[ModelTier, Any]:
+    """
+    Compile one agent per tier; tiers configured with the same model share it.
 
+    Returns:
+        Compiled agent per tier, or an empty dict if API key not configured
+    """
+    settings = get_settings()
 
-def get_pharmacy_agent():
+    # Skip compilation if no API key (allows tests to run without failing)
+    if not settings.openai_api_key:
+        logger.warning("OPENAI_API_KEY not set - agent will fail at runtime")
+        return {}
+
+    by_model: dict[str, Any] = {}
+    agents = {}
+    for tier, model_name in tier_models(settings).items():
+        if model_name not in by_model:
+            by_model[model_name] = _build_pharmacy_agent(model_name, checkpointer)
+        agents[tier] = by_model[model_name]
+    return agents
+
+
+# Compiled agents by (stateful, tier), built on first use
+_agents: dict[tuple[bool, ModelTier], Any] = {}
+_agents_lock = threading.Lock()
+
+# Conversation store the stateful agents are compiled with
+_checkpointer: "BaseCheckpointSaver | None" = None
+
+
+def init_stateful_agent(checkpointer: "BaseCheckpointSaver") -> None:
+    """Use checkpointer for the stateful agents (compiled on first use)."""
+    global _checkpointer
+    with _agents_lock:
+        _checkpointer = checkpointer
+        for key in [k for k in _agents if k[0]]:
+            del _agents[key]
+
+
+def get_pharmacy_agent(stateful: bool = False, tier: ModelTier = ModelTier.LARGE):
     """
-    Get the pre-compiled pharmacy agent.
+    Get the compiled pharmacy agent, compiling it on first use.
+
+    Safe to call from several threads (e.g. a startup warm-up in a worker
+    thread racing the first request): the agents are compiled once.
+
+    Args:
+        stateful: Get the agent that keeps conversation state (see
+            apps.api.agent.conversations)
+        tier: Model tier picked for the turn (see apps.api.agent.tiers)
 
     Returns:
-        The singleton compiled agent instance
+        The singleton compiled agent instance for the tier
 
     Raises:
-        RuntimeError: If agent was not compiled (missing API key)
+        RuntimeError: If agent can't be compiled (missing API key, or the
+            conversation store is not open)
     """
-    if _pharmacy_agent is None:
+    key = (stateful, tier)
+    agent = _agents.get(key)
+    if agent is not None:
+        return agent
+
+    with _agents_lock:
+        if key not in _agents and (_checkpointer is not None or not stateful):
+            for agent_tier, compiled in _build_tier_agents(
+                _checkpointer if stateful else None
+            ).items():
+                _agents[(stateful, agent_tier)] = compiled
+        agent = _agents.get(key)
+
+    if agent is None:
         raise RuntimeError(
-            "Pharmacy agent not compiled. Ensure OPENAI_API_KEY is configured."
+            "Pharmacy agent not compiled. Ensure OPENAI_API_KEY is configured"
+            + (" and the conversation store is open." if stateful else ".")
         )
-    return _pharmacy_agent
+    return agent
+
+
+async def aget_pharmacy_agent(stateful: bool = False, tier: ModelTier = ModelTier.LARGE):
+    """
+    Get the compiled pharmacy agent without blocking the event loop.
+
+    Compiled agents are returned directly; a first compile (or waiting for
+    one in progress) runs in a worker thread.
+    """
+    agent = _agents.get((stateful, tier))
+    if agent is not None:
+        return agent
+    return await asyncio.to_thread(get_pharmacy_agent, stateful, tier)
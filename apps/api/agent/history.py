@@ -0,0 +1,215 @@
+"""Token-budgeted conversation history for model calls.
+
+Clients may send long conversations, and the whole history is sent to the
+model on every call. manage_history keeps the prompt within a token budget:
+- turns that contain tool results are kept verbatim first, since the user
+  may refer back to them
+- then the newest turns are kept verbatim while they fit
+- everything older is condensed into a rolling summary
+
+The summary is extractive (no extra model call on the request path) and is
+cached per conversation prefix, so each turn only condenses the turns that
+newly fell out of the window.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Sequence
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+
+from apps.api.cache import TTLCache
+
+SUMMARY_HEADER = "Summary of the earlier conversation (older turns, condensed):"
+
+# Characters kept per message in the summary
+SUMMARY_LINE_CHARS = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+Turn = list[BaseMessage]
+
+
+@dataclass
+class HistoryWindow:
+    """Messages to send to the model and how much the history was reduced."""
+
+    messages: list[BaseMessage]
+    history_tokens: int  # estimated tokens of the full history
+    tokens: int  # estimated tokens of messages
+    summarized_turns: int
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Estimate the number of tokens messages take in a prompt."""
+    return count_tokens_approximately(messages)
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> tuple[list[BaseMessage], list[Turn]]:
+    """
+    Split a conversation into the messages before the first user message
+    (e.g. the user context) and turns.
+
+    A turn starts at a user message and runs until the next one, so an AI
+    tool call always stays in the same turn as its ToolMessages.
+    """
+    leading: list[BaseMessage] = []
+    turns: list[Turn] = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+        else:
+            leading.append(message)
+    return leading, turns
+
+
+def _has_tool_results(turn: Turn) -> bool:
+    return any(isinstance(m, ToolMessage) for m in turn)
+
+
+def _shorten(text: str) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    if len(text) > SUMMARY_LINE_CHARS:
+        return text[: SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    return text
+
+
+def _condense(turn: Turn) -> list[str]:
+    """Condense a turn into summary lines (tool outputs are left out)."""
+    lines = []
+    for message in turn:
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {_shorten(message.text)}")
+        elif isinstance(message, AIMessage):
+            for call in message.tool_calls:
+                args = ", ".join(f"{k}={v}" for k, v in call["args"].items())
+                lines.append(f"Assistant called {call['name']}({_shorten(args)})")
+            if message.text.strip():
+                lines.append(f"Assistant: {_shorten(message.text)}")
+    return lines
+
+
+def _turn_digest(previous: str, turn: Turn) -> str:
+    """Chain a turn onto the digest of the turns before it."""
+    h = hashlib.sha256(previous.encode("utf-8"))
+    for message in turn:
+        h.update(f"\x00{message.type}\x00{message.text}".encode("utf-8"))
+        if isinstance(message, AIMessage):
+            h.update(repr(message.tool_calls).encode("utf-8"))
+    return h.hexdigest()
+
+
+_summary_lines: TTLCache[str, tuple[str, ...]] = TTLCache(maxsize=1024, ttl_seconds=3600)
+
+
+def get_summary_cache() -> TTLCache[str, tuple[str, ...]]:
+    """Get the cache of summary lines keyed by conversation prefix digest."""
+    return _summary_lines
+
+
+def summarize_turns(turns: Sequence[Turn], max_tokens: int) -> str:
+    """
+    Summarize a conversation prefix within max_tokens.
+
+    Reuses the cached lines of the longest already-summarized prefix and
+    condenses only the turns after it. When the lines exceed the budget the
+    oldest are dropped first.
+    """
+    digests: list[str] = []
+    digest = ""
+    for turn in turns:
+        digest = _turn_digest(digest, turn)
+        digests.append(digest)
+
+    cache = get_summary_cache()
+    lines: list[str] = []
+    start = 0
+    for i in range(len(digests) - 1, -1, -1):
+        cached = cache.get(digests[i])
+        if cached is not None:
+            lines, start = list(cached), i + 1
+            break
+    for i in range(start, len(turns)):
+        lines.extend(_condense(turns[i]))
+        cache.set(digests[i], tuple(lines))
+
+    max_chars = max_tokens * 4
+    kept: list[str] = []
+    used = len(SUMMARY_HEADER)
+    for line in reversed(lines):
+        used += len(line) + 1
+        if used > max_chars:
+            break
+        kept.append(line)
+    omitted = len(lines) - len(kept)
+    body = ([f"({omitted} earlier line(s) omitted)"] if omitted else []) + kept[::-1]
+    return "\n".join([SUMMARY_HEADER, *body])
+
+
+def manage_history(
+    messages: Sequence[BaseMessage],
+    token_budget: int,
+    summary_max_tokens: int,
+) -> HistoryWindow:
+    """
+    Fit a conversation into a token budget.
+
+    Leading messages and the latest turn are always kept. Turns with tool
+    results are kept verbatim next (newest first, while they fit), then the
+    most recent turns. The other turns before that recent window are
+    condensed into a summary placed after the leading messages.
+
+    Args:
+        messages: Conversation to send to the model (without the system prompt)
+        token_budget: Max estimated tokens for the history; 0 disables windowing
+        summary_max_tokens: Max estimated tokens for the summary
+
+    Returns:
+        HistoryWindow with the messages to send
+    """
+    history_tokens = count_tokens(messages)
+    if token_budget <= 0 or history_tokens <= token_budget:
+        return HistoryWindow(list(messages), history_tokens, history_tokens, 0)
+
+    leading, turns = split_turns(messages)
+    if len(turns) <= 1:
+        return HistoryWindow(list(messages), history_tokens, history_tokens, 0)
+
+    turn_tokens = [count_tokens(turn) for turn in turns]
+    remaining = token_budget - count_tokens(leading) - summary_max_tokens - turn_tokens[-1]
+
+    # Turns with tool results come first, newest first, while they fit
+    pinned: set[int] = set()
+    for i in range(len(turns) - 2, -1, -1):
+        if _has_tool_results(turns[i]) and turn_tokens[i] <= remaining:
+            pinned.add(i)
+            remaining -= turn_tokens[i]
+
+    # Then the longest suffix of turns that fits
+    start = len(turns) - 1
+    while start > 0 and (start - 1 in pinned or turn_tokens[start - 1] <= remaining):
+        start -= 1
+        if start not in pinned:
+            remaining -= turn_tokens[start]
+
+    # Pinned turns are sent verbatim, so they are left out of the summary
+    summarized = [turn for i, turn in enumerate(turns[:start]) if i not in pinned]
+    summary = SystemMessage(content=summarize_turns(summarized, summary_max_tokens))
+    window = [*leading, summary]
+    for i in sorted(pinned):
+        if i < start:
+            window.extend(turns[i])
+    for turn in turns[start:]:
+        window.extend(turn)
+
+    return HistoryWindow(window, history_tokens, count_tokens(window), start)
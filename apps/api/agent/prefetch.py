@@ -0,0 +1,58 @@
+"""Speculative tool prefetch for medications named in the user's message.
+
+While the first model call is in flight, the lookups the model is most
+likely to request for each medication mentioned in the latest user message
+are started in the background. If the model then asks for one of them, the
+tool returns the prefetched result instead of querying again.
+"""
+
+from apps.api.logging_config import get_logger
+from apps.api.tools import (
+    check_inventory,
+    get_medication_availability,
+    get_medication_by_name,
+)
+from apps.api.tools.catalog import get_medication_catalog
+from apps.api.tools.runtime import prefetch_tool_call
+
+logger = get_logger(__name__)
+
+# Beyond a couple of names, the message is unlikely to be a simple lookup
+MAX_PREFETCH_MEDICATIONS = 2
+
+
+async def start_prefetch(messages: list[dict]) -> int:
+    """
+    Prefetch lookups for medications named in the latest user message.
+
+    Must be called inside the request scope. For each medication, starts
+    get_medication_availability, get_medication_by_name and check_inventory;
+    name-based calls are registered under both the English and Hebrew name.
+
+    Args:
+        messages: Conversation history as list of dicts
+
+    Returns:
+        Number of prefetched tool calls started
+    """
+    if not messages or messages[-1]["role"] != "user":
+        return 0
+
+    catalog = await get_medication_catalog()
+    medications = catalog.find(messages[-1]["content"])
+    if not medications or len(medications) > MAX_PREFETCH_MEDICATIONS:
+        return 0
+
+    started = 0
+    for med in medications:
+        names = [{"medication_name": med.name_en}, {"medication_name": med.name_he}]
+        for tool in (get_medication_availability, get_medication_by_name):
+            if prefetch_tool_call(tool, names[0], aliases=names[1:]):
+                started += 1
+        if prefetch_tool_call(
+            check_inventory, {"medication_id": med.med_id}, aliases=names
+        ):
+            started += 1
+
+    logger.info(f"Prefetch started {started} tool call(s)")
+    return started
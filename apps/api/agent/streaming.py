@@ -4,10 +4,46 @@ import asyncio
 import json
 from typing import Any, AsyncGenerator
 
-from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
-
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import RunnableConfig
+
+from apps.api.agent.answer_cache import (
+    CACHEABLE_TOOLS,
+    USER_SCOPED_INPUTS,
+    USER_SCOPED_RESULT_FIELDS,
+    answer_cache_key,
+    get_answer_cache,
+)
+from apps.api.agent.conversations import conversation_config
+from apps.api.agent.fast_path import (
+    FastPathMatch,
+    get_fast_path_stats,
+    match_fast_path,
+)
+from apps.api.agent.graph import DIRECT_ANSWER_EVENT
+from apps.api.agent.prefetch import start_prefetch
+from apps.api.agent.prompts import get_user_context_prompt
+from apps.api.agent.templates import render_tool_answer
+from apps.api.agent.tool_context import (
+    ToolRecord,
+    sign_tool_context,
+    tool_context_messages,
+    verify_tool_context,
+)
+from apps.api.config import get_settings
+from apps.api.deadline import Deadline, DeadlineExceeded, deadline_scope
+from apps.api.llm_gateway import LLMUnavailable
 from apps.api.logging_config import get_logger
+from apps.api.request_context import RequestContext, request_scope
 from apps.api.schemas import StreamEventType
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tools.runtime import SERVED_FROM_MEMO, cancel_prefetches
 from apps.api.tracing import TraceContext
 
 logger = get_logger(__name__)
@@ -19,25 +55,40 @@ def format_sse_event(event_type: StreamEventType, data: dict) -> str:
     return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
 
 
-def convert_messages(messages: list[dict]) -> list[HumanMessage | AIMessage]:
+def convert_messages(messages: list[dict], user_id: int | None = None) -> list[BaseMessage]:
     """
     Convert chat messages to LangChain message format.
 
+    An assistant message's verified tool_context is rehydrated into the
+    tool calls and ToolMessages that preceded its text.
+
     Args:
-        messages: List of dicts with 'role' and 'content' keys
+        messages: List of dicts with 'role', 'content' and optional
+            'tool_context' keys
+        user_id: Resolved user of the request (tool contexts issued for
+            another user are ignored)
 
     Returns:
         List of LangChain message objects
     """
-    lc_messages = []
+    lc_messages: list[BaseMessage] = []
     for msg in messages:
         if msg["role"] == "user":
             lc_messages.append(HumanMessage(content=msg["content"]))
         elif msg["role"] == "assistant":
+            if msg.get("tool_context"):
+                records = verify_tool_context(msg["tool_context"], user_id)
+                lc_messages.extend(tool_context_messages(records or []))
             lc_messages.append(AIMessage(content=msg["content"]))
     return lc_messages
 
 
+def _release_held_tokens(held_tokens: dict[str, list[str]], discarded_runs: set[str]) -> list[str]:
+    """Pop the held text of model calls no longer marked discarded."""
+    released = [run_key for run_key in held_tokens if run_key not in discarded_runs]
+    return [text for run_key in released for text in held_tokens.pop(run_key)]
+
+
 def _extract_chunk_text(content: Any) -> str:
     """
     Extract text from various chunk content formats.
@@ -67,132 +118,492 @@ def _extract_chunk_text(content: Any) -> str:
     return ""
 
 
+def _extract_tool_output(output: Any) -> Any:
+    """
+    Unwrap a tool's output from an on_tool_end event.
+
+    Tools invoked by ToolNode report a ToolMessage whose content is the
+    JSON-serialized result dict; direct invocations report the dict itself.
+
+    Args:
+        output: Raw output from the event data
+
+    Returns:
+        The result dict when recoverable, otherwise the output unchanged
+    """
+    if isinstance(output, ToolMessage):
+        content = output.content
+        if isinstance(content, str):
+            try:
+                parsed = json.loads(content)
+            except ValueError:
+                return content
+            return parsed
+        return content
+    return output
+
+
+async def _run_fast_path(
+    match: FastPathMatch,
+    trace_ctx: TraceContext | None,
+    user_id: int | None,
+) -> list[str] | None:
+    """
+    Answer a fast path match by calling its tool directly.
+
+    Returns:
+        SSE events (TOOL_CALL, TOOL_RESULT, TOKEN, TOOL_CONTEXT) in the same
+        format the agent produces, or None if the result has no template
+        (e.g. the tool failed) and the request should fall through to the
+        agent
+    """
+    tool = next(t for t in PHARMACY_TOOLS if t.name == match.tool_name)
+
+    call_id = trace_ctx.start_tool(tool.name) if trace_ctx else None
+    result = await tool.ainvoke(match.tool_input)
+    answer = render_tool_answer(tool.name, result, match.language)
+    if trace_ctx and call_id is not None:
+        ok = isinstance(result, dict) and result.get("success") is True
+        trace_ctx.end_tool(
+            call_id,
+            status="success" if ok else "error",
+            error_code=None if ok else result.get("error_code"),
+        )
+
+    if answer is None:
+        return None
+
+    events = [
+        format_sse_event(
+            StreamEventType.TOOL_CALL, {"tool": tool.name, "input": match.tool_input}
+        ),
+        format_sse_event(StreamEventType.TOOL_RESULT, {"tool": tool.name, "result": result}),
+        format_sse_event(StreamEventType.TOKEN, {"text": answer}),
+    ]
+    context_event = _tool_context_event(
+        [{"tool": tool.name, "input": match.tool_input, "result": result}], user_id
+    )
+    if context_event:
+        events.append(context_event)
+    return events
+
+
+def _parse_sse_event(sse_event: str) -> dict:
+    return json.loads(sse_event.removeprefix("data: "))
+
+
+def _is_recordable(sse_events: list[str]) -> bool:
+    """Check a turn may be recorded in the answer cache (see CACHEABLE_TOOLS)."""
+    for sse_event in sse_events:
+        payload = _parse_sse_event(sse_event)
+        data = payload.get("data") or {}
+        if payload["type"] == StreamEventType.ERROR.value:
+            return False
+        if payload["type"] == StreamEventType.TOOL_CALL.value:
+            tool_input = data.get("input")
+            if data["tool"] not in CACHEABLE_TOOLS:
+                return False
+            if isinstance(tool_input, dict) and any(
+                tool_input.get(name) for name in USER_SCOPED_INPUTS
+            ):
+                return False
+        if payload["type"] == StreamEventType.TOOL_RESULT.value:
+            result = data.get("result")
+            if isinstance(result, dict) and any(
+                result.get(name) is not None for name in USER_SCOPED_RESULT_FIELDS
+            ):
+                return False
+    return True
+
+
+def _tool_context_event(records: list[ToolRecord], user_id: int | None) -> str | None:
+    """Sign a turn's successful tool results as a TOOL_CONTEXT event."""
+    token = sign_tool_context(
+        [r for r in records if isinstance(r["result"], dict) and r["result"].get("success")],
+        user_id,
+    )
+    if token is None:
+        return None
+    return format_sse_event(StreamEventType.TOOL_CONTEXT, {"token": token})
+
+
+def _is_replayable(sse_event: str, user_id: int | None) -> bool:
+    """Check a recorded event can be replayed (its tool context hasn't expired)."""
+    payload = _parse_sse_event(sse_event)
+    if payload["type"] != StreamEventType.TOOL_CONTEXT.value:
+        return True
+    return verify_tool_context(payload["data"]["token"], user_id) is not None
+
+
+def _turn_messages(sse_events: list[str], user_id: int | None) -> list[BaseMessage]:
+    """
+    Rebuild the messages of an answer served without the agent (fast path
+    or answer cache) from its SSE events.
+
+    Returns:
+        The AIMessage with the tool calls and their ToolMessages from the
+        turn's TOOL_CONTEXT event, then an AIMessage with the answer text
+    """
+    turn: list[BaseMessage] = []
+    text = ""
+    for payload in map(_parse_sse_event, sse_events):
+        if payload["type"] == StreamEventType.TOKEN.value:
+            text += payload["data"]["text"]
+        elif payload["type"] == StreamEventType.TOOL_CONTEXT.value:
+            records = verify_tool_context(payload["data"]["token"], user_id)
+            turn.extend(tool_context_messages(records or []))
+    turn.append(AIMessage(content=text))
+    return turn
+
+
+async def _save_turn(
+    agent: Any,
+    conversation_id: str,
+    messages: list[dict],
+    sse_events: list[str],
+    user_id: int | None,
+) -> None:
+    """Append a turn answered without running the graph to its conversation."""
+    await agent.aupdate_state(
+        conversation_config(conversation_id),
+        {"messages": convert_messages(messages, user_id) + _turn_messages(sse_events, user_id)},
+        as_node="agent",
+    )
+
+
 async def stream_agent_response(
     agent: Any,
     messages: list[dict],
     trace_ctx: TraceContext | None = None,
     user_identifier: str | None = None,
+    user: dict | None = None,
+    conversation_id: str | None = None,
+    resume: bool = False,
+    deadline: Deadline | None = None,
 ) -> AsyncGenerator[str, None]:
     """
     Stream agent response as SSE events.
 
-    Converts LangGraph astream_events to our SSE format:
-    - TOKEN events for streaming text chunks
-    - TOOL_CALL events when agent invokes a tool (from on_tool_start)
-    - TOOL_RESULT events with tool outputs (from on_tool_end)
-    - ERROR events for failures
-    - DONE event at completion
+    Repeated anonymous first-turn questions are replayed from the answer
+    cache; everything else is streamed by _stream_agent_events and, when
+    cacheable, error-free and limited to read-only catalog tools, recorded
+    for replay.
+
+    In stateful mode (conversation_id given, agent compiled with the
+    conversation store) messages are only the new messages of the turn;
+    the graph resumes from the conversation's checkpoint, and answers
+    served without the graph are appended to it.
 
     Args:
         agent: Compiled LangGraph agent
         messages: Conversation history as list of dicts
         trace_ctx: Optional trace context for request correlation and timing
-        user_identifier: Optional user email/phone for prescription context
+        user_identifier: Optional user email/phone sent by the client
+        user: User row resolved from user_identifier by the API layer
+        conversation_id: Conversation thread (stateful mode only)
+        resume: Whether the conversation already has state; such turns
+            are never served from or recorded in the answer cache
+        deadline: Request deadline bounding model calls and tool queries
 
     Yields:
         SSE formatted event strings
     """
-    # Convert messages to LangChain format
-    lc_messages = convert_messages(messages)
-
-    # Inject user context as a system message if user_identifier is provided
-    # This is prepended to the conversation so the agent knows who it's helping
-    if user_identifier:
-        user_context = SystemMessage(
-            content=f"## User Context\n"
-            f"The current user's identifier for prescription lookups is: {user_identifier}\n"
-            f"Use this identifier when calling the prescription_management tool."
-        )
-        lc_messages = [user_context] + lc_messages
+    if trace_ctx and deadline:
+        trace_ctx.deadline_seconds = deadline.timeout_seconds
+    try:
+        with deadline_scope(deadline):
+            async for sse_event in _stream_turn(
+                agent,
+                messages,
+                trace_ctx,
+                user_identifier,
+                user,
+                conversation_id,
+                resume,
+            ):
+                yield sse_event
+
+    finally:
+        # Log trace summary at request completion
+        if trace_ctx:
+            summary = {"event": "request_complete", **trace_ctx.to_summary_dict()}
+            logger.info(json.dumps(summary, ensure_ascii=False))
+
+
+async def _stream_turn(
+    agent: Any,
+    messages: list[dict],
+    trace_ctx: TraceContext | None,
+    user_identifier: str | None,
+    user: dict | None,
+    conversation_id: str | None,
+    resume: bool,
+) -> AsyncGenerator[str, None]:
+    """Serve a turn from the answer cache, or run it and record it."""
+    user_id = user["user_id"] if user else None
+    cache_key = None
+    if get_settings().answer_cache_enabled and not resume:
+        try:
+            cache_key = await answer_cache_key(messages, user_identifier)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+
+    if cache_key is not None:
+        cached = get_answer_cache().get(cache_key)
+        if trace_ctx:
+            trace_ctx.answer_cache_hit = cached is not None
+        if cached is not None:
+            replayed = [e for e in cached if _is_replayable(e, user_id)]
+            if conversation_id:
+                await _save_turn(agent, conversation_id, messages, replayed, user_id)
+            for sse_event in replayed:
+                yield sse_event
+            return
+
+    recorded: list[str] = []
+    async for sse_event in _stream_agent_events(
+        agent, messages, trace_ctx, user_identifier, user, conversation_id, resume
+    ):
+        if cache_key is not None:
+            recorded.append(sse_event)
+        yield sse_event
+
+    if cache_key is not None and _is_recordable(recorded):
+        get_answer_cache().set(cache_key, tuple(recorded))
+
+
+async def _stream_agent_events(
+    agent: Any,
+    messages: list[dict],
+    trace_ctx: TraceContext | None,
+    user_identifier: str | None,
+    user: dict | None,
+    conversation_id: str | None,
+    resume: bool,
+) -> AsyncGenerator[str, None]:
+    """
+    Run one turn and stream it as SSE events.
+
+    Simple lookups recognized by the fast path on a conversation's first
+    user turn are answered directly from a tool call and a template.
+    Otherwise converts LangGraph astream_events to our SSE format:
+    - TOKEN events for streaming text chunks (or a templated direct answer)
+    - TOOL_CALL events when agent invokes a tool (from on_tool_start)
+    - TOOL_RESULT events with tool outputs (from on_tool_end)
+    - a TOOL_CONTEXT event with the signed tool results of the turn, which
+      clients send back with the assistant message
+    - ERROR events for failures; when the request deadline expires, the
+      ERROR event has code DEADLINE_EXCEEDED, the stage that was running and
+      the answer streamed so far; when the LLM gateway rejects the call
+      (circuit open, upstream overloaded) the code is LLM_UNAVAILABLE
+    - DONE event at completion
+
+    Arguments are as for stream_agent_response; user's user_id is exposed
+    to tools through the request context.
+    """
+    user_id = user["user_id"] if user else None
+
+    # User context is passed through the run config (not the messages) so
+    # the agent knows who it's helping without it being checkpointed
+    run_config: RunnableConfig = (
+        conversation_config(conversation_id) if conversation_id else {"configurable": {}}
+    )
+    run_config["configurable"]["user_context"] = get_user_context_prompt(
+        user_name=user["name"] if user else None,
+        user_identifier=user_identifier,
+    )
+
+    # Trusted, pre-resolved user and tool limits for tools (inherited by
+    # graph tasks)
+    settings = get_settings()
+    request_ctx = RequestContext(
+        user_id=user_id,
+        user_name=user["name"] if user else None,
+        trace=trace_ctx,
+        tool_slots=asyncio.Semaphore(max(1, settings.tool_concurrency)),
+    )
 
     # Map LangGraph run_id -> TraceContext call_id (handles overlapping/nested calls)
     active_calls: dict[str, int] = {}
+    # Map LangGraph run_id -> tool input, paired with results for the tool context
+    tool_inputs: dict[str, Any] = {}
+    tool_records: list[ToolRecord] = []
+    # Text streamed so far, returned as the partial answer on timeout
+    answer_parts: list[str] = []
+    # Map LangGraph run_id -> text of a model call the LLM gateway hasn't picked
+    held_tokens: dict[str, list[str]] = {}
 
     try:
+        # Convert messages to LangChain format, rehydrating earlier tool results
+        lc_messages = convert_messages(messages, user_id)
+
+        # A resumed conversation's earlier turns are only in its checkpoint
+        if settings.fast_path_enabled and not resume:
+            fast_path_events = None
+            match = await match_fast_path(messages)
+            if match:
+                fast_path_events = await _run_fast_path(match, trace_ctx, user_id)
+
+            hit = fast_path_events is not None
+            get_fast_path_stats().record(hit)
+            if trace_ctx:
+                trace_ctx.fast_path_hit = hit
+                trace_ctx.fast_path_intent = match.intent.value if hit else None
+
+            if hit:
+                if conversation_id:
+                    await _save_turn(
+                        agent, conversation_id, messages, fast_path_events, user_id
+                    )
+                for sse_event in fast_path_events:
+                    yield sse_event
+                yield format_sse_event(StreamEventType.DONE, {})
+                return
+
         # Stream using astream_events for fine-grained control
-        async for event in agent.astream_events(
-            {"messages": lc_messages},
-            version="v2",
-        ):
-            kind = event.get("event")
-            run_id = event.get("run_id")
-            run_key = str(run_id) if run_id is not None else None
-
-            # Handle streaming tokens from LLM
-            if kind == "on_chat_model_stream":
-                chunk = event.get("data", {}).get("chunk")
-                if isinstance(chunk, AIMessageChunk) and chunk.content:
-                    # Handle content that may be string, list of strings, or list of dicts
-                    text = _extract_chunk_text(chunk.content)
+        with request_scope(request_ctx):
+            # Likely lookups run while the first model call is in flight
+            if settings.prefetch_enabled:
+                await start_prefetch(messages)
+
+            async for event in agent.astream_events(
+                {"messages": lc_messages},
+                config=run_config,
+                version="v2",
+            ):
+                kind = event.get("event")
+                run_id = event.get("run_id")
+                run_key = str(run_id) if run_id is not None else None
+
+                # Text of a hedged call the LLM gateway has since picked
+                for text in _release_held_tokens(held_tokens, request_ctx.discarded_runs):
+                    answer_parts.append(text)
+                    yield format_sse_event(StreamEventType.TOKEN, {"text": text})
+
+                # Handle streaming tokens from LLM
+                if kind == "on_chat_model_stream":
+                    chunk = event.get("data", {}).get("chunk")
+                    if isinstance(chunk, AIMessageChunk) and chunk.content:
+                        # Handle content that may be string, list of strings, or list of dicts
+                        text = _extract_chunk_text(chunk.content)
+                        if text and run_key in request_ctx.discarded_runs:
+                            # Hedged call not picked (yet) by the LLM gateway
+                            held_tokens.setdefault(run_key, []).append(text)
+                        elif text:
+                            answer_parts.append(text)
+                            yield format_sse_event(StreamEventType.TOKEN, {"text": text})
+
+                # Templated answer emitted by the graph's direct_answer node
+                elif kind == "on_custom_event" and event.get("name") == DIRECT_ANSWER_EVENT:
+                    text = event.get("data", {}).get("text")
                     if text:
+                        answer_parts.append(text)
                         yield format_sse_event(StreamEventType.TOKEN, {"text": text})
 
-            # Handle tool start - more reliable than parsing tool_call_chunks
-            elif kind == "on_tool_start":
-                tool_name = event.get("name", "unknown")
-
-                # Record tool start in trace context
-                if trace_ctx and run_key:
-                    active_calls[run_key] = trace_ctx.start_tool(tool_name)
+                # Handle tool start - more reliable than parsing tool_call_chunks
+                elif kind == "on_tool_start":
+                    tool_name = event.get("name", "unknown")
+                    tool_input = event.get("data", {}).get("input")
+
+                    # Record tool start in trace context
+                    if trace_ctx and run_key:
+                        active_calls[run_key] = trace_ctx.start_tool(tool_name)
+                    if run_key:
+                        tool_inputs[run_key] = tool_input
+
+                    yield format_sse_event(
+                        StreamEventType.TOOL_CALL,
+                        {
+                            "tool": tool_name,
+                            "input": tool_input,
+                        },
+                    )
 
-                yield format_sse_event(
-                    StreamEventType.TOOL_CALL,
-                    {
+                # Handle tool execution results
+                elif kind == "on_tool_end":
+                    tool_name = event.get("name", "unknown")
+                    tool_output = _extract_tool_output(event.get("data", {}).get("output"))
+
+                    # Determine status and error info from output
+                    status = "success"
+                    error_code = None
+                    error_message = None
+                    if isinstance(tool_output, dict) and tool_output.get("success") is False:
+                        status = "error"
+                        error_code = tool_output.get("error_code")
+                        error_message = tool_output.get("error_message")
+
+                    served_from = request_ctx.served_runs.pop(run_key, None)
+                    execution = request_ctx.tool_executions.pop(run_key, None)
+
+                    # Record tool end in trace context
+                    if trace_ctx and run_key and run_key in active_calls:
+                        call_id = active_calls.pop(run_key)
+                        trace_ctx.end_tool(
+                            call_id,
+                            status=status,
+                            error_code=error_code,
+                            served_from=served_from,
+                            execution=execution,
+                        )
+                        if status == "error":
+                            trace_ctx.add_error(
+                                error_code=error_code or "UNKNOWN",
+                                message=error_message or "Unknown error",
+                                tool_name=tool_name,
+                            )
+
+                    if run_key in tool_inputs:
+                        tool_input = tool_inputs.pop(run_key)
+                        # A memo hit repeats a result already in the turn's records
+                        if served_from != SERVED_FROM_MEMO:
+                            tool_records.append(
+                                {
+                                    "tool": tool_name,
+                                    "input": tool_input if isinstance(tool_input, dict) else {},
+                                    "result": tool_output,
+                                }
+                            )
+
+                    result_data = {
                         "tool": tool_name,
-                        "input": event.get("data", {}).get("input"),
-                    },
-                )
-
-            # Handle tool execution results
-            elif kind == "on_tool_end":
-                tool_name = event.get("name", "unknown")
-                tool_output = event.get("data", {}).get("output")
-
-                # Determine status and error info from output
-                status = "success"
-                error_code = None
-                error_message = None
-                if isinstance(tool_output, dict) and tool_output.get("success") is False:
-                    status = "error"
-                    error_code = tool_output.get("error_code")
-                    error_message = tool_output.get("error_message")
-
-                # Record tool end in trace context
-                if trace_ctx and run_key and run_key in active_calls:
-                    call_id = active_calls.pop(run_key)
-                    trace_ctx.end_tool(call_id, status=status, error_code=error_code)
-                    if status == "error":
+                        "result": (
+                            tool_output if isinstance(tool_output, dict) else str(tool_output)
+                        ),
+                    }
+                    if served_from == SERVED_FROM_MEMO:
+                        # Same call as an earlier one; the tool didn't run again
+                        result_data["served_from"] = served_from
+                    yield format_sse_event(StreamEventType.TOOL_RESULT, result_data)
+
+                # Handle tool errors (defensive - may not fire but handle if it does)
+                elif kind == "on_tool_error":
+                    tool_name = event.get("name", "unknown")
+                    error_info = event.get("data", {}).get("error", "Unknown error")
+
+                    if trace_ctx and run_key and run_key in active_calls:
+                        call_id = active_calls.pop(run_key)
+                        if isinstance(error_info, DeadlineExceeded):
+                            # Recorded once the error reaches the stream
+                            trace_ctx.end_tool(
+                                call_id, status="error", error_code="DEADLINE_EXCEEDED"
+                            )
+                            continue
+                        trace_ctx.end_tool(call_id, status="error", error_code="TOOL_EXCEPTION")
                         trace_ctx.add_error(
-                            error_code=error_code or "UNKNOWN",
-                            message=error_message or "Unknown error",
+                            error_code="TOOL_EXCEPTION",
+                            message=str(error_info),
                             tool_name=tool_name,
                         )
 
-                yield format_sse_event(
-                    StreamEventType.TOOL_RESULT,
-                    {
-                        "tool": tool_name,
-                        "result": (
-                            tool_output
-                            if isinstance(tool_output, dict)
-                            else str(tool_output)
-                        ),
-                    },
-                )
-
-            # Handle tool errors (defensive - may not fire but handle if it does)
-            elif kind == "on_tool_error":
-                tool_name = event.get("name", "unknown")
-                error_info = event.get("data", {}).get("error", "Unknown error")
-
-                if trace_ctx and run_key and run_key in active_calls:
-                    call_id = active_calls.pop(run_key)
-                    trace_ctx.end_tool(call_id, status="error", error_code="TOOL_EXCEPTION")
-                    trace_ctx.add_error(
-                        error_code="TOOL_EXCEPTION",
-                        message=str(error_info),
-                        tool_name=tool_name,
-                    )
+            for text in _release_held_tokens(held_tokens, request_ctx.discarded_runs):
+                answer_parts.append(text)
+                yield format_sse_event(StreamEventType.TOKEN, {"text": text})
+
+        # Tool results of the turn for the client to send back next turn
+        context_event = _tool_context_event(tool_records, user_id)
+        if context_event:
+            yield context_event
 
         # Send done event
         yield format_sse_event(StreamEventType.DONE, {})
@@ -202,6 +613,44 @@ async def stream_agent_response(
         logger.info("SSE stream cancelled by client")
         raise
 
+    except DeadlineExceeded as e:
+        logger.warning(f"Request deadline exceeded during {e.stage}")
+        if trace_ctx:
+            trace_ctx.deadline_stage = e.stage
+            trace_ctx.add_error(
+                error_code="DEADLINE_EXCEEDED",
+                message=str(e),
+                tool_name=e.stage.removeprefix("tool:") if e.stage.startswith("tool:") else None,
+            )
+        yield format_sse_event(
+            StreamEventType.ERROR,
+            {
+                "message": "The request took too long and was stopped.",
+                "code": "DEADLINE_EXCEEDED",
+                "stage": e.stage,
+                "partial_answer": "".join(answer_parts),
+            },
+        )
+        yield format_sse_event(StreamEventType.DONE, {})
+
+    except LLMUnavailable as e:
+        logger.warning(str(e))
+        if trace_ctx:
+            trace_ctx.add_error(error_code="LLM_UNAVAILABLE", message=str(e))
+        yield format_sse_event(
+            StreamEventType.ERROR,
+            {
+                "message": "The assistant is temporarily unavailable. Please try again shortly.",
+                "code": "LLM_UNAVAILABLE",
+                "reason": e.reason,
+                "retry_after_seconds": (
+                    round(e.retry_after, 1) if e.retry_after is not None else None
+                ),
+                "partial_answer": "".join(answer_parts),
+            },
+        )
+        yield format_sse_event(StreamEventType.DONE, {})
+
     except Exception as e:
         # Record stream-level error
         if trace_ctx:
@@ -214,7 +663,4 @@ async def stream_agent_response(
         yield format_sse_event(StreamEventType.DONE, {})
 
     finally:
-        # Log trace summary at request completion
-        if trace_ctx:
-            summary = {"event": "request_complete", **trace_ctx.to_summary_dict()}
-            logger.info(json.dumps(summary, ensure_ascii=False))
+        cancel_prefetches(request_ctx)
@@ -0,0 +1,127 @@
+"""Bilingual answer templates for structured tool results.
+
+Used to answer simple lookups directly from tool output, without an LLM
+turn. Templates only restate fields from the pharmacy database, so they
+stay within the facts-only policy.
+"""
+
+import re
+from typing import Callable
+
+Renderer = Callable[[dict, str], str | None]
+
+_HEBREW_SCRIPT = re.compile("[\u0590-\u05ff]")
+
+
+def detect_language(text: str) -> str:
+    """Detect the message language: "he" if it contains Hebrew, else "en"."""
+    return "he" if _HEBREW_SCRIPT.search(text) else "en"
+
+
+def _disclaimer(language: str) -> str:
+    if language == "he":
+        return "לייעוץ רפואי, אנא פנה לרופא או לרוקח שלך."
+    return "For medical advice, please consult your doctor or pharmacist."
+
+
+def _medication_lines(med: dict, language: str) -> list[str]:
+    if language == "he":
+        lines = [
+            f"**{med['name_he']}** ({med['name_en']})",
+            f"- רכיבים פעילים: {med['active_ingredients'] or 'לא צוין'}",
+            f"- מינון: {med['dosage_he'] or 'לא צוין'}",
+            f"- מרשם: {'נדרש מרשם' if med['rx_required'] else 'ללא מרשם'}",
+        ]
+        if med["warnings_he"]:
+            lines.append(f"- אזהרות: {med['warnings_he']}")
+    else:
+        lines = [
+            f"**{med['name_en']}** ({med['name_he']})",
+            f"- Active ingredients: {med['active_ingredients'] or 'Not specified'}",
+            f"- Dosage: {med['dosage_en'] or 'Not specified'}",
+            f"- Prescription: {'Required' if med['rx_required'] else 'Not required (OTC)'}",
+        ]
+        if med["warnings_en"]:
+            lines.append(f"- Warnings: {med['warnings_en']}")
+    return lines
+
+
+def render_medication_info(result: dict, language: str) -> str | None:
+    """Render a successful get_medication_by_name result."""
+    med = result.get("medication")
+    if not med:
+        return None
+    return "\n".join(_medication_lines(med, language) + ["", _disclaimer(language)])
+
+
+def render_inventory(result: dict, language: str) -> str | None:
+    """Render a successful check_inventory result."""
+    inv = result.get("inventory")
+    if not inv:
+        return None
+
+    if language == "he":
+        name = inv["medication_name_he"]
+        if inv["in_stock"]:
+            return f"{name} זמין במלאי ({inv['qty']} יחידות)."
+        if inv["restock_eta"]:
+            return f"{name} אינו זמין כרגע במלאי. מועד חידוש המלאי הצפוי: {inv['restock_eta']}."
+        return f"{name} אינו זמין כרגע במלאי."
+
+    name = inv["medication_name_en"]
+    if inv["in_stock"]:
+        return f"{name} is in stock ({inv['qty']} units available)."
+    if inv["restock_eta"]:
+        return f"{name} is currently out of stock. Expected restock: {inv['restock_eta']}."
+    return f"{name} is currently out of stock."
+
+
+def render_medication_availability(result: dict, language: str) -> str | None:
+    """Render a successful get_medication_availability result."""
+    med = result.get("medication")
+    if not med:
+        return None
+
+    lines = _medication_lines(med, language) + [""]
+    stock = render_inventory(result, language)
+    if stock:
+        lines.append(stock)
+
+    has_rx = result.get("has_active_prescription")
+    rx = result.get("prescription")
+    if has_rx is True and rx:
+        lines.append(
+            f"יש לך מרשם פעיל לתרופה זו ({rx['refills_left']} חידושים נותרו)."
+            if language == "he"
+            else f"You have an active prescription for it ({rx['refills_left']} refills left)."
+        )
+    elif has_rx is False:
+        lines.append(
+            "לא נמצא מרשם פעיל על שמך לתרופה זו."
+            if language == "he"
+            else "You don't have an active prescription for it on file."
+        )
+
+    return "\n".join(lines + ["", _disclaimer(language)])
+
+
+# Tool name -> renderer for its successful result
+TOOL_TEMPLATES: dict[str, Renderer] = {
+    "get_medication_availability": render_medication_availability,
+    "get_medication_by_name": render_medication_info,
+    "check_inventory": render_inventory,
+}
+
+
+def render_tool_answer(tool_name: str, result: dict, language: str) -> str | None:
+    """
+    Render a localized answer for a tool result.
+
+    Returns:
+        The answer text, or None if the tool or result shape has no template
+        (including any unsuccessful result)
+    """
+    renderer = TOOL_TEMPLATES.get(tool_name)
+    if renderer is None or not isinstance(result, dict) or result.get("success") is not True:
+        return None
+    return renderer(result, language)
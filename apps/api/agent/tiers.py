@@ -0,0 +1,88 @@
+"""Model tiers: route easy turns to a small, fast model.
+
+Greetings, thanks and simple lookups don't need the large model, but every
+turn used to be sent to it. classify_tier is a cheap keyword classifier over
+the latest user message (no model call):
+- SMALL for short chit-chat and simple lookups (mostly tool-argument
+  extraction)
+- LARGE for long or multi-part questions, anything policy-sensitive (medical
+  judgment, prescriptions, refills, reservations, interactions) and replies
+  to a question the assistant asked (e.g. confirming a refill)
+
+Each tier's model gets its own graph, compiled at startup (see
+apps.api.agent.graph).
+"""
+
+from enum import Enum
+
+from apps.api.agent.fast_path import classify_intent, keyword_pattern
+from apps.api.config import Settings
+
+
+class ModelTier(str, Enum):
+    """Model tiers, from cheapest to most capable."""
+
+    SMALL = "small"
+    LARGE = "large"
+
+
+# Turns that need the large model's judgment (or may have side effects)
+_LARGE_TIER_PATTERN = keyword_pattern(
+    "should", "recommend", "safe", "better", "instead", "used for", "treat",
+    "side effect", "side effects", "pregnant", "pregnancy", "breastfeeding",
+    "child", "children", "kid", "kids", "dose for", "overdose", "mix",
+    "together", "prescription", "prescriptions", "refill", "reserve", "hold",
+    "interaction", "interactions", "can i take", "with my", "my medications",
+    "allergic", "allergy", "why", "compare",
+    "כדאי", "מומלץ", "להמליץ", "תמליץ", "בטוח", "במקום", "משמש", "נגד",
+    "תופעות לוואי", "הריון", "בהריון", "הנקה", "ילד", "ילדים", "לערבב", "ביחד",
+    "מרשם", "מרשמים", "חידוש", "לשריין", "להזמין", "שמור", "אינטראקציה",
+    "אפשר לקחת", "מותר לקחת", "אלרגיה", "אלרגי", "למה", "להשוות",
+)
+
+
+def tier_models(settings: Settings) -> dict[ModelTier, str]:
+    """
+    Get the model for each tier.
+
+    OPENAI_SMALL_MODEL set to "" disables tiering: both tiers use
+    OPENAI_MODEL.
+    """
+    return {
+        ModelTier.SMALL: settings.openai_small_model or settings.openai_model,
+        ModelTier.LARGE: settings.openai_model,
+    }
+
+
+def classify_tier(messages: list[dict], small_max_words: int) -> ModelTier:
+    """
+    Pick the model tier for a turn.
+
+    Args:
+        messages: Conversation history as list of dicts (latest last)
+        small_max_words: Longest user message the small tier handles
+
+    Returns:
+        SMALL for short, simple turns; LARGE otherwise
+    """
+    user_messages = [m for m in messages if m["role"] == "user"]
+    if not user_messages:
+        return ModelTier.LARGE
+    text = user_messages[-1]["content"]
+
+    # A simple lookup the fast path would answer, if the catalog matched
+    if classify_intent(text) is not None:
+        return ModelTier.SMALL
+
+    if len(text.split()) > small_max_words or text.count("?") > 1:
+        return ModelTier.LARGE
+    if _LARGE_TIER_PATTERN.search(text):
+        return ModelTier.LARGE
+
+    # "Yes, go ahead" only makes sense with the question it answers
+    previous = messages[:-1]
+    if previous and previous[-1]["role"] == "assistant":
+        if previous[-1]["content"].rstrip().endswith("?"):
+            return ModelTier.LARGE
+
+    return ModelTier.SMALL
@@ -0,0 +1,147 @@
+"""Signed summaries of tool results carried across stateless turns.
+
+The client only sends back user/assistant text, so without help the model
+loses the structured tool results of earlier turns and has to call the
+tools again for follow-ups ("and is it in stock?"). At the end of a turn the
+stream includes a TOOL_CONTEXT event: a compact summary of the turn's tool
+calls and results, HMAC-signed so clients can't forge tool output. Clients
+attach it to the assistant message, and convert_messages turns it back into
+an AIMessage with the tool calls and their ToolMessages.
+
+A summary is bound to the user it was produced for and expires after
+TOOL_CONTEXT_MAX_AGE_SECONDS; anything that fails verification is ignored.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from apps.api.config import get_settings
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Same limit as a message's content
+MAX_TOOL_CONTEXT_CHARS = 16000
+
+ToolRecord = dict[str, Any]  # {"tool": name, "input": args, "result": result}
+
+_process_secret = secrets.token_bytes(32)
+
+
+def _secret() -> bytes:
+    """Get the signing key (random per process unless configured)."""
+    configured = get_settings().tool_context_secret
+    return configured.encode("utf-8") if configured else _process_secret
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(payload: str) -> str:
+    return _b64encode(hmac.new(_secret(), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def _compact(value: Any) -> Any:
+    """Drop None and empty values so the summary stays small."""
+    if isinstance(value, dict):
+        compacted = {k: _compact(v) for k, v in value.items()}
+        return {k: v for k, v in compacted.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def sign_tool_context(records: list[ToolRecord], user_id: int | None) -> str | None:
+    """
+    Encode and sign a turn's tool calls and results.
+
+    The oldest records are dropped if the summary would exceed
+    MAX_TOOL_CONTEXT_CHARS.
+
+    Args:
+        records: Tool calls of the turn, in call order
+        user_id: Resolved user the results were produced for
+
+    Returns:
+        The signed token, or None if there is nothing to carry
+    """
+    records = [
+        {"tool": r["tool"], "input": _compact(r.get("input") or {}), "result": _compact(r["result"])}
+        for r in records
+        if isinstance(r.get("result"), dict)
+    ]
+    while records:
+        body = {"iat": int(time.time()), "uid": user_id, "calls": records}
+        payload = _b64encode(
+            json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        )
+        token = f"{payload}.{_signature(payload)}"
+        if len(token) <= MAX_TOOL_CONTEXT_CHARS:
+            return token
+        records = records[1:]
+    return None
+
+
+def verify_tool_context(token: str, user_id: int | None) -> list[ToolRecord] | None:
+    """
+    Verify a signed tool context and get its records.
+
+    Returns:
+        The records, or None if the token is malformed, forged, expired or
+        was issued for another user
+    """
+    # Tokens are base64url; anything else (it comes from the client) is malformed
+    if not token.isascii():
+        logger.info("Ignoring malformed tool context")
+        return None
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _signature(payload)):
+        logger.info("Ignoring tool context with an invalid signature")
+        return None
+    try:
+        body = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+
+    if time.time() - body.get("iat", 0) > get_settings().tool_context_max_age_seconds:
+        return None
+    if body.get("uid") != user_id:
+        return None
+    return body.get("calls") or None
+
+
+def tool_context_messages(records: list[ToolRecord]) -> list[BaseMessage]:
+    """Rebuild an AIMessage with the tool calls and one ToolMessage per result."""
+    if not records:
+        return []
+    call_ids = [f"call_{uuid.uuid4().hex[:24]}" for _ in records]
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[
+                {"name": r["tool"], "args": r.get("input") or {}, "id": call_id}
+                for r, call_id in zip(records, call_ids)
+            ],
+        ),
+        *(
+            ToolMessage(
+                content=json.dumps(r["result"], ensure_ascii=False),
+                tool_call_id=call_id,
+                name=r["tool"],
+            )
+            for r, call_id in zip(records, call_ids)
+        ),
+    ]
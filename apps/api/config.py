@@ -18,6 +18,137 @@ class Settings:
         self.app_version: str = "0.1.0"
         self.debug: bool = os.getenv("DEBUG", "false").lower() == "true"
         self.db_path: str = os.getenv("DB_PATH", "data/pharmacy.db")
+        self.db_busy_timeout_ms: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+        self.db_write_batch_size: int = int(os.getenv("DB_WRITE_BATCH_SIZE", "32"))
+
+        # Shared HTTP client for OpenAI calls (see apps.api.http_client)
+        self.llm_http_max_connections: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+        self.llm_http_max_keepalive_connections: int = int(
+            os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+        )
+        self.llm_http_keepalive_expiry_seconds: float = float(
+            os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", "60")
+        )
+        self.llm_http_connect_timeout_seconds: float = float(
+            os.getenv("LLM_HTTP_CONNECT_TIMEOUT_SECONDS", "5")
+        )
+        self.llm_http_read_timeout_seconds: float = float(
+            os.getenv("LLM_HTTP_READ_TIMEOUT_SECONDS", "60")
+        )
+        self.llm_http2_enabled: bool = os.getenv("LLM_HTTP2_ENABLED", "false").lower() == "true"
+
+        # Model call gateway (see apps.api.llm_gateway): AIMD concurrency
+        # limit, retries of overloaded calls, hedging (0 disables) and the
+        # circuit breaker
+        self.llm_concurrency_initial: int = int(os.getenv("LLM_CONCURRENCY_INITIAL", "10"))
+        self.llm_concurrency_min: int = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+        self.llm_concurrency_max: int = int(os.getenv("LLM_CONCURRENCY_MAX", "50"))
+        self.llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self.llm_retry_backoff_seconds: float = float(
+            os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5")
+        )
+        self.llm_retry_max_backoff_seconds: float = float(
+            os.getenv("LLM_RETRY_MAX_BACKOFF_SECONDS", "8")
+        )
+        self.llm_hedge_delay_seconds: float = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "0"))
+        self.llm_breaker_failure_threshold: int = int(
+            os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5")
+        )
+        self.llm_breaker_reset_seconds: float = float(
+            os.getenv("LLM_BREAKER_RESET_SECONDS", "30")
+        )
+
+        # Overall time limit of a chat request; clients may ask for another
+        # one with X-Request-Timeout, up to the max
+        self.request_timeout_seconds: float = float(
+            os.getenv("REQUEST_TIMEOUT_SECONDS", "60")
+        )
+        self.max_request_timeout_seconds: float = float(
+            os.getenv("MAX_REQUEST_TIMEOUT_SECONDS", "300")
+        )
+
+        # Model tiers: easy turns go to the small model ("" disables tiering)
+        self.openai_small_model: str = os.getenv("OPENAI_SMALL_MODEL", "gpt-5-mini-2025-08-07")
+        self.small_tier_max_words: int = int(os.getenv("SMALL_TIER_MAX_WORDS", "20"))
+
+        # Identifier -> user row cache (LRU + TTL)
+        self.user_cache_size: int = int(os.getenv("USER_CACHE_SIZE", "1024"))
+        self.user_cache_ttl_seconds: float = float(
+            os.getenv("USER_CACHE_TTL_SECONDS", "300")
+        )
+
+        # Prescription LIST page size
+        self.prescription_page_size: int = int(
+            os.getenv("PRESCRIPTION_PAGE_SIZE", "20")
+        )
+
+        # Background prescription expiry sweeper
+        self.expiry_sweep_interval_seconds: float = float(
+            os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "300")
+        )
+        self.expiry_sweep_batch_size: int = int(
+            os.getenv("EXPIRY_SWEEP_BATCH_SIZE", "500")
+        )
+
+        # Optional server-side conversation state (clients send only new messages)
+        self.conversation_state_enabled: bool = os.getenv("CONVERSATION_STATE_ENABLED", "false").lower() == "true"
+        self.conversation_db_path: str = os.getenv(
+            "CONVERSATION_DB_PATH", "data/conversations.db"
+        )
+        # Conversations unused this long are deleted (checked every
+        # EXPIRY_SWEEP_INTERVAL_SECONDS)
+        self.conversation_ttl_seconds: float = float(
+            os.getenv("CONVERSATION_TTL_SECONDS", "604800")
+        )
+
+        # Signed tool-result summaries returned by clients (an empty secret
+        # means a random per-process key)
+        self.tool_context_secret: str = os.getenv("TOOL_CONTEXT_SECRET", "")
+        self.tool_context_max_age_seconds: float = float(
+            os.getenv("TOOL_CONTEXT_MAX_AGE_SECONDS", "900")
+        )
+
+        # Conversation history sent to the model (0 disables windowing)
+        self.history_token_budget: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))
+        self.history_summary_max_tokens: int = int(
+            os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "500")
+        )
+
+        # Max tool calls of one request running at once
+        self.tool_concurrency: int = int(os.getenv("TOOL_CONCURRENCY", "4"))
+
+        # Deterministic fast path for simple lookups (skips the LLM)
+        self.fast_path_enabled: bool = os.getenv("FAST_PATH_ENABLED", "false").lower() == "true"
+        self.catalog_ttl_seconds: float = float(
+            os.getenv("CATALOG_TTL_SECONDS", "300")
+        )
+
+        # Start likely lookups while the first model call is in flight
+        self.prefetch_enabled: bool = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+
+        # End the run with a templated answer after simple single-tool lookups
+        self.direct_answer_enabled: bool = os.getenv("DIRECT_ANSWER_ENABLED", "false").lower() == "true"
+
+        # Replay recorded answers to repeated anonymous first-turn questions
+        self.answer_cache_enabled: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+        self.answer_cache_size: int = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+        self.answer_cache_ttl_seconds: float = float(
+            os.getenv("ANSWER_CACHE_TTL_SECONDS", "600")
+        )
+
+        # Drug interaction index reload interval
+        self.interaction_index_ttl_seconds: float = float(
+            os.getenv("INTERACTION_INDEX_TTL_SECONDS", "3600")
+        )
+
+        # Reservation holds (in-memory, reconciled to SQLite in the background)
+        self.reservation_ttl_seconds: int = int(
+            os.getenv("RESERVATION_TTL_SECONDS", "1800")
+        )
+        self.reservation_shards: int = int(os.getenv("RESERVATION_SHARDS", "16"))
+        self.reservation_sync_interval_seconds: float = float(
+            os.getenv("RESERVATION_SYNC_INTERVAL_SECONDS", "30")
+        )
 
 
 @lru_cache
@@ -7,6 +7,7 @@ from typing import AsyncGenerator
 import aiosqlite
 
 from apps.api.config import get_settings
+from apps.api.deadline import remaining_budget
 
 
 def get_db_path() -> Path:
@@ -20,8 +21,11 @@ async def get_connection() -> AsyncGenerator[aiosqlite.Connection, None]:
     """
     Async context manager for database connections.
 
-    Enables foreign key constraints and returns row results as sqlite3.Row
-    for dict-like access.
+    Enables foreign key constraints, waits up to the configured busy timeout
+    (capped by the request's remaining deadline budget) instead of failing
+    on a locked database, and returns row results as
+    sqlite3.Row for dict-like access. Writes should go through the
+    single-writer queue in apps.api.db_writer.
 
     Usage:
         async with get_connection() as db:
@@ -29,7 +33,12 @@ async def get_connection() -> AsyncGenerator[aiosqlite.Connection, None]:
                 rows = await cursor.fetchall()
     """
     db_path = get_db_path()
+    busy_timeout_ms = get_settings().db_busy_timeout_ms
+    remaining = remaining_budget()
+    if remaining is not None:
+        busy_timeout_ms = min(busy_timeout_ms, remaining * 1000)
     async with aiosqlite.connect(db_path) as db:
+        await db.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
         await db.execute("PRAGMA foreign_keys = ON")
         db.row_factory = aiosqlite.Row
         yield db
@@ -0,0 +1,189 @@
+"""Single-writer queue for SQLite writes.
+
+SQLite allows one writer at a time. Instead of letting every request open
+its own connection and race for the write lock (and fail with "database is
+locked" under bursts), writes are submitted to one queue drained by a single
+task that owns a dedicated connection. Queued writes are committed in
+batches, each isolated by a savepoint so one failing write does not roll
+back the others. The database runs in WAL mode so readers on other
+connections are never blocked by the writer.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TypeVar
+
+import aiosqlite
+
+from apps.api.config import get_settings
+from apps.api.database import get_db_path
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+WriteFn = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+@dataclass
+class _WriteOp:
+    """A queued write and the future its caller is awaiting."""
+
+    fn: WriteFn
+    future: asyncio.Future
+
+
+class DatabaseWriter:
+    """Owns the only write connection and applies queued writes in batches."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        batch_size: int = 32,
+        busy_timeout_ms: int = 5000,
+    ) -> None:
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[_WriteOp] = asyncio.Queue()
+        self._task = self.loop.create_task(self._run())
+        self.batches_committed = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the writer task is still alive."""
+        return not self._task.done()
+
+    async def submit(self, fn: Callable[[aiosqlite.Connection], Awaitable[T]]) -> T:
+        """
+        Queue a write and wait until it has been committed.
+
+        Args:
+            fn: Coroutine function run against the writer connection inside a
+                transaction. It must not commit or roll back itself.
+
+        Returns:
+            fn's return value, once the batch containing it is committed
+
+        Raises:
+            Whatever fn raised (only fn's own changes are rolled back), or the
+            commit error if the batch could not be committed
+        """
+        if not self.running:
+            raise RuntimeError("Database writer is not running")
+        future = self.loop.create_future()
+        await self._queue.put(_WriteOp(fn=fn, future=future))
+        return await future
+
+    async def stop(self) -> None:
+        """Stop the writer task and close its connection."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.db_path, isolation_level=None)
+        db.row_factory = aiosqlite.Row
+        await db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA foreign_keys = ON")
+        return db
+
+    async def _run(self) -> None:
+        db: aiosqlite.Connection | None = None
+        try:
+            db = await self._connect()
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                await self._apply_batch(db, batch)
+        except Exception as e:
+            logger.error(f"Database writer failed: {e}")
+        finally:
+            if db is not None:
+                await db.close()
+            # Fail anything still queued so callers don't hang
+            while not self._queue.empty():
+                op = self._queue.get_nowait()
+                if not op.future.done():
+                    op.future.set_exception(RuntimeError("Database writer stopped"))
+
+    async def _apply_batch(self, db: aiosqlite.Connection, batch: list[_WriteOp]) -> None:
+        """Run a batch of writes in one transaction, one savepoint per write."""
+        outcomes: list[tuple[bool, Any]] = []
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                if op.future.cancelled():
+                    # The caller gave up (deadline or disconnect) before it ran
+                    outcomes.append((False, None))
+                    continue
+                await db.execute("SAVEPOINT write_op")
+                try:
+                    result = await op.fn(db)
+                except Exception as e:
+                    await db.execute("ROLLBACK TO write_op")
+                    outcomes.append((False, e))
+                else:
+                    outcomes.append((True, result))
+                finally:
+                    await db.execute("RELEASE write_op")
+            await db.execute("COMMIT")
+            self.batches_committed += 1
+        except Exception as e:
+            logger.error(f"Database write batch of {len(batch)} failed: {e}")
+            if db.in_transaction:
+                await db.execute("ROLLBACK")
+            outcomes = [(False, e)] * len(batch)
+
+        for op, (ok, value) in zip(batch, outcomes):
+            if op.future.done():
+                continue
+            if ok:
+                op.future.set_result(value)
+            else:
+                op.future.set_exception(value)
+
+
+_writer: DatabaseWriter | None = None
+
+
+def get_db_writer() -> DatabaseWriter:
+    """
+    Get the writer for the configured database on the running event loop.
+
+    The writer is created on first use, and recreated if the database path
+    or event loop changed (e.g. between test cases).
+    """
+    global _writer
+    loop = asyncio.get_running_loop()
+    db_path = get_db_path()
+    if (
+        _writer is None
+        or not _writer.running
+        or _writer.loop is not loop
+        or _writer.db_path != db_path
+    ):
+        if _writer is not None and _writer.running and _writer.loop is loop:
+            loop.create_task(_writer.stop())
+        settings = get_settings()
+        _writer = DatabaseWriter(
+            db_path,
+            batch_size=settings.db_write_batch_size,
+            busy_timeout_ms=settings.db_busy_timeout_ms,
+        )
+    return _writer
+
+
+async def stop_db_writer() -> None:
+    """Stop the current writer, if any (called at shutdown)."""
+    global _writer
+    if _writer is not None and _writer.running:
+        await _writer.stop()
+    _writer = None
@@ -0,0 +1,95 @@
+"""Per-request deadline shared by model calls and tool queries.
+
+chat_stream starts a Deadline (REQUEST_TIMEOUT_SECONDS, or the client's
+X-Request-Timeout) and stream_agent_response makes it current for the
+request. Each model call and tool call is bounded by the remaining budget
+(run_within_deadline), and SQLite waits on a locked database no longer than
+that budget either. When the budget runs out, DeadlineExceeded names the
+stage that was running.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"Request deadline exceeded during {stage}")
+
+
+@dataclass
+class Deadline:
+    """Point in time by which a request must finish."""
+
+    timeout_seconds: float
+    expires_at: float = field(init=False)  # time.monotonic() value
+
+    def __post_init__(self) -> None:
+        self.expires_at = time.monotonic() + self.timeout_seconds
+
+    def remaining(self) -> float:
+        """Seconds left, or 0 once expired."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+
+_current: ContextVar[Deadline | None] = ContextVar("request_deadline", default=None)
+
+
+def get_deadline() -> Deadline | None:
+    """Get the deadline of the request being handled, if any."""
+    return _current.get()
+
+
+def remaining_budget() -> float | None:
+    """Seconds left for the current request, or None without a deadline."""
+    deadline = _current.get()
+    return deadline.remaining() if deadline else None
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | None) -> Iterator[Deadline | None]:
+    """Make deadline the current request deadline for the enclosed block."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Async generator finalized from a different context
+            pass
+
+
+async def run_within_deadline(awaitable: Awaitable[T], stage: str) -> T:
+    """
+    Await awaitable, bounded by the current request's remaining budget.
+
+    Args:
+        awaitable: Work to run (cancelled if the budget runs out)
+        stage: Name of the work, reported if it exceeds the deadline
+
+    Raises:
+        DeadlineExceeded: If the budget ran out first
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, deadline.remaining())
+    except TimeoutError:
+        if not deadline.expired:
+            raise  # raised by the work itself
+        raise DeadlineExceeded(stage) from None
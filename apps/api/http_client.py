@@ -0,0 +1,122 @@
+"""Shared HTTP client for calls to the OpenAI API.
+
+Each ChatOpenAI would otherwise create its own client with default pool
+settings (5s keep-alive), so during bursts connections are not reused and TLS
+handshakes show up in model latency. One httpx.AsyncClient, tuned from
+Settings (pool limits, keep-alive expiry, timeouts, optional HTTP/2), is
+shared by every model: all tiers and the eval judge.
+
+The client is opened in the app lifespan (or on first use) and closed at
+shutdown. http_client_stats() reports the pool and how many connections and
+TLS handshakes were made, from httpcore trace events.
+"""
+
+import importlib.util
+import threading
+from typing import Any
+
+import httpx
+
+from apps.api.config import Settings, get_settings
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConnectionStats:
+    """Requests sent and connections made by the shared client."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event_name: str, info: dict[str, Any]) -> None:
+        """httpcore trace callback, set on every request."""
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def on_request(self, request: httpx.Request) -> None:
+        """httpx request hook: count the request and trace its connection."""
+        self.requests += 1
+        request.extensions["trace"] = self.trace
+
+
+_client: httpx.AsyncClient | None = None
+_stats = ConnectionStats()
+_lock = threading.Lock()
+
+
+def http_timeout(settings: Settings) -> httpx.Timeout:
+    """Timeouts for model calls (read covers the gap between streamed chunks)."""
+    return httpx.Timeout(
+        settings.llm_http_read_timeout_seconds,
+        connect=settings.llm_http_connect_timeout_seconds,
+    )
+
+
+def _create_client(settings: Settings) -> httpx.AsyncClient:
+    http2 = settings.llm_http2_enabled
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("LLM_HTTP2_ENABLED is set but h2 is not installed; using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+        ),
+        timeout=http_timeout(settings),
+        event_hooks={"request": [_stats.on_request]},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = _create_client(get_settings())
+        return _client
+
+
+def openai_client_kwargs() -> dict[str, Any]:
+    """ChatOpenAI arguments that route its async calls through the shared client."""
+    return {
+        "http_async_client": get_http_client(),
+        "timeout": http_timeout(get_settings()),
+    }
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def http_client_stats() -> dict[str, Any]:
+    """Get request and connection counters and the current pool state."""
+    settings = get_settings()
+    client = _client
+    # httpx doesn't expose its transport's pool; read it defensively
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    return {
+        "open": client is not None and not client.is_closed,
+        "requests": _stats.requests,
+        "connections_opened": _stats.connections_opened,
+        "tls_handshakes": _stats.tls_handshakes,
+        "pool": {
+            "connections": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+            "max_connections": settings.llm_http_max_connections,
+            "max_keepalive_connections": settings.llm_http_max_keepalive_connections,
+        },
+    }
@@ -0,0 +1,117 @@
+"""User identity resolution by normalized email or phone number."""
+
+import re
+
+from apps.api.cache import TTLCache
+from apps.api.config import get_settings
+from apps.api.database import get_connection
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Local numbers are Israeli (e.g. 050-1234567 -> +972501234567)
+DEFAULT_COUNTRY_CODE = "972"
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_email(value: str) -> str | None:
+    """Normalize an email address for lookup, or None if it isn't one."""
+    value = value.strip().lower()
+    if "@" not in value or " " in value:
+        return None
+    return value
+
+
+def normalize_phone(value: str) -> str | None:
+    """
+    Normalize a phone number to E.164, or None if it isn't one.
+
+    Separators are ignored, a leading trunk "0" is replaced with the default
+    country code, and "00" / "+" international prefixes are accepted.
+    """
+    value = value.strip()
+    if not value or re.search(r"[^\d\s\-+().]", value):
+        return None
+
+    digits = _NON_DIGITS.sub("", value)
+    if value.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = DEFAULT_COUNTRY_CODE + digits[1:]
+
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+
+def normalize_identifier(identifier: str) -> tuple[str, str] | None:
+    """
+    Normalize a user identifier to a (column, value) lookup key.
+
+    Returns:
+        ("email_norm", value) or ("phone_e164", value), or None if the
+        identifier is neither a valid email nor a phone number
+    """
+    email = normalize_email(identifier)
+    if email:
+        return ("email_norm", email)
+    phone = normalize_phone(identifier)
+    if phone:
+        return ("phone_e164", phone)
+    return None
+
+
+_user_cache: TTLCache[tuple[str, str], dict] | None = None
+
+
+def get_user_cache() -> TTLCache[tuple[str, str], dict]:
+    """Get the process-wide identifier -> user row cache."""
+    global _user_cache
+    if _user_cache is None:
+        settings = get_settings()
+        _user_cache = TTLCache(
+            maxsize=settings.user_cache_size,
+            ttl_seconds=settings.user_cache_ttl_seconds,
+        )
+    return _user_cache
+
+
+async def resolve_user(identifier: str) -> dict | None:
+    """
+    Resolve an email or phone identifier to a user row.
+
+    The identifier is normalized the same way the users table's
+    email_norm / phone_e164 columns are, so the lookup is a single unique
+    index probe. Hits are served from an LRU+TTL cache; misses are not
+    cached so newly registered users resolve immediately.
+
+    Returns:
+        Dict with user_id, name, phone, email - or None if not found
+    """
+    key = normalize_identifier(identifier)
+    if key is None:
+        return None
+
+    cache = get_user_cache()
+    user = cache.get(key)
+    if user is not None:
+        return user
+
+    column, value = key
+    async with get_connection() as db:
+        async with db.execute(
+            f"SELECT user_id, name, phone, email FROM users WHERE {column} = ?",
+            (value,),
+        ) as cursor:
+            row = await cursor.fetchone()
+
+    if not row:
+        logger.info(f"resolve_user: no user for {column}")
+        return None
+
+    user = dict(row)
+    cache.set(key, user)
+    return user
@@ -0,0 +1,471 @@
+"""Gateway for model calls: adaptive concurrency, retries, hedging, breaker.
+
+Every model call of the agent graph goes through one process-wide
+LLMGateway, so when the upstream model slows down or rate-limits, requests
+queue here instead of all piling onto it:
+
+- AdaptiveLimiter caps in-flight calls with an AIMD limit: each success
+  raises it by about one per window of calls, each overload signal (429,
+  5xx, connection error) halves it.
+- Overloaded calls are retried with full-jitter exponential backoff, or
+  after the Retry-After the API asked for, within the request deadline.
+  A Retry-After longer than LLM_RETRY_MAX_BACKOFF_SECONDS is not waited
+  out: the call fails with LLMUnavailable carrying it.
+  A call is only retried if it failed before its first streamed chunk, so
+  no text reaches the client twice.
+- With LLM_HEDGE_DELAY_SECONDS set, a call that has not streamed its first
+  chunk by then is raced against a second one (only if the limiter has a
+  free slot); the first to stream wins and the other is cancelled.
+- CircuitBreaker opens after consecutive overload failures. While open,
+  calls fail fast with LLMUnavailable (an LLM_UNAVAILABLE SSE error) until
+  a probe call succeeds.
+
+get_llm_gateway().stats() is exposed on GET /metrics.
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from apps.api.config import Settings, get_settings
+from apps.api.deadline import remaining_budget
+from apps.api.logging_config import get_logger
+from apps.api.request_context import get_request_context
+
+logger = get_logger(__name__)
+
+# Multiplicative decrease of the concurrency limit on overload
+_DECREASE_FACTOR = 0.5
+
+
+class LLMUnavailable(Exception):
+    """The model can't be called right now (circuit open or overloaded)."""
+
+    def __init__(self, reason: str, retry_after: float | None = None):
+        self.reason = reason  # "circuit_open" or "overloaded"
+        self.retry_after = retry_after
+        super().__init__(f"Model unavailable: {reason}")
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for in-flight model calls (FIFO waiters)."""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.decreases = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free right now (waiters go first)."""
+        if self._waiters or not self._has_capacity():
+            return False
+        self.in_flight += 1
+        return True
+
+    async def acquire(self) -> None:
+        """Wait for a slot."""
+        if self.try_acquire():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we were cancelled
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, outcome: str | None = None) -> None:
+        """
+        Return a slot and adjust the limit.
+
+        Args:
+            outcome: "success" (additive increase), "overload" (multiplicative
+                decrease) or None (no signal, e.g. cancelled or bad request)
+        """
+        self.in_flight -= 1
+        if outcome == "success":
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif outcome == "overload":
+            self.limit = max(self.min_limit, self.limit * _DECREASE_FACTOR)
+            self.decreases += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "decreases": self.decreases,
+        }
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after consecutive overload failures; one probe call closes it."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """
+        Check that a call may go ahead.
+
+        Raises:
+            LLMUnavailable: While the breaker is open, or half-open with a
+                probe already in flight
+        """
+        if self.state == BreakerState.OPEN:
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise LLMUnavailable("circuit_open", retry_after=remaining)
+            self.state = BreakerState.HALF_OPEN
+        if self.state == BreakerState.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise LLMUnavailable("circuit_open", retry_after=self.reset_seconds)
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if (
+            self.state == BreakerState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != BreakerState.OPEN:
+                self.trips += 1
+                logger.warning(
+                    f"LLM circuit breaker opened after "
+                    f"{self.consecutive_failures} consecutive failures"
+                )
+            self.state = BreakerState.OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Let another call probe after one that gave no signal."""
+        self._probing = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+def _retry_after(headers: Any) -> float | None:
+    """Parse retry-after-ms / Retry-After (seconds or HTTP date) headers."""
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def overload_info(error: BaseException) -> tuple[bool, float | None]:
+    """
+    Classify a model call error.
+
+    Returns:
+        (whether it signals an overloaded or unreachable upstream and is
+        worth retrying, the Retry-After it carried in seconds)
+    """
+    # Imported here: only needed once a call has failed (see bench_startup)
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        overloaded = error.status_code == 429 or error.status_code >= 500
+        return overloaded, _retry_after(error.response.headers)
+    return isinstance(error, APIConnectionError), None
+
+
+class _Attempt:
+    """One streamed model call, holding a limiter slot until it ends."""
+
+    def __init__(
+        self,
+        gateway: "LLMGateway",
+        model: Runnable,
+        messages: Sequence[BaseMessage],
+        config: RunnableConfig,
+        ready: asyncio.Event,
+    ):
+        self.gateway = gateway
+        self.run_id = uuid.uuid4()
+        self.started = False  # first chunk received
+        self.ready = ready  # set on the first chunk and when the call ends
+        # Held back from the client until the gateway picks this call
+        ctx = get_request_context()
+        if ctx:
+            ctx.discarded_runs.add(str(self.run_id))
+        self.task = asyncio.create_task(
+            self._run(model, messages, {**config, "run_id": self.run_id})
+        )
+
+    async def _run(
+        self, model: Runnable, messages: Sequence[BaseMessage], config: RunnableConfig
+    ) -> BaseMessage:
+        outcome = None
+        try:
+            response = None
+            async for chunk in model.astream(messages, config):
+                if not self.started:
+                    self.started = True
+                    self.ready.set()
+                response = chunk if response is None else response + chunk
+            outcome = "success"
+            return message_chunk_to_message(response)
+        except Exception as e:
+            if overload_info(e)[0]:
+                outcome = "overload"
+            raise
+        finally:
+            self.gateway.limiter.release(outcome)
+            self.ready.set()
+
+    @property
+    def failed(self) -> bool:
+        return self.task.done() and (self.task.cancelled() or self.task.exception() is not None)
+
+
+class LLMGateway:
+    """Process-wide front door for model calls (see module docstring)."""
+
+    def __init__(
+        self,
+        limiter: AdaptiveLimiter,
+        breaker: CircuitBreaker,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 8.0,
+        hedge_delay_seconds: float = 0.0,
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "LLMGateway":
+        return cls(
+            limiter=AdaptiveLimiter(
+                settings.llm_concurrency_initial,
+                settings.llm_concurrency_min,
+                settings.llm_concurrency_max,
+            ),
+            breaker=CircuitBreaker(
+                settings.llm_breaker_failure_threshold,
+                settings.llm_breaker_reset_seconds,
+            ),
+            max_retries=settings.llm_max_retries,
+            backoff_seconds=settings.llm_retry_backoff_seconds,
+            max_backoff_seconds=settings.llm_retry_max_backoff_seconds,
+            hedge_delay_seconds=settings.llm_hedge_delay_seconds,
+        )
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return retry_after
+        cap = min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+        return random.uniform(0, cap)
+
+    async def ainvoke(
+        self,
+        model: BaseChatModel | Runnable,
+        messages: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+    ) -> BaseMessage:
+        """
+        Call model with messages, streaming through config's callbacks.
+
+        Raises:
+            LLMUnavailable: The breaker is open, or the upstream stayed
+                overloaded through all retries (or asked to wait longer
+                than max_backoff_seconds, or the deadline left no time to
+                retry)
+            Exception: Any other model error, unchanged
+        """
+        config = config or {}
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            winner = None
+            # A half-open breaker's probe is released on any exit without an
+            # outcome (including cancellation while queued for a slot)
+            try:
+                winner = await self._first_to_stream(model, messages, config)
+                response = await winner.task
+            except Exception as e:
+                overloaded, retry_after = overload_info(e)
+                if not overloaded:
+                    self.breaker.release_probe()
+                    raise
+                self.breaker.record_failure()
+                if winner is None or winner.started:
+                    raise  # text already streamed; a retry would repeat it
+                if self.breaker.state == BreakerState.OPEN:
+                    raise LLMUnavailable("circuit_open", self.breaker.reset_seconds) from e
+                if attempt == self.max_retries:
+                    raise LLMUnavailable("overloaded", retry_after) from e
+                if retry_after is not None and retry_after > self.max_backoff_seconds:
+                    raise LLMUnavailable("overloaded", retry_after) from e
+
+                delay = self._backoff(attempt, retry_after)
+                budget = remaining_budget()
+                if budget is not None and delay >= budget:
+                    raise LLMUnavailable("overloaded", retry_after) from e
+                logger.warning(
+                    f"Model call overloaded ({e.__class__.__name__}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+
+            self.breaker.record_success()
+            return response
+
+    async def _first_to_stream(
+        self, model: Runnable, messages: Sequence[BaseMessage], config: RunnableConfig
+    ) -> _Attempt:
+        """
+        Start a call (hedged if it is slow to stream) and pick the winner.
+
+        Returns:
+            The attempt that streamed first, or that ended first if none
+            streamed; the others are cancelled. Every attempt's run is
+            marked discarded when it starts, and only the winner's mark is
+            dropped, so a loser's chunks never reach the client
+        """
+        ready = asyncio.Event()
+        await self.limiter.acquire()
+        attempts = [_Attempt(self, model, messages, config, ready)]
+        winner = None
+        try:
+            if self.hedge_delay_seconds > 0:
+                try:
+                    await asyncio.wait_for(ready.wait(), self.hedge_delay_seconds)
+                except TimeoutError:
+                    if self.limiter.try_acquire():
+                        self.hedges += 1
+                        attempts.append(_Attempt(self, model, messages, config, ready))
+
+            while winner is None:
+                ready.clear()
+                winner = self._pick(attempts)
+                if winner is None:
+                    await ready.wait()
+            if winner is not attempts[0]:
+                self.hedge_wins += 1
+            return winner
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.task.cancel()
+            ctx = get_request_context()
+            if ctx and winner is not None:
+                ctx.discarded_runs.discard(str(winner.run_id))
+
+    @staticmethod
+    def _pick(attempts: list[_Attempt]) -> _Attempt | None:
+        for attempt in attempts:
+            if attempt.started or (attempt.task.done() and not attempt.failed):
+                return attempt
+        if all(attempt.failed for attempt in attempts):
+            return attempts[0]
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        """Get limiter state, breaker state and retry/hedge counters."""
+        return {
+            "limiter": self.limiter.stats(),
+            "breaker": self.breaker.stats(),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+_gateway: LLMGateway | None = None
+_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the shared gateway, creating it from Settings on first use."""
+    global _gateway
+    with _lock:
+        if _gateway is None:
+            _gateway = LLMGateway.from_settings(get_settings())
+        return _gateway
@@ -5,17 +5,38 @@ A stateless AI pharmacy agent providing medication information,
 inventory checks, and prescription management via streaming chat.
 """
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from apps.api.agent import get_pharmacy_agent, stream_agent_response
+from apps.api.agent import aget_pharmacy_agent, stream_agent_response
+from apps.api.agent.conversations import (
+    close_conversation_store,
+    conversation_owned_by,
+    conversation_tail,
+    create_conversation,
+    open_conversation_store,
+    run_conversation_pruner,
+    touch_conversation,
+)
+from apps.api.agent.graph import init_stateful_agent
+from apps.api.agent.tiers import classify_tier, tier_models
 from apps.api.config import get_settings
+from apps.api.db_writer import stop_db_writer
+from apps.api.deadline import Deadline
+from apps.api.http_client import close_http_client, get_http_client, http_client_stats
+from apps.api.identity import resolve_user
+from apps.api.llm_gateway import get_llm_gateway
 from apps.api.logging_config import get_logger, setup_logging
-from apps.api.schemas import ChatRequest, HealthResponse
+from apps.api.schemas import ChatRequest, HealthResponse, ReservationRequest
+from apps.api.tools.expiry import run_expiry_sweeper
+from apps.api.tools.holds import load_holds, run_hold_reconciler
+from apps.api.tools.reservation import place_reservation, release_reservation
+from apps.api.tools.schemas import ToolErrorCode
 from apps.api.tracing import TraceContext
 
 setup_logging()
@@ -24,15 +45,66 @@ logger = get_logger(__name__)
 settings = get_settings()
 
 
+async def warm_up_agent() -> None:
+    """
+    Compile the agents in the background after startup.
+
+    The API starts serving without waiting for LangGraph and the OpenAI
+    client to load; the first chat request usually finds the agents ready.
+    """
+    try:
+        await aget_pharmacy_agent()
+        if settings.conversation_state_enabled:
+            await aget_pharmacy_agent(stateful=True)
+    except RuntimeError as e:
+        logger.warning(f"Agent warm-up skipped: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown events."""
     logger.info("Starting Pharmacy Agent API...")
     logger.info(f"Version: {settings.app_version}")
 
+    try:
+        await load_holds()
+    except Exception as e:
+        logger.warning(f"Could not restore reservation holds: {e}")
+    if settings.conversation_state_enabled:
+        init_stateful_agent(await open_conversation_store(settings.conversation_db_path))
+    get_http_client()
+    background_tasks = [
+        asyncio.create_task(warm_up_agent()),
+        asyncio.create_task(
+            run_hold_reconciler(settings.reservation_sync_interval_seconds)
+        ),
+        asyncio.create_task(
+            run_expiry_sweeper(
+                settings.expiry_sweep_interval_seconds,
+                batch_size=settings.expiry_sweep_batch_size,
+            )
+        ),
+    ]
+    if settings.conversation_state_enabled:
+        background_tasks.append(
+            asyncio.create_task(
+                run_conversation_pruner(
+                    settings.expiry_sweep_interval_seconds,
+                    settings.conversation_ttl_seconds,
+                )
+            )
+        )
+
     yield
 
     logger.info("Shutting down Pharmacy Agent API...")
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await stop_db_writer()
+    await close_conversation_store()
+    await close_http_client()
 
 
 app = FastAPI(
@@ -110,8 +182,48 @@ async def health_check() -> HealthResponse:
     )
 
 
+@app.get("/metrics")
+async def metrics() -> dict:
+    """Runtime metrics (JSON): LLM HTTP client pool, gateway limiter and breaker."""
+    return {"llm_http": http_client_stats(), "llm_gateway": get_llm_gateway().stats()}
+
+
+@app.post("/reservations")
+async def create_reservation(request: ReservationRequest) -> dict:
+    """
+    Place a TTL-bound hold on medication stock for pickup.
+
+    Returns the hold details, or 404 if the medication is unknown and
+    409 if not enough unheld stock remains.
+    """
+    result = await place_reservation(
+        medication_id=request.medication_id,
+        medication_name=request.medication_name,
+        quantity=request.quantity,
+        store_id=request.store_id,
+    )
+    if not result["success"]:
+        status_code = {
+            ToolErrorCode.NOT_FOUND.value: 404,
+            ToolErrorCode.INVALID_STATE.value: 409,
+        }.get(result["error_code"], 500)
+        raise HTTPException(status_code=status_code, detail=result["error_message"])
+    return result
+
+
+@app.delete("/reservations/{hold_id}", status_code=204)
+async def delete_reservation(hold_id: str) -> Response:
+    """Release a reservation hold before it expires."""
+    if not release_reservation(hold_id):
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return Response(status_code=204)
+
+
 @app.post("/chat/stream")
-async def chat_stream(request: ChatRequest) -> StreamingResponse:
+async def chat_stream(
+    request: ChatRequest,
+    x_request_timeout: float | None = Header(default=None, gt=0),
+) -> StreamingResponse:
     """
     Streaming chat endpoint for conversational AI interactions.
 
@@ -122,6 +234,17 @@ async def chat_stream(request: ChatRequest) -> StreamingResponse:
     - tool_result: Results from tool execution
     - error: Any errors that occur
     - done: Marks end of stream
+
+    With CONVERSATION_STATE_ENABLED the server keeps the conversation: the
+    response's X-Conversation-ID header names it, and follow-up requests
+    send that conversation_id with only the new message. An unknown
+    conversation_id, or one started by a different user, returns 404 so the
+    client can resend the full history.
+
+    The request must finish within REQUEST_TIMEOUT_SECONDS, or the seconds
+    given in the X-Request-Timeout header (capped at
+    MAX_REQUEST_TIMEOUT_SECONDS). Otherwise the stream ends with a
+    DEADLINE_EXCEEDED error carrying the partial answer.
     """
     # Validate API key is configured (moved from config init for test compatibility)
     if not settings.openai_api_key:
@@ -129,6 +252,14 @@ async def chat_stream(request: ChatRequest) -> StreamingResponse:
             status_code=500, detail="OPENAI_API_KEY is not configured"
         )
 
+    # Started on arrival so user resolution counts against the budget too
+    deadline = Deadline(
+        min(
+            x_request_timeout or settings.request_timeout_seconds,
+            settings.max_request_timeout_seconds,
+        )
+    )
+
     # Initialize trace context for request correlation
     trace_ctx = TraceContext(user_id=request.user_identifier)
 
@@ -138,13 +269,51 @@ async def chat_stream(request: ChatRequest) -> StreamingResponse:
         f"request_id={trace_ctx.request_id}"
     )
 
+    # Resolve the user once per request (cached); tools trust the resulting
+    # user_id instead of re-resolving an identifier echoed by the LLM
+    user = None
+    if request.user_identifier:
+        user = await resolve_user(request.user_identifier)
+        if user is None:
+            logger.info(f"User identifier did not resolve, request_id={trace_ctx.request_id}")
+
     # Convert ChatMessage to dict format for agent
-    messages = [
-        {"role": msg.role.value, "content": msg.content} for msg in request.messages
-    ]
+    messages = [msg.model_dump(mode="json", exclude_none=True) for msg in request.messages]
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no",
+        "X-Request-ID": trace_ctx.request_id,
+    }
+
+    # Server-side conversation state: resume the given conversation or
+    # start a new one from the messages sent
+    conversation_id = None
+    if request.conversation_id and not settings.conversation_state_enabled:
+        raise HTTPException(status_code=400, detail="Conversation state is not enabled")
+    if settings.conversation_state_enabled:
+        user_id = user["user_id"] if user else None
+        if request.conversation_id:
+            if not await conversation_owned_by(request.conversation_id, user_id):
+                raise HTTPException(status_code=404, detail="Unknown conversation_id")
+            conversation_id = request.conversation_id
+            await touch_conversation(conversation_id)
+        else:
+            conversation_id = await create_conversation(user_id)
+        headers["X-Conversation-ID"] = conversation_id
+
+    # Route easy turns to the small model; a resumed conversation's request
+    # has only the new message, so add the reply it answers from the state
+    tier_messages = messages
+    if conversation_id and request.conversation_id:
+        tier_messages = await conversation_tail(conversation_id) + messages
+    tier = classify_tier(tier_messages, settings.small_tier_max_words)
+    trace_ctx.model_tier = tier.value
+    trace_ctx.model = tier_models(settings)[tier]
 
-    # Get pre-compiled agent (compiled once at startup, not per-request)
-    agent = get_pharmacy_agent()
+    # Get the compiled agent (compiled once, not per-request)
+    agent = await aget_pharmacy_agent(stateful=conversation_id is not None, tier=tier)
 
     return StreamingResponse(
         stream_agent_response(
@@ -152,12 +321,11 @@ async def chat_stream(request: ChatRequest) -> StreamingResponse:
             messages=messages,
             trace_ctx=trace_ctx,
             user_identifier=request.user_identifier,
+            user=user,
+            conversation_id=conversation_id,
+            resume=request.conversation_id is not None,
+            deadline=deadline,
         ),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-            "X-Request-ID": trace_ctx.request_id,
-        },
+        headers=headers,
     )
@@ -0,0 +1,68 @@
+"""Request-scoped context shared between the API layer and tools."""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from apps.api.tracing import TraceContext
+
+
+@dataclass
+class RequestContext:
+    """
+    Per-request state visible to tools running inside the agent graph.
+
+    user_id is resolved by the API layer before the agent runs, so tools can
+    trust it instead of re-resolving an identifier copied by the LLM.
+    tool_slots caps how many tool calls of this request run concurrently.
+    tool_results memoizes read-only tool calls (including prefetched ones)
+    by normalized call, and served_runs maps the run_id of each tool call
+    served from it to its source (see apps.api.tools.runtime).
+    tool_executions maps the run_id of each tool call that ran to when it
+    ran, after getting a tool slot (perf_counter start and end).
+    discarded_runs holds the run_ids of model calls not (yet) picked by the
+    LLM gateway's hedging (see apps.api.llm_gateway); their chunks are held
+    back, and streamed only if the call is picked.
+    """
+
+    user_id: int | None = None
+    user_name: str | None = None
+    trace: TraceContext | None = None
+    tool_slots: asyncio.Semaphore | None = field(default=None, repr=False)
+    tool_results: dict[Any, asyncio.Future] = field(default_factory=dict, repr=False)
+    prefetch_pending: set[asyncio.Future] = field(default_factory=set, repr=False)
+    served_runs: dict[str, str] = field(default_factory=dict, repr=False)
+    tool_executions: dict[str, tuple[float, float]] = field(default_factory=dict, repr=False)
+    discarded_runs: set[str] = field(default_factory=set, repr=False)
+
+
+_current: ContextVar[RequestContext | None] = ContextVar(
+    "request_context", default=None
+)
+
+
+def get_request_context() -> RequestContext | None:
+    """Get the context of the request being handled, if any."""
+    return _current.get()
+
+
+@contextmanager
+def request_scope(ctx: RequestContext) -> Iterator[RequestContext]:
+    """
+    Make ctx the current request context for the enclosed block.
+
+    Tasks spawned inside the block (e.g. LangGraph tool execution) inherit
+    it through contextvars.
+    """
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Async generator finalized from a different context; the var
+            # dies with that context anyway.
+            pass
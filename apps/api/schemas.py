@@ -2,7 +2,7 @@
 
 from enum import Enum
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class Role(str, Enum):
@@ -20,6 +20,11 @@ class ChatMessage(BaseModel):
     content: str = Field(
         ..., max_length=16000, description="Message content (max 16k characters)"
     )
+    tool_context: str | None = Field(
+        default=None,
+        max_length=16000,
+        description="Signed tool-result summary from the TOOL_CONTEXT event (assistant only)",
+    )
 
     @field_validator("role")
     @classmethod
@@ -29,6 +34,13 @@ class ChatMessage(BaseModel):
             raise ValueError("System role is not allowed in inbound messages")
         return v
 
+    @model_validator(mode="after")
+    def validate_tool_context(self) -> "ChatMessage":
+        """Tool context only belongs to the assistant turn that produced it."""
+        if self.tool_context is not None and self.role != Role.ASSISTANT:
+            raise ValueError("tool_context is only allowed on assistant messages")
+        return self
+
 
 class ChatRequest(BaseModel):
     """Request body for the chat/stream endpoint."""
@@ -43,6 +55,34 @@ class ChatRequest(BaseModel):
         default=None,
         description="Optional user identifier (email or phone) for prescription lookups",
     )
+    conversation_id: str | None = Field(
+        default=None,
+        max_length=64,
+        description=(
+            "Server-side conversation to continue (stateful mode only); "
+            "messages then holds only the new messages"
+        ),
+    )
+
+
+class ReservationRequest(BaseModel):
+    """Request body for placing a reservation hold."""
+
+    medication_id: int | None = Field(
+        default=None, description="Medication ID (preferred if known)"
+    )
+    medication_name: str | None = Field(
+        default=None, description="Medication name in English or Hebrew"
+    )
+    quantity: int = Field(default=1, ge=1, le=10, description="Units to hold (1-10)")
+    store_id: int = Field(default=1, description="Store to hold stock at")
+
+    @model_validator(mode="after")
+    def validate_medication(self) -> "ReservationRequest":
+        """Require either a medication ID or name."""
+        if self.medication_id is None and not self.medication_name:
+            raise ValueError("Either medication_id or medication_name is required")
+        return self
 
 
 class HealthResponse(BaseModel):
@@ -59,5 +99,6 @@ class StreamEventType(str, Enum):
     TOKEN = "token"
     TOOL_CALL = "tool_call"
     TOOL_RESULT = "tool_result"
+    TOOL_CONTEXT = "tool_context"
     ERROR = "error"
     DONE = "done"
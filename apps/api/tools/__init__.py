@@ -1,34 +1,50 @@
 """Pharmacy Agent Tools for LangGraph integration."""
 
+from apps.api.tools.availability import get_medication_availability
 from apps.api.tools.exceptions import ToolError
+from apps.api.tools.interactions import check_drug_interactions
 from apps.api.tools.inventory import check_inventory
 from apps.api.tools.medication import get_medication_by_name
 from apps.api.tools.prescription import prescription_management
+from apps.api.tools.reservation import reserve_medication
 from apps.api.tools.schemas import (
+    InteractionCheckResult,
+    InteractionInfo,
+    InteractionSeverity,
     InventoryInfo,
     InventoryResult,
+    MedicationAvailabilityResult,
     MedicationInfo,
     MedicationResult,
     PrescriptionAction,
     PrescriptionInfo,
     PrescriptionListResult,
     PrescriptionStatus,
+    RefillRequestResult,
     RefillStatusResult,
+    ReservationInfo,
+    ReservationResult,
     ToolErrorCode,
 )
 
 # Tools list for LangGraph ToolNode
 PHARMACY_TOOLS = [
+    get_medication_availability,
     get_medication_by_name,
     check_inventory,
     prescription_management,
+    reserve_medication,
+    check_drug_interactions,
 ]
 
 __all__ = [
     # Tools
+    "get_medication_availability",
     "get_medication_by_name",
     "check_inventory",
     "prescription_management",
+    "reserve_medication",
+    "check_drug_interactions",
     "PHARMACY_TOOLS",
     # Schemas
     "ToolErrorCode",
@@ -36,11 +52,18 @@ __all__ = [
     "MedicationResult",
     "InventoryInfo",
     "InventoryResult",
+    "MedicationAvailabilityResult",
     "PrescriptionAction",
     "PrescriptionStatus",
     "PrescriptionInfo",
     "PrescriptionListResult",
+    "RefillRequestResult",
     "RefillStatusResult",
+    "ReservationInfo",
+    "ReservationResult",
+    "InteractionSeverity",
+    "InteractionInfo",
+    "InteractionCheckResult",
     # Exceptions
     "ToolError",
 ]
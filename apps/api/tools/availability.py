@@ -0,0 +1,136 @@
+"""Composite medication + availability tool for the pharmacy agent."""
+
+import asyncio
+
+from langchain_core.tools import tool
+
+from apps.api.logging_config import get_logger
+from apps.api.tools.exceptions import ToolError
+from apps.api.tools.inventory import _get_inventory_row, _to_inventory_info
+from apps.api.tools.medication import _row_to_medication_info, _search_medications
+from apps.api.tools.prescription import (
+    _query_user_prescriptions,
+    _row_to_prescription_info,
+    _UserPrescriptions,
+)
+from apps.api.tools.runtime import tool_runtime
+from apps.api.tools.schemas import (
+    MedicationAvailabilityResult,
+    PrescriptionStatus,
+    ToolErrorCode,
+)
+
+logger = get_logger(__name__)
+
+
+async def _no_prescriptions() -> _UserPrescriptions:
+    return _UserPrescriptions()
+
+
+@tool
+@tool_runtime
+async def get_medication_availability(
+    medication_name: str,
+    store_id: int = 1,
+    user_identifier: str | None = None,
+) -> dict:
+    """
+    Look up a medication and its current stock in one call.
+
+    Prefer this tool over get_medication_by_name + check_inventory whenever
+    the user asks whether a medication is available, or asks about a
+    medication and its availability together. For prescription-only
+    medications it also reports whether the user has an active prescription
+    for it.
+
+    Args:
+        medication_name: The name of the medication (English or Hebrew,
+                        partial matches allowed)
+        store_id: Store ID to check inventory for (default: 1)
+        user_identifier: User's email or phone number (optional; not needed
+                        for a verified user)
+
+    Returns:
+        dict with medication details, inventory (in_stock, qty net of holds,
+        restock_eta), and for prescription-only medications
+        has_active_prescription and the matching prescription.
+    """
+    logger.info(
+        f"get_medication_availability called: med_name={medication_name}, "
+        f"store_id={store_id}, user={user_identifier}"
+    )
+
+    query = medication_name.strip()
+    if not query:
+        return ToolError(
+            ToolErrorCode.NOT_FOUND,
+            "Medication name cannot be empty",
+        ).to_dict()
+
+    try:
+        matches = await _search_medications(query)
+
+        if not matches:
+            logger.info(f"get_medication_availability result: NOT_FOUND for '{query}'")
+            result = ToolError(
+                ToolErrorCode.NOT_FOUND,
+                f"No medication found matching '{query}'",
+            ).to_dict()
+            result["query"] = query
+            return result
+
+        if len(matches) > 1:
+            logger.info(
+                f"get_medication_availability result: AMBIGUOUS, {len(matches)} matches"
+            )
+            result = ToolError(
+                ToolErrorCode.AMBIGUOUS,
+                f"Multiple medications match '{query}'. Please specify which one.",
+                suggestions=[f"{m['name_en']} ({m['name_he']})" for m in matches],
+            ).to_dict()
+            result["query"] = query
+            return result
+
+        medication = _row_to_medication_info(matches[0])
+
+        # Stock and the user's prescription are independent lookups
+        inventory_row, user_rx = await asyncio.gather(
+            _get_inventory_row(medication.med_id, store_id),
+            _query_user_prescriptions(
+                user_identifier,
+                med_id=medication.med_id,
+                status=PrescriptionStatus.ACTIVE,
+            )
+            if medication.rx_required
+            else _no_prescriptions(),
+        )
+
+        has_active_prescription = None
+        prescription = None
+        if user_rx.user is not None:
+            has_active_prescription = bool(user_rx.prescriptions)
+            if user_rx.prescriptions:
+                prescription = _row_to_prescription_info(user_rx.prescriptions[0])
+
+        inventory = _to_inventory_info(inventory_row) if inventory_row else None
+
+        logger.info(
+            f"get_medication_availability result: med_id={medication.med_id}, "
+            f"in_stock={inventory.in_stock if inventory else None}, "
+            f"has_active_prescription={has_active_prescription}"
+        )
+
+        return MedicationAvailabilityResult(
+            success=True,
+            medication=medication,
+            inventory=inventory,
+            has_active_prescription=has_active_prescription,
+            prescription=prescription,
+        ).model_dump()
+
+    except Exception as e:
+        logger.error(f"get_medication_availability internal error: {e}")
+        return ToolError(
+            ToolErrorCode.INTERNAL,
+            "An internal error occurred while looking up the medication",
+        ).to_dict()
@@ -0,0 +1,128 @@
+"""In-memory medication name catalog for matching names in free text."""
+
+import re
+import time
+from dataclasses import dataclass
+
+import aiosqlite
+
+from apps.api.config import get_settings
+from apps.api.database import get_connection
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Hebrew one-letter prefixes (ה, ו, ב, ל, מ, ש, כ) that attach to a noun
+HEBREW_PREFIXES = "הובלמשכ"
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """A medication's ID and names."""
+
+    med_id: int
+    name_en: str
+    name_he: str
+
+
+class MedicationCatalog:
+    """
+    Medication names compiled into one pattern per language.
+
+    English names match case-insensitively on word boundaries; Hebrew names
+    also match with a single attached prefix letter (e.g. "האיבופרופן").
+    """
+
+    def __init__(self, rows: list[dict]) -> None:
+        self.entries = [
+            CatalogEntry(row["med_id"], row["name_en"], row["name_he"]) for row in rows
+        ]
+        self._by_name: dict[str, CatalogEntry] = {}
+        for entry in self.entries:
+            self._by_name[entry.name_en.lower()] = entry
+            self._by_name[entry.name_he] = entry
+
+        en_names = sorted((e.name_en for e in self.entries), key=len, reverse=True)
+        he_names = sorted((e.name_he for e in self.entries), key=len, reverse=True)
+        self._en_pattern = (
+            re.compile(
+                r"\b(" + "|".join(re.escape(n) for n in en_names) + r")\b",
+                re.IGNORECASE,
+            )
+            if en_names
+            else None
+        )
+        self._he_pattern = (
+            re.compile(
+                rf"(?<![\w])[{HEBREW_PREFIXES}]?("
+                + "|".join(re.escape(n) for n in he_names)
+                + r")(?![\w])"
+            )
+            if he_names
+            else None
+        )
+        self.loaded_at = time.monotonic()
+
+    def find(self, text: str) -> list[CatalogEntry]:
+        """Find the distinct medications mentioned in text, in order."""
+        found: dict[int, CatalogEntry] = {}
+        for pattern, normalize in (
+            (self._en_pattern, str.lower),
+            (self._he_pattern, lambda s: s),
+        ):
+            if pattern is None:
+                continue
+            for m in pattern.finditer(text):
+                entry = self._by_name[normalize(m.group(1))]
+                found.setdefault(entry.med_id, entry)
+        return list(found.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+_catalog: MedicationCatalog | None = None
+
+
+async def get_medication_catalog() -> MedicationCatalog:
+    """
+    Get the medication catalog, loading it from the database when missing
+    or older than the configured TTL.
+    """
+    global _catalog
+    ttl = get_settings().catalog_ttl_seconds
+    if _catalog is None or time.monotonic() - _catalog.loaded_at >= ttl:
+        async with get_connection() as db:
+            async with db.execute(
+                "SELECT med_id, name_en, name_he FROM medications"
+            ) as cursor:
+                rows = [dict(row) for row in await cursor.fetchall()]
+        _catalog = MedicationCatalog(rows)
+        logger.info(f"Loaded medication catalog: {len(_catalog)} medication(s)")
+    return _catalog
+
+
+def invalidate_medication_catalog() -> None:
+    """Drop the catalog so the next lookup reloads it from the database."""
+    global _catalog
+    _catalog = None
+
+
+async def get_catalog_version() -> int | None:
+    """
+    Get the catalog data version, bumped by database triggers whenever
+    medications, interactions or inventory change.
+
+    Returns:
+        The version, or None if the database predates the data_version table
+    """
+    try:
+        async with get_connection() as db:
+            async with db.execute(
+                "SELECT version FROM data_version WHERE name = 'catalog'"
+            ) as cursor:
+                row = await cursor.fetchone()
+    except aiosqlite.OperationalError as e:
+        logger.debug(f"Catalog data version unavailable: {e}")
+        return None
+    return row["version"] if row else None
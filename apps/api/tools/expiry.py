@@ -0,0 +1,79 @@
+"""Background expiry of prescriptions past their expires_at.
+
+Prescription status is materialized: a scheduled sweeper moves due active
+prescriptions to 'expired' in bulk, so the LIST / REFILL_STATUS read path
+can trust the stored status as-is.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from apps.api.db_writer import get_db_writer
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def utc_now_sql() -> str:
+    """Current UTC time in the 'YYYY-MM-DD HH:MM:SS' format used by the DB."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def expire_due_prescriptions(
+    now: str | None = None,
+    batch_size: int = 500,
+) -> int:
+    """
+    Expire all active prescriptions whose expires_at has passed.
+
+    Runs set-based UPDATEs of at most batch_size rows each (served by the
+    partial index on active prescriptions' expires_at) through the
+    single-writer queue, so a large backlog never holds the write lock for
+    long.
+
+    Args:
+        now: Cutoff timestamp (default: current UTC time)
+        batch_size: Maximum rows updated per write
+
+    Returns:
+        Number of prescriptions expired
+    """
+    cutoff = now or utc_now_sql()
+
+    async def expire_batch(db) -> int:
+        cursor = await db.execute(
+            """
+            UPDATE prescriptions SET status = 'expired'
+            WHERE presc_id IN (
+                SELECT presc_id FROM prescriptions
+                WHERE status = 'active' AND expires_at <= ?
+                LIMIT ?
+            )
+            """,
+            (cutoff, batch_size),
+        )
+        count = cursor.rowcount
+        await cursor.close()
+        return count
+
+    total = 0
+    writer = get_db_writer()
+    while True:
+        count = await writer.submit(expire_batch)
+        total += count
+        if count < batch_size:
+            break
+
+    if total:
+        logger.info(f"Expired {total} prescription(s) due by {cutoff}")
+    return total
+
+
+async def run_expiry_sweeper(interval_seconds: float, batch_size: int = 500) -> None:
+    """Expire due prescriptions every interval_seconds until cancelled."""
+    while True:
+        try:
+            await expire_due_prescriptions(batch_size=batch_size)
+        except Exception as e:
+            logger.error(f"Prescription expiry sweep failed: {e}")
+        await asyncio.sleep(interval_seconds)
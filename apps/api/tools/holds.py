@@ -0,0 +1,321 @@
+"""In-memory reservation holds with periodic reconciliation to SQLite.
+
+Holds are tracked in a sharded registry keyed by (store_id, med_id) so the
+hot path (placing a hold, reading the held quantity) never touches the
+database. A background task periodically writes the holds placed, released
+or expired since its last run to the `reservations` table, which is also
+used to restore holds after a restart. Each process only writes the holds it
+placed or restored, so workers sharing the database keep each other's rows.
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from apps.api.config import get_settings
+from apps.api.database import get_connection
+from apps.api.db_writer import get_db_writer
+from apps.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Hold:
+    """A TTL-bound hold on units of a medication at a store."""
+
+    hold_id: str
+    store_id: int
+    med_id: int
+    qty: int
+    expires_at: float  # unix epoch seconds
+
+    def is_expired(self, now: float) -> bool:
+        """Check whether the hold has passed its expiry time."""
+        return self.expires_at <= now
+
+
+@dataclass
+class _Shard:
+    """One shard of the registry: holds and held counters for its keys."""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    holds: dict[str, Hold] = field(default_factory=dict)
+    held: dict[tuple[int, int], int] = field(default_factory=dict)
+
+
+class HoldRegistry:
+    """
+    Sharded in-memory registry of reservation holds.
+
+    Each (store_id, med_id) key maps to a single shard, so concurrent holds
+    on different medications never share a lock. Expired holds are purged
+    lazily whenever their shard is touched.
+
+    version() changes whenever a held quantity changes. The mutators bump
+    it, and expiries are tracked in a heap of expiry times, so reading it
+    never takes the shard locks.
+    """
+
+    def __init__(self, shards: int = 16) -> None:
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._version = 0
+        self._expiries: list[float] = []  # heap of hold expiry times
+        self._version_lock = threading.Lock()
+        # hold_id -> expires_at of holds as last written to SQLite
+        self._synced: dict[str, float] = {}
+
+    def _shard_for(self, store_id: int, med_id: int) -> _Shard:
+        return self._shards[hash((store_id, med_id)) % len(self._shards)]
+
+    def _bump_version(self, expires_at: float | None = None) -> None:
+        with self._version_lock:
+            self._version += 1
+            if expires_at is not None:
+                heapq.heappush(self._expiries, expires_at)
+
+    def _purge_expired(self, shard: _Shard, now: float) -> None:
+        """Drop expired holds from a shard (caller must hold the shard lock)."""
+        expired = [h for h in shard.holds.values() if h.is_expired(now)]
+        for hold in expired:
+            del shard.holds[hold.hold_id]
+            key = (hold.store_id, hold.med_id)
+            remaining = shard.held.get(key, 0) - hold.qty
+            if remaining > 0:
+                shard.held[key] = remaining
+            else:
+                shard.held.pop(key, None)
+
+    def held_qty(self, store_id: int, med_id: int) -> int:
+        """Get the number of units currently held for a medication at a store."""
+        shard = self._shard_for(store_id, med_id)
+        with shard.lock:
+            self._purge_expired(shard, time.time())
+            return shard.held.get((store_id, med_id), 0)
+
+    def try_hold(
+        self,
+        store_id: int,
+        med_id: int,
+        qty: int,
+        stock_qty: int,
+        ttl_seconds: float,
+    ) -> Hold | None:
+        """
+        Place a hold if enough unheld stock remains.
+
+        Args:
+            store_id: Store to hold stock at
+            med_id: Medication to hold
+            qty: Number of units to hold
+            stock_qty: Current on-hand quantity from the inventory table
+            ttl_seconds: How long the hold stays valid
+
+        Returns:
+            The new Hold, or None if stock_qty minus existing holds is
+            smaller than qty
+        """
+        shard = self._shard_for(store_id, med_id)
+        key = (store_id, med_id)
+        now = time.time()
+        with shard.lock:
+            self._purge_expired(shard, now)
+            held = shard.held.get(key, 0)
+            if stock_qty - held < qty:
+                return None
+
+            hold = Hold(
+                hold_id=uuid.uuid4().hex,
+                store_id=store_id,
+                med_id=med_id,
+                qty=qty,
+                expires_at=now + ttl_seconds,
+            )
+            shard.holds[hold.hold_id] = hold
+            shard.held[key] = held + qty
+            self._bump_version(hold.expires_at)
+            return hold
+
+    def release(self, hold_id: str) -> Hold | None:
+        """
+        Release a hold before it expires.
+
+        Returns:
+            The released Hold, or None if no active hold has this ID
+        """
+        for shard in self._shards:
+            with shard.lock:
+                hold = shard.holds.get(hold_id)
+                if hold is None:
+                    continue
+                # Expire it immediately and let the purge fix up the counter
+                hold.expires_at = 0
+                self._purge_expired(shard, time.time())
+                self._bump_version()
+                return hold
+        return None
+
+    def restore(self, hold: Hold) -> None:
+        """Re-register a persisted hold (used when loading from SQLite)."""
+        shard = self._shard_for(hold.store_id, hold.med_id)
+        key = (hold.store_id, hold.med_id)
+        with shard.lock:
+            if hold.hold_id in shard.holds or hold.is_expired(time.time()):
+                return
+            shard.holds[hold.hold_id] = hold
+            shard.held[key] = shard.held.get(key, 0) + hold.qty
+            self._synced[hold.hold_id] = hold.expires_at
+            self._bump_version(hold.expires_at)
+
+    def snapshot(self) -> list[Hold]:
+        """Get all active holds across shards, purging expired ones."""
+        now = time.time()
+        holds: list[Hold] = []
+        for shard in self._shards:
+            with shard.lock:
+                self._purge_expired(shard, now)
+                holds.extend(shard.holds.values())
+        return holds
+
+    def clear(self) -> None:
+        """Drop all holds."""
+        for shard in self._shards:
+            with shard.lock:
+                shard.holds.clear()
+                shard.held.clear()
+        self._synced.clear()
+        self._bump_version()
+
+    def changes_since_sync(self) -> tuple[list[Hold], list[str]]:
+        """
+        Get what changed since the holds were last written to SQLite.
+
+        Returns:
+            (holds placed or changed since, IDs of written holds since
+            released or expired)
+        """
+        holds = self.snapshot()
+        changed = [h for h in holds if self._synced.get(h.hold_id) != h.expires_at]
+        active = {h.hold_id for h in holds}
+        gone = [hold_id for hold_id in self._synced if hold_id not in active]
+        return changed, gone
+
+    def mark_synced(self, changed: list[Hold], gone: list[str]) -> None:
+        """Record that changes from changes_since_sync() were written."""
+        for hold in changed:
+            self._synced[hold.hold_id] = hold.expires_at
+        for hold_id in gone:
+            self._synced.pop(hold_id, None)
+
+    def version(self) -> int:
+        """
+        Get a counter that changes whenever any held quantity changes.
+
+        A hold passing its expiry time changes it too. The hold itself is
+        purged later, by the next mutator to touch its shard.
+        """
+        now = time.time()
+        with self._version_lock:
+            while self._expiries and self._expiries[0] <= now:
+                heapq.heappop(self._expiries)
+                self._version += 1
+            return self._version
+
+
+_registry: HoldRegistry | None = None
+
+
+def get_hold_registry() -> HoldRegistry:
+    """Get the process-wide hold registry."""
+    global _registry
+    if _registry is None:
+        _registry = HoldRegistry(shards=get_settings().reservation_shards)
+    return _registry
+
+
+async def load_holds() -> int:
+    """
+    Load unexpired holds from SQLite into the registry.
+
+    Returns:
+        Number of holds restored
+    """
+    registry = get_hold_registry()
+    async with get_connection() as db:
+        async with db.execute(
+            """
+            SELECT hold_id, store_id, med_id, qty, expires_at
+            FROM reservations
+            WHERE expires_at > ?
+            """,
+            (time.time(),),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+    for row in rows:
+        registry.restore(Hold(**dict(row)))
+
+    logger.info(f"Restored {len(rows)} reservation hold(s) from database")
+    return len(rows)
+
+
+async def sync_holds() -> int:
+    """
+    Write the registry's changes since the last sync to the reservations table.
+
+    New holds are upserted and this process's released or expired holds
+    are deleted, in one write submitted to the database writer; other
+    rows (e.g. other workers' holds) are left alone. Nothing is written
+    when nothing changed.
+
+    Returns:
+        Number of rows upserted or deleted
+    """
+    registry = get_hold_registry()
+    changed, gone = registry.changes_since_sync()
+    if not changed and not gone:
+        return 0
+
+    async def write(db) -> int:
+        await db.executemany(
+            """
+            INSERT INTO reservations (hold_id, store_id, med_id, qty, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hold_id) DO UPDATE SET
+                qty = excluded.qty, expires_at = excluded.expires_at
+            """,
+            [(h.hold_id, h.store_id, h.med_id, h.qty, h.expires_at) for h in changed],
+        )
+        await db.executemany(
+            "DELETE FROM reservations WHERE hold_id = ?", [(hold_id,) for hold_id in gone]
+        )
+        return len(changed) + len(gone)
+
+    count = await get_db_writer().submit(write)
+    registry.mark_synced(changed, gone)
+    return count
+
+
+async def run_hold_reconciler(interval_seconds: float) -> None:
+    """
+    Periodically reconcile in-memory holds to SQLite until cancelled.
+
+    A final sync runs on cancellation so holds survive a clean shutdown.
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                count = await sync_holds()
+                logger.debug(f"Reconciled {count} reservation hold(s)")
+            except Exception as e:
+                logger.error(f"Reservation reconcile failed: {e}")
+    except asyncio.CancelledError:
+        try:
+            await sync_holds()
+        except Exception as e:
+            logger.error(f"Final reservation reconcile failed: {e}")
+        raise
@@ -0,0 +1,225 @@
+"""Drug interaction check tool for the pharmacy agent."""
+
+import time
+from dataclasses import dataclass
+
+from langchain_core.tools import tool
+
+from apps.api.config import get_settings
+from apps.api.database import get_connection
+from apps.api.logging_config import get_logger
+from apps.api.tools.exceptions import ToolError
+from apps.api.tools.medication import _row_to_medication_info, _search_medications
+from apps.api.tools.prescription import _query_user_prescriptions, _user_not_found
+from apps.api.tools.runtime import tool_runtime
+from apps.api.tools.schemas import (
+    InteractionCheckResult,
+    InteractionInfo,
+    InteractionSeverity,
+    PrescriptionStatus,
+    ToolErrorCode,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Interaction:
+    """One side of a known interaction between two medications."""
+
+    severity: InteractionSeverity
+    description_en: str
+    description_he: str
+
+
+class InteractionIndex:
+    """
+    In-memory adjacency map of known interactions.
+
+    Each interactions row (stored once with med_id_a < med_id_b) is indexed
+    under both medications, so checking a candidate against any set of
+    medications is one dict lookup per medication.
+    """
+
+    def __init__(self, rows: list[dict]) -> None:
+        self._adjacency: dict[int, dict[int, Interaction]] = {}
+        for row in rows:
+            interaction = Interaction(
+                severity=InteractionSeverity(row["severity"]),
+                description_en=row["description_en"],
+                description_he=row["description_he"],
+            )
+            a, b = row["med_id_a"], row["med_id_b"]
+            self._adjacency.setdefault(a, {})[b] = interaction
+            self._adjacency.setdefault(b, {})[a] = interaction
+        self.loaded_at = time.monotonic()
+
+    def interacting(self, med_id: int) -> dict[int, Interaction]:
+        """Get the medications med_id interacts with, keyed by med_id."""
+        return self._adjacency.get(med_id, {})
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._adjacency.values()) // 2
+
+
+_index: InteractionIndex | None = None
+
+
+async def _load_interaction_rows() -> list[dict]:
+    async with get_connection() as db:
+        async with db.execute(
+            """
+            SELECT med_id_a, med_id_b, severity, description_en, description_he
+            FROM interactions
+            """
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_interaction_index() -> InteractionIndex:
+    """
+    Get the interaction index, loading it from the database when missing or
+    older than the configured TTL.
+
+    The table is small and changes rarely, so it is read in full and
+    rebuilt rather than queried per check. Concurrent reloads are harmless
+    (the last one wins).
+    """
+    global _index
+    ttl = get_settings().interaction_index_ttl_seconds
+    if _index is None or time.monotonic() - _index.loaded_at >= ttl:
+        _index = InteractionIndex(await _load_interaction_rows())
+        logger.info(f"Loaded interaction index: {len(_index)} interaction(s)")
+    return _index
+
+
+def invalidate_interaction_index() -> None:
+    """Drop the index so the next check reloads it from the database."""
+    global _index
+    _index = None
+
+
+async def _check_interactions(
+    medication_name: str | None,
+    medication_id: int | None,
+    user_identifier: str | None,
+) -> dict:
+    """Check a candidate medication against the user's active prescriptions."""
+    if medication_id is None and not (medication_name or "").strip():
+        return ToolError(
+            ToolErrorCode.INVALID_STATE,
+            "Either medication_id or medication_name must be provided",
+        ).to_dict()
+
+    if medication_id is not None:
+        async with get_connection() as db:
+            async with db.execute(
+                "SELECT * FROM medications WHERE med_id = ?", (medication_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        matches = [dict(row)] if row else []
+        query = str(medication_id)
+    else:
+        query = medication_name.strip()
+        matches = await _search_medications(query)
+
+    if not matches:
+        return ToolError(
+            ToolErrorCode.NOT_FOUND,
+            f"No medication found matching '{query}'",
+        ).to_dict()
+
+    if len(matches) > 1:
+        suggestions = [f"{m['name_en']} ({m['name_he']})" for m in matches]
+        return ToolError(
+            ToolErrorCode.AMBIGUOUS,
+            f"Multiple medications match '{query}'. Please specify which one.",
+            suggestions=suggestions,
+        ).to_dict()
+
+    candidate = _row_to_medication_info(matches[0])
+
+    result = await _query_user_prescriptions(
+        user_identifier, status=PrescriptionStatus.ACTIVE
+    )
+    if result.user is None:
+        return _user_not_found(user_identifier)
+
+    # Single pass over the user's active prescriptions
+    interacting = (await get_interaction_index()).interacting(candidate.med_id)
+    already_prescribed = False
+    interactions = []
+    for row in result.prescriptions:
+        if row["med_id"] == candidate.med_id:
+            already_prescribed = True
+            continue
+        interaction = interacting.get(row["med_id"])
+        if interaction is None:
+            continue
+        interactions.append(
+            InteractionInfo(
+                presc_id=row["presc_id"],
+                med_id=row["med_id"],
+                medication_name_en=row["name_en"],
+                medication_name_he=row["name_he"],
+                severity=interaction.severity,
+                description_en=interaction.description_en,
+                description_he=interaction.description_he,
+            )
+        )
+
+    logger.info(
+        f"check_drug_interactions result: med_id={candidate.med_id}, "
+        f"checked={len(result.prescriptions)}, flagged={len(interactions)}"
+    )
+
+    return InteractionCheckResult(
+        success=True,
+        medication=candidate,
+        checked_prescriptions=len(result.prescriptions),
+        already_prescribed=already_prescribed,
+        interactions=interactions,
+    ).model_dump()
+
+
+@tool
+@tool_runtime
+async def check_drug_interactions(
+    medication_name: str | None = None,
+    medication_id: int | None = None,
+    user_identifier: str | None = None,
+) -> dict:
+    """
+    Check a medication against the user's active prescriptions for known
+    interactions.
+
+    Use this tool when the user asks whether they can take a medication
+    together with their current medications. Results come from the
+    pharmacy's interaction database; report them as-is and refer the user
+    to a pharmacist or doctor for advice.
+
+    Args:
+        medication_name: The medication to check (English or Hebrew)
+        medication_id: The medication ID (alternative to medication_name)
+        user_identifier: User's email or phone number
+
+    Returns:
+        dict with the medication checked, how many active prescriptions were
+        checked, whether it is already prescribed, and the list of known
+        interactions (severity and description in English and Hebrew).
+    """
+    logger.info(
+        f"check_drug_interactions called: med_name={medication_name}, "
+        f"med_id={medication_id}, user={user_identifier}"
+    )
+
+    try:
+        return await _check_interactions(
+            medication_name, medication_id, user_identifier
+        )
+    except Exception as e:
+        logger.error(f"check_drug_interactions internal error: {e}")
+        return ToolError(
+            ToolErrorCode.INTERNAL,
+            "An internal error occurred while checking interactions",
+        ).to_dict()
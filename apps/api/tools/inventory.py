@@ -5,11 +5,15 @@ from langchain_core.tools import tool
 from apps.api.database import get_connection
 from apps.api.logging_config import get_logger
 from apps.api.tools.exceptions import ToolError
+from apps.api.tools.holds import get_hold_registry
+from apps.api.tools.runtime import tool_runtime
 from apps.api.tools.schemas import InventoryInfo, InventoryResult, ToolErrorCode
+from apps.api.tools.singleflight import single_flight
 
 logger = get_logger(__name__)
 
 
+@single_flight
 async def _resolve_medication_id(medication_name: str) -> int | None:
     """Resolve medication name to ID (internal helper)."""
     query = medication_name.strip()
@@ -43,7 +47,44 @@ async def _resolve_medication_id(medication_name: str) -> int | None:
             return row["med_id"] if row else None
 
 
+@single_flight
+async def _get_inventory_row(med_id: int, store_id: int) -> dict | None:
+    """Get the inventory row for a medication at a store, with its names."""
+    async with get_connection() as db:
+        async with db.execute(
+            """
+            SELECT i.store_id, i.med_id, i.qty, i.restock_eta,
+                   m.name_en, m.name_he
+            FROM inventory i
+            JOIN medications m ON i.med_id = m.med_id
+            WHERE i.med_id = ? AND i.store_id = ?
+            """,
+            (med_id, store_id),
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+
+def _to_inventory_info(row: dict) -> InventoryInfo:
+    """Convert an inventory row to InventoryInfo, net of reservation holds."""
+    # Report stock net of active reservation holds (in-memory, no DB write)
+    held = get_hold_registry().held_qty(row["store_id"], row["med_id"])
+    qty = max(row["qty"] - held, 0)
+    in_stock = qty > 0
+
+    return InventoryInfo(
+        med_id=row["med_id"],
+        store_id=row["store_id"],
+        medication_name_en=row["name_en"],
+        medication_name_he=row["name_he"],
+        in_stock=in_stock,
+        qty=qty if in_stock else None,
+        restock_eta=row["restock_eta"] if not in_stock else None,
+    )
+
+
 @tool
+@tool_runtime
 async def check_inventory(
     medication_id: int | None = None,
     medication_name: str | None = None,
@@ -52,7 +93,9 @@ async def check_inventory(
     """
     Check if a medication is in stock at the pharmacy.
 
-    Use this tool when the user asks about medication availability.
+    Use this tool to re-check stock for a medication_id already known from
+    a previous lookup. For a new availability question by name, use
+    get_medication_availability instead (one call instead of two).
     Provide either medication_id (if known from previous lookup) or
     medication_name (will be resolved automatically).
 
@@ -62,8 +105,8 @@ async def check_inventory(
         store_id: Store ID to check inventory for (default: 1)
 
     Returns:
-        dict with availability status including in_stock, qty (if available),
-        and restock_eta (if out of stock).
+        dict with availability status including in_stock, qty (if available,
+        net of units on hold for pickup), and restock_eta (if out of stock).
     """
     logger.info(
         f"check_inventory called: med_id={medication_id}, "
@@ -92,52 +135,28 @@ async def check_inventory(
             return error.to_dict()
 
     try:
-        async with get_connection() as db:
-            async with db.execute(
-                """
-                SELECT i.store_id, i.med_id, i.qty, i.restock_eta,
-                       m.name_en, m.name_he
-                FROM inventory i
-                JOIN medications m ON i.med_id = m.med_id
-                WHERE i.med_id = ? AND i.store_id = ?
-                """,
-                (med_id, store_id),
-            ) as cursor:
-                row = await cursor.fetchone()
-
-                if not row:
-                    error = ToolError(
-                        ToolErrorCode.NOT_FOUND,
-                        f"No inventory record found for medication ID {med_id} "
-                        f"at store {store_id}",
-                    )
-                    logger.info(
-                        f"check_inventory error: no inventory for med_id={med_id}"
-                    )
-                    return error.to_dict()
-
-                qty = row["qty"]
-                in_stock = qty > 0
-
-                inventory = InventoryInfo(
-                    med_id=row["med_id"],
-                    store_id=row["store_id"],
-                    medication_name_en=row["name_en"],
-                    medication_name_he=row["name_he"],
-                    in_stock=in_stock,
-                    qty=qty if in_stock else None,
-                    restock_eta=row["restock_eta"] if not in_stock else None,
-                )
-
-                logger.info(
-                    f"check_inventory result: med_id={med_id}, "
-                    f"in_stock={in_stock}, qty={qty}"
-                )
-
-                return InventoryResult(
-                    success=True,
-                    inventory=inventory,
-                ).model_dump()
+        row = await _get_inventory_row(med_id, store_id)
+
+        if not row:
+            error = ToolError(
+                ToolErrorCode.NOT_FOUND,
+                f"No inventory record found for medication ID {med_id} "
+                f"at store {store_id}",
+            )
+            logger.info(f"check_inventory error: no inventory for med_id={med_id}")
+            return error.to_dict()
+
+        inventory = _to_inventory_info(row)
+
+        logger.info(
+            f"check_inventory result: med_id={med_id}, "
+            f"in_stock={inventory.in_stock}, qty={inventory.qty}"
+        )
+
+        return InventoryResult(
+            success=True,
+            inventory=inventory,
+        ).model_dump()
 
     except Exception as e:
         logger.error(f"check_inventory internal error: {e}")
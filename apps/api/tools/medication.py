@@ -5,11 +5,14 @@ from langchain_core.tools import tool
 from apps.api.database import get_connection
 from apps.api.logging_config import get_logger
 from apps.api.tools.exceptions import ToolError
+from apps.api.tools.runtime import tool_runtime
 from apps.api.tools.schemas import MedicationInfo, MedicationResult, ToolErrorCode
+from apps.api.tools.singleflight import single_flight
 
 logger = get_logger(__name__)
 
 
+@single_flight
 async def _search_medications(query: str) -> list[dict]:
     """
     Search medications by name (EN or HE).
@@ -64,12 +67,14 @@ def _row_to_medication_info(row: dict) -> MedicationInfo:
 
 
 @tool
+@tool_runtime
 async def get_medication_by_name(medication_name: str) -> dict:
     """
     Look up medication information by name (English or Hebrew).
 
     Use this tool when the user asks about a specific medication's
-    ingredients, dosage, warnings, or prescription requirements.
+    ingredients, dosage, warnings, or prescription requirements. If they
+    also ask about availability, use get_medication_availability instead.
 
     Args:
         medication_name: The name of the medication to search for
@@ -1,15 +1,25 @@
 """Prescription management tool for the pharmacy agent."""
 
+import json
+from dataclasses import dataclass, field
+
 from langchain_core.tools import tool
 
+from apps.api.config import get_settings
 from apps.api.database import get_connection
+from apps.api.db_writer import get_db_writer
+from apps.api.identity import get_user_cache, normalize_identifier
 from apps.api.logging_config import get_logger
+from apps.api.request_context import get_request_context
 from apps.api.tools.exceptions import ToolError
+from apps.api.tools.expiry import utc_now_sql
+from apps.api.tools.runtime import tool_runtime
 from apps.api.tools.schemas import (
     PrescriptionAction,
     PrescriptionInfo,
     PrescriptionListResult,
     PrescriptionStatus,
+    RefillRequestResult,
     RefillStatusResult,
     ToolErrorCode,
 )
@@ -17,72 +27,199 @@ from apps.api.tools.schemas import (
 logger = get_logger(__name__)
 
 
-async def _lookup_user(identifier: str) -> dict | None:
-    """Look up user by email or phone."""
-    identifier = identifier.strip()
-    if not identifier:
-        return None
+# Columns a user can be looked up by (see apps.api.identity)
+_USER_KEY_COLUMNS = ("user_id", "email_norm", "phone_e164")
 
-    async with get_connection() as db:
-        async with db.execute(
-            """
-            SELECT user_id, name, phone, email FROM users
-            WHERE LOWER(email) = LOWER(?) OR phone = ?
-            """,
-            (identifier, identifier),
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
 
+@dataclass
+class _UserPrescriptions:
+    """Result of a single users -> prescriptions -> medications query."""
+
+    user: dict | None = None
+    prescriptions: list[dict] = field(default_factory=list)
+    status_counts: dict[str, int] = field(default_factory=dict)
+    has_more: bool = False
+
+
+async def _fetch_user_prescriptions(
+    column: str,
+    value: str | int,
+    presc_id: int | None = None,
+    med_id: int | None = None,
+    status: PrescriptionStatus | None = None,
+    after_presc_id: int | None = None,
+    limit: int | None = None,
+    with_counts: bool = False,
+) -> _UserPrescriptions:
+    """
+    Fetch a user and their prescriptions in one query.
+
+    Joins users -> prescriptions -> medications on a single identifier
+    predicate. The LEFT JOINs keep the user row even when they have no
+    (matching) prescriptions, so "user not found" and "no prescriptions"
+    are told apart from the same result set.
+
+    Listing is keyset-paginated on presc_id and served by the
+    (user_id, status, presc_id) index, so its cost depends on the page size
+    rather than the length of the user's history.
+
+    Args:
+        column: users column to match on (user_id, email_norm or phone_e164)
+        value: Value to match
+        presc_id: Optionally restrict to one prescription
+        med_id: Optionally restrict to one medication
+        status: Optionally restrict to one status
+        after_presc_id: Keyset cursor - only prescriptions after this ID
+        limit: Maximum number of prescriptions to return
+        with_counts: Also return per-status counts for the whole history
+
+    Returns:
+        _UserPrescriptions (user is None if not found)
+    """
+    if column not in _USER_KEY_COLUMNS:
+        raise ValueError(f"Unsupported user lookup column: {column}")
+
+    filters = []
+    params: list = []
+    if presc_id is not None:
+        filters.append("AND p.presc_id = ?")
+        params.append(presc_id)
+    if med_id is not None:
+        filters.append("AND p.med_id = ?")
+        params.append(med_id)
+    if status is not None:
+        filters.append("AND p.status = ?")
+        params.append(status.value)
+    if after_presc_id is not None:
+        filters.append("AND p.presc_id > ?")
+        params.append(after_presc_id)
+    params.append(value)
+
+    # Per-status counts are aggregated once, as a one-row CTE joined to the
+    # user, rather than by a subquery evaluated for every returned row
+    counts_cte, counts_join, counts_column = "", "", "NULL AS status_counts"
+    if with_counts:
+        counts_cte = f"""
+            WITH counts AS (
+                SELECT json_group_object(status, n) AS status_counts FROM (
+                    SELECT cp.status, COUNT(*) AS n
+                    FROM users cu JOIN prescriptions cp ON cp.user_id = cu.user_id
+                    WHERE cu.{column} = ?
+                    GROUP BY cp.status
+                )
+            )"""
+        counts_join = "CROSS JOIN counts c"
+        counts_column = "c.status_counts"
+        params.insert(0, value)
+    limit_clause = ""
+    if limit is not None:
+        # Fetch one extra row to tell whether another page exists
+        limit_clause = "LIMIT ?"
+        params.append(limit + 1)
 
-async def _get_user_prescriptions(user_id: int) -> list[dict]:
-    """Get all prescriptions for a user."""
     async with get_connection() as db:
         async with db.execute(
-            """
-            SELECT p.presc_id, p.med_id, p.refills_left, p.status,
+            f"""{counts_cte}
+            SELECT u.user_id, u.name, u.phone, u.email, {counts_column},
+                   p.presc_id, p.med_id, p.refills_left, p.status, p.expires_at,
                    m.name_en, m.name_he
-            FROM prescriptions p
-            JOIN medications m ON p.med_id = m.med_id
-            WHERE p.user_id = ?
+            FROM users u {counts_join}
+            LEFT JOIN prescriptions p ON p.user_id = u.user_id {" ".join(filters)}
+            LEFT JOIN medications m ON m.med_id = p.med_id
+            WHERE u.{column} = ?
+            ORDER BY p.presc_id
+            {limit_clause}
             """,
-            (user_id,),
+            params,
         ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            rows = [dict(row) for row in await cursor.fetchall()]
 
+    if not rows:
+        return _UserPrescriptions()
 
-async def _get_prescription_by_id(
-    presc_id: int, user_id: int
-) -> dict | None:
-    """Get a specific prescription ensuring it belongs to the user."""
-    async with get_connection() as db:
+    first = rows[0]
+    result = _UserPrescriptions(
+        user={k: first[k] for k in ("user_id", "name", "phone", "email")},
+        prescriptions=[row for row in rows if row["presc_id"] is not None],
+        status_counts=json.loads(first["status_counts"] or "{}"),
+    )
+    if limit is not None and len(result.prescriptions) > limit:
+        result.prescriptions = result.prescriptions[:limit]
+        result.has_more = True
+    return result
+
+
+async def _query_user_prescriptions(
+    user_identifier: str | None,
+    **filters,
+) -> _UserPrescriptions:
+    """
+    Resolve the user and fetch prescriptions in a single round trip.
+
+    A user_id already resolved for this request (see RequestContext) is
+    trusted and takes precedence over any identifier passed by the LLM.
+    Otherwise uses the cached user_id when the identifier was seen recently,
+    and falls back to the normalized email/phone column (caching the user
+    row found). Keyword filters are passed to _fetch_user_prescriptions.
+    """
+    ctx = get_request_context()
+    if ctx and ctx.user_id is not None:
+        return await _fetch_user_prescriptions("user_id", ctx.user_id, **filters)
+
+    if not user_identifier:
+        return _UserPrescriptions()
+
+    key = normalize_identifier(user_identifier)
+    if key is None:
+        return _UserPrescriptions()
+
+    cache = get_user_cache()
+    cached = cache.get(key)
+    column, value = ("user_id", cached["user_id"]) if cached else key
+
+    result = await _fetch_user_prescriptions(column, value, **filters)
+    if result.user and not cached:
+        cache.set(key, result.user)
+    return result
+
+
+async def _decrement_refill(user_id: int, presc_id: int) -> int | None:
+    """
+    Atomically consume one refill through the single-writer queue.
+
+    The conditional UPDATE is the source of truth for eligibility, so
+    concurrent requests for the same prescription can never drive
+    refills_left below zero or refill an inactive prescription. It also
+    checks expires_at so a prescription that is due but not yet swept
+    cannot be refilled.
+
+    Returns:
+        Remaining refills after the decrement, or None if not eligible
+    """
+
+    async def write(db) -> int | None:
         async with db.execute(
             """
-            SELECT p.presc_id, p.med_id, p.refills_left, p.status,
-                   m.name_en, m.name_he
-            FROM prescriptions p
-            JOIN medications m ON p.med_id = m.med_id
-            WHERE p.presc_id = ? AND p.user_id = ?
+            UPDATE prescriptions
+            SET refills_left = refills_left - 1
+            WHERE presc_id = ? AND user_id = ?
+              AND refills_left > 0 AND status = 'active'
+              AND (expires_at IS NULL OR expires_at > ?)
+            RETURNING refills_left
             """,
-            (presc_id, user_id),
+            (presc_id, user_id, utc_now_sql()),
         ) as cursor:
             row = await cursor.fetchone()
-            return dict(row) if row else None
+        return row["refills_left"] if row else None
+
+    return await get_db_writer().submit(write)
 
 
 def _row_to_prescription_info(row: dict) -> PrescriptionInfo:
     """Convert database row to PrescriptionInfo."""
-    # Normalize status and handle unexpected values safely
-    status_raw = str(row["status"] or "").lower()
-    try:
-        status = PrescriptionStatus(status_raw)
-    except ValueError:
-        logger.warning(
-            f"Unknown prescription status '{row['status']}', defaulting to expired"
-        )
-        status = PrescriptionStatus.EXPIRED
-
+    # Status is constrained by the schema and kept current by the expiry
+    # sweeper, so it is trusted as stored
+    status = PrescriptionStatus(row["status"])
     can_refill = status == PrescriptionStatus.ACTIVE and row["refills_left"] > 0
     return PrescriptionInfo(
         presc_id=row["presc_id"],
@@ -91,30 +228,79 @@ def _row_to_prescription_info(row: dict) -> PrescriptionInfo:
         medication_name_he=row["name_he"],
         refills_left=row["refills_left"],
         status=status,
+        expires_at=row["expires_at"],
         can_refill=can_refill,
     )
 
 
-async def _handle_list_action(user: dict) -> dict:
-    """Handle LIST action - return all prescriptions for user."""
-    prescriptions = await _get_user_prescriptions(user["user_id"])
+def _user_not_found(user_identifier: str | None) -> dict:
+    """Build the UNAUTHORIZED error for an unknown or missing identifier."""
+    if not user_identifier:
+        logger.info("prescription_management error: no verified user or identifier")
+        return ToolError(
+            ToolErrorCode.UNAUTHORIZED,
+            "A user email or phone number is required for prescription lookups",
+        ).to_dict()
+
+    logger.info(f"prescription_management error: user not found: {user_identifier}")
+    return ToolError(
+        ToolErrorCode.UNAUTHORIZED,
+        f"User not found with identifier: {user_identifier}",
+    ).to_dict()
+
 
-    prescription_list = [_row_to_prescription_info(p) for p in prescriptions]
+async def _handle_list_action(
+    user_identifier: str | None,
+    status_filter: str | None,
+    cursor: int | None,
+) -> dict:
+    """Handle LIST action - return one page of the user's prescriptions."""
+    status_filter = (status_filter or PrescriptionStatus.ACTIVE.value).lower()
+    if status_filter == "all":
+        status = None
+    else:
+        try:
+            status = PrescriptionStatus(status_filter)
+        except ValueError:
+            return ToolError(
+                ToolErrorCode.INVALID_STATE,
+                f"Invalid status_filter '{status_filter}'. "
+                "Must be 'active', 'completed', 'expired' or 'all'",
+            ).to_dict()
+
+    page_size = get_settings().prescription_page_size
+    result = await _query_user_prescriptions(
+        user_identifier,
+        status=status,
+        after_presc_id=cursor,
+        limit=page_size,
+        with_counts=True,
+    )
+    if not result.user:
+        return _user_not_found(user_identifier)
+
+    prescription_list = [_row_to_prescription_info(p) for p in result.prescriptions]
+    next_cursor = prescription_list[-1].presc_id if result.has_more else None
 
     logger.info(
-        f"prescription_management LIST: user_id={user['user_id']}, "
-        f"count={len(prescription_list)}"
+        f"prescription_management LIST: user_id={result.user['user_id']}, "
+        f"status_filter={status_filter}, cursor={cursor}, "
+        f"count={len(prescription_list)}, has_more={result.has_more}"
     )
 
     return PrescriptionListResult(
         success=True,
-        user_name=user["name"],
+        user_name=result.user["name"],
+        status_filter=status_filter,
+        status_counts=result.status_counts,
+        total_count=sum(result.status_counts.values()),
         prescriptions=prescription_list,
+        next_cursor=next_cursor,
     ).model_dump()
 
 
 async def _handle_refill_status_action(
-    user: dict, prescription_id: int | None
+    user_identifier: str | None, prescription_id: int | None
 ) -> dict:
     """Handle REFILL_STATUS action - check refill eligibility."""
     if prescription_id is None:
@@ -124,31 +310,25 @@ async def _handle_refill_status_action(
         )
         return error.to_dict()
 
-    prescription = await _get_prescription_by_id(prescription_id, user["user_id"])
+    result = await _query_user_prescriptions(user_identifier, presc_id=prescription_id)
+    if not result.user:
+        return _user_not_found(user_identifier)
 
-    if not prescription:
+    if not result.prescriptions:
         error = ToolError(
             ToolErrorCode.NOT_FOUND,
             f"Prescription {prescription_id} not found for this user",
         )
         logger.info(
             f"prescription_management REFILL_STATUS: "
-            f"prescription {prescription_id} not found for user {user['user_id']}"
+            f"prescription {prescription_id} not found for user {result.user['user_id']}"
         )
         return error.to_dict()
 
-    presc_info = _row_to_prescription_info(prescription)
+    presc_info = _row_to_prescription_info(result.prescriptions[0])
 
     # Determine eligibility and reason
-    if presc_info.status != PrescriptionStatus.ACTIVE:
-        refill_eligible = False
-        reason = f"Prescription is {presc_info.status.value}"
-    elif presc_info.refills_left <= 0:
-        refill_eligible = False
-        reason = "No refills remaining"
-    else:
-        refill_eligible = True
-        reason = f"{presc_info.refills_left} refill(s) available"
+    refill_eligible, reason = _refill_eligibility(presc_info)
 
     logger.info(
         f"prescription_management REFILL_STATUS: presc_id={prescription_id}, "
@@ -163,32 +343,117 @@ async def _handle_refill_status_action(
     ).model_dump()
 
 
+def _refill_eligibility(presc_info: PrescriptionInfo) -> tuple[bool, str]:
+    """Determine refill eligibility and a human-readable reason."""
+    if presc_info.status != PrescriptionStatus.ACTIVE:
+        return False, f"Prescription is {presc_info.status.value}"
+    if presc_info.refills_left <= 0:
+        return False, "No refills remaining"
+    return True, f"{presc_info.refills_left} refill(s) available"
+
+
+async def _handle_refill_request_action(
+    user_identifier: str | None, prescription_id: int | None
+) -> dict:
+    """Handle REFILL_REQUEST action - consume one refill if eligible."""
+    if prescription_id is None:
+        error = ToolError(
+            ToolErrorCode.NOT_FOUND,
+            "prescription_id is required for REFILL_REQUEST action",
+        )
+        return error.to_dict()
+
+    result = await _query_user_prescriptions(user_identifier, presc_id=prescription_id)
+    if not result.user:
+        return _user_not_found(user_identifier)
+
+    if not result.prescriptions:
+        error = ToolError(
+            ToolErrorCode.NOT_FOUND,
+            f"Prescription {prescription_id} not found for this user",
+        )
+        return error.to_dict()
+
+    row = result.prescriptions[0]
+    refills_left = await _decrement_refill(result.user["user_id"], prescription_id)
+
+    if refills_left is None:
+        # Never eligible, expired but not yet swept, or another request
+        # consumed the last refill between our read and the conditional UPDATE
+        was_eligible, reason = _refill_eligibility(_row_to_prescription_info(row))
+        if was_eligible:
+            due = row["expires_at"] is not None and row["expires_at"] <= utc_now_sql()
+            reason = "Prescription is expired" if due else "No refills remaining"
+        logger.info(
+            f"prescription_management REFILL_REQUEST rejected: "
+            f"presc_id={prescription_id}, reason={reason}"
+        )
+        return ToolError(
+            ToolErrorCode.INVALID_STATE,
+            f"Refill cannot be requested: {reason}",
+        ).to_dict()
+
+    presc_info = _row_to_prescription_info({**row, "refills_left": refills_left})
+
+    logger.info(
+        f"prescription_management REFILL_REQUEST: presc_id={prescription_id}, "
+        f"refills_left={refills_left}"
+    )
+
+    return RefillRequestResult(
+        success=True,
+        prescription=presc_info,
+        refills_left=refills_left,
+        message=f"Refill requested for {presc_info.medication_name_en}",
+    ).model_dump()
+
+
+def _is_read_action(arguments: dict) -> bool:
+    """Whether a prescription_management call only reads (for memoization)."""
+    action = str(arguments.get("action") or "").strip().upper()
+    return action != PrescriptionAction.REFILL_REQUEST.value
+
+
 @tool
+@tool_runtime(read_only=_is_read_action)
 async def prescription_management(
-    user_identifier: str,
     action: str,
+    user_identifier: str | None = None,
     prescription_id: int | None = None,
+    status_filter: str = "active",
+    cursor: int | None = None,
 ) -> dict:
     """
-    Manage user prescriptions - list all prescriptions or check refill status.
+    Manage user prescriptions - list prescriptions, check refill status, or
+    request a refill.
 
     Use this tool when users ask about their prescriptions or refills.
-    Requires user identification via email or phone number.
+    If the user is already verified for this conversation, omit
+    user_identifier; otherwise pass their email or phone number.
 
     Args:
-        user_identifier: User's email address or phone number
-        action: Either "LIST" to see all prescriptions, or "REFILL_STATUS"
-               to check if a specific prescription can be refilled
-        prescription_id: Required for REFILL_STATUS action - the prescription
-                        to check
+        action: "LIST" to see prescriptions, "REFILL_STATUS" to check if a
+               specific prescription can be refilled, or "REFILL_REQUEST" to
+               submit a refill (only after the user explicitly confirms)
+        user_identifier: User's email address or phone number (only needed
+                        when the user is not already verified)
+        prescription_id: Required for REFILL_STATUS and REFILL_REQUEST - the
+                        prescription to check or refill
+        status_filter: For LIST - "active" (default), "completed", "expired"
+                      or "all"
+        cursor: For LIST - pass next_cursor from a previous result to get
+               the next page
 
     Returns:
-        For LIST: dict with list of all user prescriptions
+        For LIST: dict with per-status counts and one page of prescriptions
+                 (next_cursor is set when more pages exist)
         For REFILL_STATUS: dict with refill eligibility and remaining refills
+        For REFILL_REQUEST: dict with the refills left after this refill
     """
     logger.info(
         f"prescription_management called: identifier={user_identifier}, "
-        f"action={action}, presc_id={prescription_id}"
+        f"action={action}, presc_id={prescription_id}, "
+        f"status_filter={status_filter}, cursor={cursor}"
     )
 
     # Validate action
@@ -197,27 +462,18 @@ async def prescription_management(
     except ValueError:
         error = ToolError(
             ToolErrorCode.INVALID_STATE,
-            f"Invalid action '{action}'. Must be 'LIST' or 'REFILL_STATUS'",
-        )
-        return error.to_dict()
-
-    # Look up user
-    user = await _lookup_user(user_identifier)
-    if not user:
-        error = ToolError(
-            ToolErrorCode.UNAUTHORIZED,
-            f"User not found with identifier: {user_identifier}",
-        )
-        logger.info(
-            f"prescription_management error: user not found: {user_identifier}"
+            f"Invalid action '{action}'. "
+            "Must be 'LIST', 'REFILL_STATUS' or 'REFILL_REQUEST'",
         )
         return error.to_dict()
 
     try:
         if action_enum == PrescriptionAction.LIST:
-            return await _handle_list_action(user)
-        else:  # REFILL_STATUS
-            return await _handle_refill_status_action(user, prescription_id)
+            return await _handle_list_action(user_identifier, status_filter, cursor)
+        elif action_enum == PrescriptionAction.REFILL_STATUS:
+            return await _handle_refill_status_action(user_identifier, prescription_id)
+        else:  # REFILL_REQUEST
+            return await _handle_refill_request_action(user_identifier, prescription_id)
 
     except Exception as e:
         logger.error(f"prescription_management internal error: {e}")
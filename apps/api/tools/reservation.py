@@ -0,0 +1,160 @@
+"""Reservation hold tool for the pharmacy agent."""
+
+from datetime import datetime, timezone
+
+from langchain_core.tools import tool
+
+from apps.api.config import get_settings
+from apps.api.logging_config import get_logger
+from apps.api.tools.exceptions import ToolError
+from apps.api.tools.holds import get_hold_registry
+from apps.api.tools.inventory import _get_inventory_row, _resolve_medication_id
+from apps.api.tools.runtime import tool_runtime
+from apps.api.tools.schemas import ReservationInfo, ReservationResult, ToolErrorCode
+
+logger = get_logger(__name__)
+
+
+async def place_reservation(
+    medication_id: int | None = None,
+    medication_name: str | None = None,
+    quantity: int = 1,
+    store_id: int = 1,
+) -> dict:
+    """
+    Place a TTL-bound hold on medication stock.
+
+    Shared by the reserve_medication tool and the /reservations endpoint.
+
+    Returns:
+        ReservationResult dict, or a ToolError dict on failure
+    """
+    if medication_id is None and medication_name is None:
+        return ToolError(
+            ToolErrorCode.INVALID_STATE,
+            "Either medication_id or medication_name must be provided",
+        ).to_dict()
+
+    if quantity < 1:
+        return ToolError(
+            ToolErrorCode.INVALID_STATE,
+            "quantity must be at least 1",
+        ).to_dict()
+
+    med_id = medication_id
+    if med_id is None and medication_name:
+        med_id = await _resolve_medication_id(medication_name)
+        if med_id is None:
+            return ToolError(
+                ToolErrorCode.NOT_FOUND,
+                f"Medication '{medication_name}' not found",
+            ).to_dict()
+
+    row = await _get_inventory_row(med_id, store_id)
+    if not row:
+        return ToolError(
+            ToolErrorCode.NOT_FOUND,
+            f"No inventory record found for medication ID {med_id} "
+            f"at store {store_id}",
+        ).to_dict()
+
+    registry = get_hold_registry()
+    hold = registry.try_hold(
+        store_id=store_id,
+        med_id=med_id,
+        qty=quantity,
+        stock_qty=row["qty"],
+        ttl_seconds=get_settings().reservation_ttl_seconds,
+    )
+    if hold is None:
+        available = max(row["qty"] - registry.held_qty(store_id, med_id), 0)
+        logger.info(
+            f"reservation rejected: med_id={med_id}, requested={quantity}, "
+            f"available={available}"
+        )
+        return ToolError(
+            ToolErrorCode.INVALID_STATE,
+            f"Only {available} unit(s) of {row['name_en']} available to reserve",
+        ).to_dict()
+
+    available_after = max(row["qty"] - registry.held_qty(store_id, med_id), 0)
+    logger.info(
+        f"reservation placed: hold_id={hold.hold_id}, med_id={med_id}, "
+        f"qty={quantity}, available_after={available_after}"
+    )
+
+    return ReservationResult(
+        success=True,
+        reservation=ReservationInfo(
+            hold_id=hold.hold_id,
+            med_id=med_id,
+            store_id=store_id,
+            medication_name_en=row["name_en"],
+            medication_name_he=row["name_he"],
+            qty=hold.qty,
+            expires_at=datetime.fromtimestamp(
+                hold.expires_at, tz=timezone.utc
+            ).isoformat(),
+            available_after_hold=available_after,
+        ),
+    ).model_dump()
+
+
+def release_reservation(hold_id: str) -> bool:
+    """
+    Release a hold before it expires.
+
+    Returns:
+        True if an active hold was released, False if none was found
+    """
+    hold = get_hold_registry().release(hold_id)
+    if hold:
+        logger.info(f"reservation released: hold_id={hold_id}")
+    return hold is not None
+
+
+@tool
+@tool_runtime(read_only=False)
+async def reserve_medication(
+    medication_id: int | None = None,
+    medication_name: str | None = None,
+    quantity: int = 1,
+    store_id: int = 1,
+) -> dict:
+    """
+    Hold units of an in-stock medication for customer pickup.
+
+    Use this tool only when the user explicitly asks to reserve or hold a
+    medication. Holds expire automatically after a limited time.
+    Provide either medication_id (if known from previous lookup) or
+    medication_name (will be resolved automatically).
+
+    Args:
+        medication_id: The medication ID (from get_medication_by_name result)
+        medication_name: The medication name (alternative to medication_id)
+        quantity: Number of units to hold (default: 1)
+        store_id: Store ID to hold stock at (default: 1)
+
+    Returns:
+        dict with the hold_id, held quantity, expiry time, and the quantity
+        still available after the hold.
+    """
+    logger.info(
+        f"reserve_medication called: med_id={medication_id}, "
+        f"med_name={medication_name}, qty={quantity}, store_id={store_id}"
+    )
+
+    try:
+        return await place_reservation(
+            medication_id=medication_id,
+            medication_name=medication_name,
+            quantity=quantity,
+            store_id=store_id,
+        )
+    except Exception as e:
+        logger.error(f"reserve_medication internal error: {e}")
+        error = ToolError(
+            ToolErrorCode.INTERNAL,
+            "An internal error occurred while reserving the medication",
+        )
+        return error.to_dict()
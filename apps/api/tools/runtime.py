@@ -0,0 +1,261 @@
+"""Request-aware execution wrapper shared by all pharmacy tools."""
+
+import asyncio
+import functools
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from langchain_core.runnables.config import ensure_config
+from langchain_core.tools import BaseTool
+
+from apps.api.deadline import run_within_deadline
+from apps.api.logging_config import get_logger
+from apps.api.request_context import RequestContext, get_request_context
+
+logger = get_logger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+CallKey = tuple[str, tuple[tuple[str, Hashable], ...]]
+
+# Sources a tool call can be served from instead of running (see ToolCall)
+SERVED_FROM_MEMO = "memo"
+SERVED_FROM_PREFETCH = "prefetch"
+
+
+def _normalize_arg(value: Any) -> Any:
+    """Normalize an argument value so trivially different spellings match."""
+    if isinstance(value, str):
+        return value.strip().casefold()
+    return value
+
+
+def _bind(signature: inspect.Signature, args: tuple, kwargs: dict) -> dict | None:
+    """Bind call arguments with defaults applied, or None if they don't fit."""
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _call_key(name: str, arguments: dict[str, Any]) -> CallKey | None:
+    """
+    Key a tool call by name and normalized arguments.
+
+    Returns:
+        The key, or None if an argument is unhashable
+    """
+    key = (name, tuple(sorted((k, _normalize_arg(v)) for k, v in arguments.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _current_tool_run_id() -> str | None:
+    """Get the callback run_id of the tool invocation being executed, if any."""
+    # The tool's callback manager is the parent of anything it would run
+    run_id = getattr(ensure_config().get("callbacks"), "parent_run_id", None)
+    return str(run_id) if run_id is not None else None
+
+
+def _is_reusable(result: Any) -> bool:
+    """Internal errors may be transient, so they are never reused."""
+    return not (isinstance(result, dict) and result.get("error_code") == "INTERNAL")
+
+
+async def _await_shared(ctx: RequestContext, future: asyncio.Future) -> tuple[bool, Any]:
+    """
+    Wait for a memoized or prefetched call and take its result.
+
+    Returns:
+        (True, result), or (False, None) if that call failed or was cancelled
+    """
+    try:
+        result = await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if not future.cancelled():
+            raise  # this call itself was cancelled
+        return False, None
+    except Exception as e:
+        logger.info(f"Shared tool call failed, running it again: {e}")
+        return False, None
+
+    if not _is_reusable(result):
+        return False, None
+
+    if future in ctx.prefetch_pending:
+        ctx.prefetch_pending.discard(future)
+        source = SERVED_FROM_PREFETCH
+        if ctx.trace:
+            ctx.trace.prefetch_hits += 1
+    else:
+        source = SERVED_FROM_MEMO
+        if ctx.trace:
+            ctx.trace.memo_hits += 1
+
+    run_id = _current_tool_run_id()
+    if run_id:
+        ctx.served_runs[run_id] = source
+    return True, result
+
+
+async def _timed(ctx: RequestContext, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    """Run fn, recording when it ran under the current tool run (if any)."""
+    run_id = _current_tool_run_id()
+    start = time.perf_counter()
+    try:
+        return await fn(*args, **kwargs)
+    finally:
+        if run_id:
+            ctx.tool_executions[run_id] = (start, time.perf_counter())
+
+
+async def _run_with_slots(ctx: RequestContext, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    if ctx.tool_slots is None:
+        return await _timed(ctx, fn, args, kwargs)
+    async with ctx.tool_slots:
+        return await _timed(ctx, fn, args, kwargs)
+
+
+def tool_runtime(
+    fn: F | None = None,
+    *,
+    read_only: bool | Callable[[dict[str, Any]], bool] = True,
+) -> Any:
+    """
+    Run a tool coroutine under the current request's tool runtime.
+
+    Apply below @tool so every invocation (ToolNode, fast path, direct
+    calls) goes through it. Inside a request:
+    - read-only calls are memoized by (tool name, normalized arguments):
+      a repeat, or a call matching a prefetch (see prefetch_tool_call),
+      returns the first result without running the tool again, and
+      identical concurrent calls share one execution
+    - calls that write drop the request's memo so later reads see the change
+    - at most the request's tool_slots calls run at once
+    Outside a request the tool runs unchanged. Either way the call is
+    bounded by the request deadline, if any (see apps.api.deadline).
+
+    Args:
+        read_only: Whether the tool only reads, or a predicate over the
+            bound arguments (for tools with both read and write actions)
+    """
+    if fn is None:
+        return functools.partial(tool_runtime, read_only=read_only)
+
+    signature = inspect.signature(fn)
+
+    def key_for(*args: Any, **kwargs: Any) -> CallKey | None:
+        arguments = _bind(signature, args, kwargs)
+        return _call_key(fn.__name__, arguments) if arguments is not None else None
+
+    async def run(*args: Any, **kwargs: Any) -> Any:
+        ctx = get_request_context()
+        if ctx is None:
+            return await fn(*args, **kwargs)
+
+        arguments = _bind(signature, args, kwargs)
+        reads = read_only(arguments or {}) if callable(read_only) else read_only
+        if not reads:
+            ctx.tool_results.clear()
+            try:
+                return await _run_with_slots(ctx, fn, args, kwargs)
+            finally:
+                ctx.tool_results.clear()
+
+        key = _call_key(fn.__name__, arguments) if arguments is not None else None
+        if key is None:
+            return await _run_with_slots(ctx, fn, args, kwargs)
+
+        shared = ctx.tool_results.get(key)
+        if shared is not None:
+            ok, result = await _await_shared(ctx, shared)
+            if ok:
+                return result
+
+        future = asyncio.get_running_loop().create_future()
+        ctx.tool_results[key] = future
+        try:
+            result = await _run_with_slots(ctx, fn, args, kwargs)
+        except BaseException as e:
+            if ctx.tool_results.get(key) is future:
+                del ctx.tool_results[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # retrieved by this caller
+            raise
+
+        future.set_result(result)
+        if not _is_reusable(result) and ctx.tool_results.get(key) is future:
+            del ctx.tool_results[key]
+        return result
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await run_within_deadline(run(*args, **kwargs), f"tool:{fn.__name__}")
+
+    wrapper.call_key = key_for  # type: ignore[attr-defined]
+    return wrapper
+
+
+def prefetch_tool_call(
+    tool: BaseTool,
+    kwargs: dict[str, Any],
+    aliases: list[dict[str, Any]] | None = None,
+) -> asyncio.Task | None:
+    """
+    Start a read-only tool call speculatively for the current request.
+
+    The call runs in the background and is stored in the request's memo,
+    so if the model later calls the same tool with the same (normalized)
+    arguments, or with any of the alias argument sets, it gets this result
+    instead of running the tool again. Like any tool call it takes one of
+    the request's tool_slots and is bounded by the request deadline.
+
+    Args:
+        tool: A tool whose coroutine is wrapped by tool_runtime
+        kwargs: Arguments to run the tool with
+        aliases: Other argument sets that produce the same result
+
+    Returns:
+        The background task, or None if there is no current request
+    """
+    ctx = get_request_context()
+    wrapper = getattr(tool, "coroutine", None)
+    if ctx is None or not hasattr(wrapper, "call_key"):
+        return None
+
+    # Run the unwrapped tool so the call can't resolve to itself
+    task = asyncio.create_task(
+        run_within_deadline(
+            _run_with_slots(ctx, wrapper.__wrapped__, (), kwargs),
+            f"tool:{wrapper.__name__}",
+        )
+    )
+    for arg_set in [kwargs, *(aliases or [])]:
+        key = wrapper.call_key(**arg_set)
+        if key is not None:
+            ctx.tool_results.setdefault(key, task)
+    ctx.prefetch_pending.add(task)
+
+    if ctx.trace:
+        ctx.trace.prefetch_started += 1
+    return task
+
+
+def cancel_prefetches(ctx: RequestContext) -> None:
+    """Cancel prefetches still running when the request ends."""
+    for task in ctx.prefetch_pending:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            # Mark any exception as retrieved
+            task.exception()
+    ctx.prefetch_pending.clear()
@@ -21,6 +21,7 @@ class PrescriptionAction(str, Enum):
 
     LIST = "LIST"
     REFILL_STATUS = "REFILL_STATUS"
+    REFILL_REQUEST = "REFILL_REQUEST"
 
 
 class PrescriptionStatus(str, Enum):
@@ -83,6 +84,67 @@ class InventoryResult(BaseModel):
     error_message: Optional[str] = None
 
 
+# --- Reservation Schemas ---
+
+
+class ReservationInfo(BaseModel):
+    """A hold placed on medication stock for pickup."""
+
+    hold_id: str
+    med_id: int
+    store_id: int
+    medication_name_en: str
+    medication_name_he: str
+    qty: int
+    expires_at: str = Field(..., description="Hold expiry time (ISO 8601, UTC)")
+    available_after_hold: int
+
+
+class ReservationResult(BaseModel):
+    """Result wrapper for reservation holds."""
+
+    success: bool
+    reservation: Optional[ReservationInfo] = None
+    error_code: Optional[ToolErrorCode] = None
+    error_message: Optional[str] = None
+
+
+# --- Interaction Schemas ---
+
+
+class InteractionSeverity(str, Enum):
+    """Severity of a known medication interaction."""
+
+    MINOR = "minor"
+    MODERATE = "moderate"
+    MAJOR = "major"
+
+
+class InteractionInfo(BaseModel):
+    """A known interaction between the candidate and a current prescription."""
+
+    presc_id: int
+    med_id: int
+    medication_name_en: str
+    medication_name_he: str
+    severity: InteractionSeverity
+    description_en: str
+    description_he: str
+
+
+class InteractionCheckResult(BaseModel):
+    """Result for check_drug_interactions."""
+
+    success: bool
+    medication: Optional[MedicationInfo] = None
+    checked_prescriptions: Optional[int] = None
+    already_prescribed: Optional[bool] = None
+    interactions: Optional[list[InteractionInfo]] = None
+    error_code: Optional[ToolErrorCode] = None
+    error_message: Optional[str] = None
+    suggestions: Optional[list[str]] = None
+
+
 # --- Prescription Schemas ---
 
 
@@ -95,15 +157,24 @@ class PrescriptionInfo(BaseModel):
     medication_name_he: str
     refills_left: int
     status: PrescriptionStatus
+    expires_at: Optional[str] = None
     can_refill: bool
 
 
 class PrescriptionListResult(BaseModel):
-    """Result for LIST action."""
+    """Result for LIST action (one page, plus a summary of the full history)."""
 
     success: bool
     user_name: Optional[str] = None
+    status_filter: Optional[str] = None
+    status_counts: Optional[dict[str, int]] = Field(
+        default=None, description="Number of prescriptions per status"
+    )
+    total_count: Optional[int] = None
     prescriptions: Optional[list[PrescriptionInfo]] = None
+    next_cursor: Optional[int] = Field(
+        default=None, description="Pass as cursor to fetch the next page"
+    )
     error_code: Optional[ToolErrorCode] = None
     error_message: Optional[str] = None
 
@@ -117,3 +188,31 @@ class RefillStatusResult(BaseModel):
     reason: Optional[str] = None
     error_code: Optional[ToolErrorCode] = None
     error_message: Optional[str] = None
+
+
+class RefillRequestResult(BaseModel):
+    """Result for REFILL_REQUEST action."""
+
+    success: bool
+    prescription: Optional[PrescriptionInfo] = None
+    refills_left: Optional[int] = None
+    message: Optional[str] = None
+    error_code: Optional[ToolErrorCode] = None
+    error_message: Optional[str] = None
+
+
+# --- Composite Schemas ---
+
+
+class MedicationAvailabilityResult(BaseModel):
+    """Result for get_medication_availability (medication + stock + Rx)."""
+
+    success: bool
+    medication: Optional[MedicationInfo] = None
+    inventory: Optional[InventoryInfo] = None
+    has_active_prescription: Optional[bool] = None
+    prescription: Optional[PrescriptionInfo] = None
+    error_code: Optional[ToolErrorCode] = None
+    error_message: Optional[str] = None
+    query: Optional[str] = None
+    suggestions: Optional[list[str]] = None
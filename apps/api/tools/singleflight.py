@@ -0,0 +1,89 @@
+"""Single-flight coalescing of identical concurrent lookups.
+
+When many requests run the same lookup at the same moment, only the first
+(the leader) queries the database; the others await the leader's in-flight
+result. Nothing is kept once the query completes, so results are never
+staler than the query itself.
+"""
+
+import asyncio
+import copy
+import functools
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from apps.api.database import get_db_path
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn, or join an identical call already in flight.
+
+        Followers get a deep copy of the leader's result, so callers can't
+        affect each other through shared mutable rows. If the leader is
+        cancelled, a follower runs the call itself.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            future = self._calls.get(key)
+            if future is None or future.get_loop() is not loop:
+                break
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller itself was cancelled
+                continue  # leader was cancelled; retry
+            self.shared += 1
+            return copy.deepcopy(result)
+
+        future = loop.create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # retrieved by this caller
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+def single_flight(fn: F) -> F:
+    """
+    Coalesce concurrent calls of a read-only query with the same arguments.
+
+    Calls are keyed by the configured database path and the positional and
+    keyword arguments, which must be hashable. The group is exposed as
+    fn.single_flight for stats.
+    """
+    group = SingleFlight()
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        key = (str(get_db_path()), args, tuple(sorted(kwargs.items())))
+        return await group.do(key, lambda: fn(*args, **kwargs))
+
+    wrapper.single_flight = group  # type: ignore[attr-defined]
+    return wrapper  # type: ignore[return-value]
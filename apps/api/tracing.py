@@ -12,27 +12,50 @@ class ToolCall:
 
     call_id: int
     tool_name: str
-    start_time: float  # perf_counter value
+    start_time: float  # perf_counter value, when the model's call started
     end_time: float | None = None
     status: str = "in_progress"
     error_code: str | None = None
+    served_from: str | None = None  # "memo" / "prefetch" when not executed
+    # When the tool itself ran, after getting a tool slot (see tool_runtime)
+    exec_start: float | None = None
+    exec_end: float | None = None
+
+    def interval(self) -> tuple[float, float] | None:
+        """Get when the tool ran (its whole call if not instrumented)."""
+        if self.exec_start is not None and self.exec_end is not None:
+            return self.exec_start, self.exec_end
+        if self.end_time is None:
+            return None
+        return self.start_time, self.end_time
 
     @property
     def latency_ms(self) -> float | None:
-        """Calculate latency in milliseconds."""
-        if self.end_time is None:
+        """Calculate latency in milliseconds (execution only, without queueing)."""
+        interval = self.interval()
+        if interval is None:
+            return None
+        return (interval[1] - interval[0]) * 1000
+
+    @property
+    def wait_ms(self) -> float | None:
+        """Time spent waiting for a tool slot, in milliseconds."""
+        if self.exec_start is None:
             return None
-        return (self.end_time - self.start_time) * 1000
+        return (self.exec_start - self.start_time) * 1000
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dict for JSON serialization."""
         latency = self.latency_ms
+        wait = self.wait_ms
         return {
             "call_id": self.call_id,
             "tool": self.tool_name,
             "latency_ms": round(latency, 2) if latency is not None else None,
+            "wait_ms": round(wait, 2) if wait is not None else None,
             "status": self.status,
             "error_code": self.error_code,
+            "served_from": self.served_from,
         }
 
 
@@ -45,6 +68,22 @@ class TraceContext:
     user_id: str | None = None
     tool_calls: list[ToolCall] = field(default_factory=list)
     errors: list[dict[str, Any]] = field(default_factory=list)
+    fast_path_hit: bool | None = None  # None when the fast path was not tried
+    fast_path_intent: str | None = None
+    answer_cache_hit: bool | None = None  # None when the request was not cacheable
+    model_tier: str | None = None
+    model: str | None = None
+    prefetch_started: int = 0
+    prefetch_hits: int = 0
+    memo_hits: int = 0
+    history_tokens: int | None = None  # estimated, before windowing
+    prompt_tokens: list[int] = field(default_factory=list)  # estimated, per model call
+    prompt_language: str | None = None  # system prompt variant of the last call
+    input_tokens: list[int] = field(default_factory=list)  # reported, per model call
+    cached_input_tokens: list[int] = field(default_factory=list)  # prompt-cache reads
+    summarized_turns: int = 0
+    deadline_seconds: float | None = None
+    deadline_stage: str | None = None  # stage running when the deadline expired
     _next_call_id: int = field(default=1, repr=False)
 
     def start_tool(self, tool_name: str) -> int:
@@ -74,6 +113,8 @@ class TraceContext:
         call_id: int,
         status: str = "success",
         error_code: str | None = None,
+        served_from: str | None = None,
+        execution: tuple[float, float] | None = None,
     ) -> None:
         """
         Record tool execution end.
@@ -82,14 +123,32 @@ class TraceContext:
             call_id: The call_id returned by start_tool()
             status: "success" or "error"
             error_code: Error code if status is "error"
+            served_from: "memo" or "prefetch" if the result was reused
+            execution: (start, end) perf_counter values of the tool's own
+                run, after it got a tool slot
         """
         for tool_call in self.tool_calls:
             if tool_call.call_id == call_id:
                 tool_call.end_time = time.perf_counter()
                 tool_call.status = status
                 tool_call.error_code = error_code
+                tool_call.served_from = served_from
+                if execution is not None:
+                    tool_call.exec_start, tool_call.exec_end = execution
                 break
 
+    def record_prompt_usage(self, usage: dict[str, Any]) -> None:
+        """
+        Record the token usage the provider reported for a model call.
+
+        Args:
+            usage: LangChain usage metadata (input_tokens and
+                input_token_details.cache_read)
+        """
+        self.input_tokens.append(usage.get("input_tokens", 0))
+        details = usage.get("input_token_details") or {}
+        self.cached_input_tokens.append(details.get("cache_read") or 0)
+
     def add_error(
         self,
         error_code: str,
@@ -118,6 +177,55 @@ class TraceContext:
         """Get ordered list of tool names called."""
         return [tc.tool_name for tc in self.tool_calls]
 
+    def parallelism(self) -> dict[str, Any]:
+        """
+        Summarize how much tool executions overlapped.
+
+        Uses when each tool actually ran (after getting a tool slot), so
+        calls queued behind TOOL_CONCURRENCY don't count as overlapping;
+        calls served from the memo or a prefetch didn't run and are left out.
+
+        Returns:
+            Dict with max_concurrency (most tools running at once),
+            tool_time_ms (sum of tool latencies), tool_wall_ms (time at
+            least one tool was running) and tool_wait_ms (sum of time spent
+            waiting for a tool slot). tool_wall_ms close to tool_time_ms
+            means the tools ran serially.
+        """
+        intervals = sorted(
+            interval
+            for tc in self.tool_calls
+            if tc.served_from is None and (interval := tc.interval()) is not None
+        )
+        # Sweep over start (+1) / end (-1) edges; ends sort before starts
+        # at the same instant so back-to-back calls don't count as overlap
+        edges = sorted(
+            [(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals]
+        )
+        running = max_concurrency = 0
+        for _, delta in edges:
+            running += delta
+            max_concurrency = max(max_concurrency, running)
+
+        wall = 0.0
+        current_start = current_end = None
+        for start, end in intervals:
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    wall += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            wall += current_end - current_start
+
+        return {
+            "max_concurrency": max_concurrency,
+            "tool_time_ms": round(sum(e - s for s, e in intervals) * 1000, 2),
+            "tool_wall_ms": round(wall * 1000, 2),
+            "tool_wait_ms": round(sum(tc.wait_ms or 0.0 for tc in self.tool_calls), 2),
+        }
+
     @property
     def total_latency_ms(self) -> float:
         """Calculate total request latency in milliseconds."""
@@ -135,7 +243,32 @@ class TraceContext:
             "user_id": self.user_id,
             "tools_called": self.tools_called,
             "tool_details": [tc.to_dict() for tc in self.tool_calls],
+            "tool_parallelism": self.parallelism(),
             "total_latency_ms": round(self.total_latency_ms, 2),
             "success": len(self.errors) == 0,
             "errors": self.errors if self.errors else None,
+            "answer_cache_hit": self.answer_cache_hit,
+            "model_tier": self.model_tier,
+            "model": self.model,
+            "fast_path_hit": self.fast_path_hit,
+            "fast_path_intent": self.fast_path_intent,
+            "memo_hits": self.memo_hits,
+            "prompt": {
+                "history_tokens": self.history_tokens,
+                "tokens_per_call": self.prompt_tokens,
+                "summarized_turns": self.summarized_turns,
+                "language": self.prompt_language,
+                "input_tokens_per_call": self.input_tokens,
+                "cached_tokens_per_call": self.cached_input_tokens,
+                "cache_hits": sum(1 for tokens in self.cached_input_tokens if tokens > 0),
+            },
+            "deadline": {
+                "timeout_seconds": self.deadline_seconds,
+                "exceeded_stage": self.deadline_stage,
+            },
+            "prefetch": {
+                "started": self.prefetch_started,
+                "hits": self.prefetch_hits,
+                "wasted": self.prefetch_started - self.prefetch_hits,
+            },
         }
@@ -9,6 +9,7 @@
 
 const state = {
     messages: [],
+    conversationId: null, // Set when the server keeps conversation state
     isStreaming: false,
     showToolEvents: false,
 };
@@ -208,6 +209,54 @@ function removeTypingIndicator() {
 // Streaming Handler
 // ========================================
 
+/**
+ * Build the /chat/stream request body.
+ * With a server-side conversation only the new message is sent; otherwise
+ * assistant messages carry back the signed tool results of their turn.
+ */
+function buildRequestBody() {
+    const messages = state.conversationId
+        ? state.messages.slice(-1)
+        : state.messages;
+    const requestBody = {
+        messages: messages.map(m => (m.toolContext
+            ? { role: m.role, content: m.content, tool_context: m.toolContext }
+            : { role: m.role, content: m.content })),
+    };
+    if (state.conversationId) {
+        requestBody.conversation_id = state.conversationId;
+    }
+
+    // Add user identifier if provided
+    const identifier = elements.userIdentifier.value.trim();
+    if (identifier) {
+        requestBody.user_identifier = identifier;
+    }
+    return requestBody;
+}
+
+/**
+ * POST to /chat/stream, falling back to the full history if the server
+ * no longer knows the conversation
+ */
+async function postChat() {
+    const post = () => fetch('/chat/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(buildRequestBody()),
+    });
+
+    let response = await post();
+    if (response.status === 404 && state.conversationId) {
+        state.conversationId = null;
+        response = await post();
+    }
+    if (response.ok) {
+        state.conversationId = response.headers.get('X-Conversation-ID');
+    }
+    return response;
+}
+
 /**
  * Stream chat response from API
  */
@@ -222,26 +271,12 @@ async function streamResponse(userMessage) {
     // Show typing indicator
     showTypingIndicator();
 
-    // Prepare request
-    const requestBody = {
-        messages: state.messages.map(m => ({ role: m.role, content: m.content })),
-    };
-
-    // Add user identifier if provided
-    const identifier = elements.userIdentifier.value.trim();
-    if (identifier) {
-        requestBody.user_identifier = identifier;
-    }
-
     let assistantContent = '';
     let assistantMessageEl = null;
+    let toolContext = null;
 
     try {
-        const response = await fetch('/chat/stream', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(requestBody),
-        });
+        const response = await postChat();
 
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}: ${response.statusText}`);
@@ -271,6 +306,9 @@ async function streamResponse(userMessage) {
                 }
                 scrollToBottom();
             },
+            onToolContext: (token) => {
+                toolContext = token;
+            },
             onToolEvent: (type, data) => {
                 const toolEl = createToolEventElement(type, data);
                 elements.chatMessages.appendChild(toolEl);
@@ -310,7 +348,7 @@ async function streamResponse(userMessage) {
 
         // Save assistant message to state
         if (assistantContent) {
-            state.messages.push({ role: 'assistant', content: assistantContent });
+            state.messages.push({ role: 'assistant', content: assistantContent, toolContext });
         }
 
     } catch (error) {
@@ -345,6 +383,10 @@ function handleStreamEvent(event, callbacks) {
             callbacks.onToolEvent(type, data);
             break;
 
+        case 'tool_context':
+            callbacks.onToolContext(data.token);
+            break;
+
         case 'error':
             callbacks.onError(data.message || 'Unknown error');
             break;
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: how long importing the API takes in a fresh interpreter.
+
+Imports the module with `python -X importtime` a few times, and reports the
+best cumulative import time and the modules with the highest self time. It
+also reports any module that the API is supposed to load lazily (LangGraph,
+the OpenAI client) but that was imported anyway.
+Run with: uv run python scripts/bench_startup.py [--budget-ms 1500] [--json]
+
+Exits with 1 if the import exceeds the budget or loads a deferred module.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Loaded on first use (see apps.api.agent.graph); importing them with the
+# API is a cold start regression
+DEFERRED_MODULES = (
+    "langchain_openai",
+    "openai",
+    "langgraph.graph",
+    "langgraph.prebuilt",
+    "langgraph.checkpoint.sqlite",
+)
+
+
+def profile_import(module: str) -> dict[str, tuple[int, int]]:
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (self, cumulative) import time in microseconds per imported module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="apps.api.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=3, help="Imports to take the best of")
+    parser.add_argument("--budget-ms", type=float, help="Fail above this import time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    runs = [profile_import(args.module) for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda modules: modules[args.module][1])
+    import_ms = best[args.module][1] / 1000
+    slowest = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[: args.top]
+    report = {
+        "module": args.module,
+        "import_ms": round(import_ms, 1),
+        "budget_ms": args.budget_ms,
+        "deferred_loaded": [m for m in DEFERRED_MODULES if m in best],
+        "slowest": [
+            {"module": name, "self_ms": round(self_us / 1000, 1)}
+            for name, (self_us, _) in slowest
+        ],
+    }
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"import {args.module}: {report['import_ms']} ms (best of {len(runs)})")
+        print("Slowest modules (self time):")
+        for entry in report["slowest"]:
+            print(f"  {entry['self_ms']:8.1f} ms  {entry['module']}")
+        if report["deferred_loaded"]:
+            print(f"Deferred modules imported: {', '.join(report['deferred_loaded'])}")
+
+    over_budget = args.budget_ms is not None and import_ms > args.budget_ms
+    return 1 if over_budget or report["deferred_loaded"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
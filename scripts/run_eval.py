@@ -17,6 +17,7 @@ from langchain_openai import ChatOpenAI
 
 from apps.api.agent.graph import get_pharmacy_agent
 from apps.api.config import get_settings
+from apps.api.http_client import close_http_client, openai_client_kwargs
 
 # Test cases: (test_name, user_message, verification_prompt)
 TEST_CASES = [
@@ -94,6 +95,7 @@ async def run_evaluation():
         model="gpt-4.1-nano",  # Use cheaper model for judging
         api_key=settings.openai_api_key,
         temperature=0,
+        **openai_client_kwargs(),
     )
 
     passed = 0
@@ -124,6 +126,8 @@ async def run_evaluation():
 
         print()
 
+    await close_http_client()
+
     # Summary
     print("=" * 60)
     print(f"Results: {passed}/{passed + failed} passed")
@@ -11,8 +11,14 @@ Run: uv run python scripts/seed_db.py
 """
 
 import sqlite3
+import sys
 from pathlib import Path
 
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apps.api.identity import normalize_email, normalize_phone
+
 # Database path (relative to project root)
 DB_PATH = Path(__file__).parent.parent / "data" / "pharmacy.db"
 
@@ -27,8 +33,12 @@ def create_schema(conn: sqlite3.Connection) -> None:
             user_id INTEGER PRIMARY KEY,
             name TEXT NOT NULL,
             phone TEXT UNIQUE,
-            email TEXT UNIQUE
+            email TEXT UNIQUE,
+            email_norm TEXT,  -- lowercased email
+            phone_e164 TEXT   -- phone in E.164 form (+972...)
         );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_norm ON users(email_norm);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_users_phone_e164 ON users(phone_e164);
 
         CREATE TABLE IF NOT EXISTS medications (
             med_id INTEGER PRIMARY KEY,
@@ -44,16 +54,33 @@ def create_schema(conn: sqlite3.Connection) -> None:
         CREATE INDEX IF NOT EXISTS idx_medications_name_en ON medications(name_en);
         CREATE INDEX IF NOT EXISTS idx_medications_name_he ON medications(name_he);
 
+        CREATE TABLE IF NOT EXISTS interactions (
+            med_id_a INTEGER NOT NULL,
+            med_id_b INTEGER NOT NULL,
+            severity TEXT NOT NULL CHECK (severity IN ('minor', 'moderate', 'major')),
+            description_en TEXT NOT NULL,
+            description_he TEXT NOT NULL,
+            PRIMARY KEY (med_id_a, med_id_b),
+            CHECK (med_id_a < med_id_b),
+            FOREIGN KEY (med_id_a) REFERENCES medications(med_id),
+            FOREIGN KEY (med_id_b) REFERENCES medications(med_id)
+        );
+
         CREATE TABLE IF NOT EXISTS prescriptions (
             presc_id INTEGER PRIMARY KEY,
             user_id INTEGER NOT NULL,
             med_id INTEGER NOT NULL,
             refills_left INTEGER NOT NULL DEFAULT 0,
-            status TEXT NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('active', 'completed', 'expired')),
+            expires_at TEXT,  -- UTC 'YYYY-MM-DD HH:MM:SS'; NULL = never expires
             FOREIGN KEY (user_id) REFERENCES users(user_id),
             FOREIGN KEY (med_id) REFERENCES medications(med_id)
         );
         CREATE INDEX IF NOT EXISTS idx_prescriptions_user_id ON prescriptions(user_id);
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_user_status
+            ON prescriptions(user_id, status, presc_id);
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_active_expiry
+            ON prescriptions(expires_at) WHERE status = 'active';
 
         CREATE TABLE IF NOT EXISTS inventory (
             store_id INTEGER NOT NULL DEFAULT 1,
@@ -63,6 +90,42 @@ def create_schema(conn: sqlite3.Connection) -> None:
             PRIMARY KEY (store_id, med_id),
             FOREIGN KEY (med_id) REFERENCES medications(med_id)
         );
+
+        CREATE TABLE IF NOT EXISTS reservations (
+            hold_id TEXT PRIMARY KEY,
+            store_id INTEGER NOT NULL,
+            med_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL CHECK (qty > 0),
+            expires_at REAL NOT NULL,  -- unix epoch seconds
+            FOREIGN KEY (store_id, med_id) REFERENCES inventory(store_id, med_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_reservations_expires_at ON reservations(expires_at);
+
+        -- Bumped by triggers on any catalog or stock change; caches of
+        -- answers derived from this data are keyed by it
+        CREATE TABLE IF NOT EXISTS data_version (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO data_version (name, version) VALUES ('catalog', 0);
+        CREATE TRIGGER IF NOT EXISTS medications_insert_version AFTER INSERT ON medications
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS medications_update_version AFTER UPDATE ON medications
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS medications_delete_version AFTER DELETE ON medications
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS interactions_insert_version AFTER INSERT ON interactions
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS interactions_update_version AFTER UPDATE ON interactions
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS interactions_delete_version AFTER DELETE ON interactions
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS inventory_insert_version AFTER INSERT ON inventory
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS inventory_update_version AFTER UPDATE ON inventory
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS inventory_delete_version AFTER DELETE ON inventory
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
     """
     )
 
@@ -82,8 +145,13 @@ def seed_users(conn: sqlite3.Connection) -> None:
         (10, "Tamar Rosenberg", "050-0123456", "tamar.r@example.com"),
     ]
     conn.executemany(
-        "INSERT OR REPLACE INTO users (user_id, name, phone, email) VALUES (?, ?, ?, ?)",
-        users,
+        """INSERT OR REPLACE INTO users
+           (user_id, name, phone, email, email_norm, phone_e164)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        [
+            (user_id, name, phone, email, normalize_email(email), normalize_phone(phone))
+            for user_id, name, phone, email in users
+        ],
     )
 
 
@@ -157,23 +225,45 @@ def seed_medications(conn: sqlite3.Connection) -> None:
     )
 
 
+def seed_interactions(conn: sqlite3.Connection) -> None:
+    """Seed known interactions between medications (med_id_a < med_id_b)."""
+    interactions = [
+        # (med_id_a, med_id_b, severity, description_en, description_he)
+        (
+            1,
+            4,
+            "moderate",
+            "Ibuprofen (NSAID) may reduce kidney function and increase the risk "
+            "of lactic acidosis with Metformin.",
+            "איבופרופן (נוגד דלקת) עלול לפגוע בתפקוד הכליות ולהגביר את הסיכון "
+            "לחמצת לקטית עם מטפורמין.",
+        ),
+    ]
+    conn.executemany(
+        """INSERT OR REPLACE INTO interactions
+           (med_id_a, med_id_b, severity, description_en, description_he)
+           VALUES (?, ?, ?, ?, ?)""",
+        interactions,
+    )
+
+
 def seed_prescriptions(conn: sqlite3.Connection) -> None:
     """Seed sample prescriptions with varied scenarios."""
     prescriptions = [
-        # (presc_id, user_id, med_id, refills_left, status)
-        (1, 1, 2, 2, "active"),  # David - Amoxicillin, 2 refills
-        (2, 1, 4, 5, "active"),  # David - Metformin, 5 refills
-        (3, 2, 2, 0, "completed"),  # Sarah - Amoxicillin, no refills
-        (4, 3, 4, 3, "active"),  # Michael - Metformin, 3 refills
-        (5, 4, 2, 1, "active"),  # Rachel - Amoxicillin, 1 refill
-        (6, 5, 4, 0, "expired"),  # Yossi - Metformin, expired
-        (7, 6, 2, 4, "active"),  # Noa - Amoxicillin, 4 refills
-        (8, 7, 4, 2, "active"),  # Amit - Metformin, 2 refills
+        # (presc_id, user_id, med_id, refills_left, status, expires_at)
+        (1, 1, 2, 2, "active", "2027-06-30 00:00:00"),  # David - Amoxicillin, 2 refills
+        (2, 1, 4, 5, "active", "2027-12-31 00:00:00"),  # David - Metformin, 5 refills
+        (3, 2, 2, 0, "completed", "2026-03-01 00:00:00"),  # Sarah - Amoxicillin, no refills
+        (4, 3, 4, 3, "active", "2027-09-30 00:00:00"),  # Michael - Metformin, 3 refills
+        (5, 4, 2, 1, "active", "2027-03-31 00:00:00"),  # Rachel - Amoxicillin, 1 refill
+        (6, 5, 4, 0, "expired", "2025-12-31 00:00:00"),  # Yossi - Metformin, expired
+        (7, 6, 2, 4, "active", "2027-06-30 00:00:00"),  # Noa - Amoxicillin, 4 refills
+        (8, 7, 4, 2, "active", "2027-12-31 00:00:00"),  # Amit - Metformin, 2 refills
     ]
     conn.executemany(
         """INSERT OR REPLACE INTO prescriptions
-           (presc_id, user_id, med_id, refills_left, status)
-           VALUES (?, ?, ?, ?, ?)""",
+           (presc_id, user_id, med_id, refills_left, status, expires_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
         prescriptions,
     )
 
@@ -218,6 +308,9 @@ def main() -> None:
         seed_medications(conn)
         print("Seeded 5 medications.")
 
+        seed_interactions(conn)
+        print("Seeded 1 medication interaction.")
+
         seed_prescriptions(conn)
         print("Seeded 8 prescriptions.")
 
@@ -0,0 +1,274 @@
+"""Shared fixtures: a seeded temporary database for tool, agent and API tests."""
+
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from apps.api.identity import normalize_email, normalize_phone
+
+
+def create_test_schema(conn: sqlite3.Connection) -> None:
+    """Create database schema for testing."""
+    conn.executescript(
+        """
+        PRAGMA foreign_keys = ON;
+
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone TEXT UNIQUE,
+            email TEXT UNIQUE,
+            email_norm TEXT,  -- lowercased email
+            phone_e164 TEXT   -- phone in E.164 form (+972...)
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_norm ON users(email_norm);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_users_phone_e164 ON users(phone_e164);
+
+        CREATE TABLE IF NOT EXISTS medications (
+            med_id INTEGER PRIMARY KEY,
+            name_en TEXT NOT NULL,
+            name_he TEXT NOT NULL,
+            active_ingredients TEXT,
+            dosage_en TEXT,
+            dosage_he TEXT,
+            rx_required INTEGER NOT NULL CHECK (rx_required IN (0,1)),
+            warnings_en TEXT,
+            warnings_he TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_medications_name_en ON medications(name_en);
+        CREATE INDEX IF NOT EXISTS idx_medications_name_he ON medications(name_he);
+
+        CREATE TABLE IF NOT EXISTS interactions (
+            med_id_a INTEGER NOT NULL,
+            med_id_b INTEGER NOT NULL,
+            severity TEXT NOT NULL CHECK (severity IN ('minor', 'moderate', 'major')),
+            description_en TEXT NOT NULL,
+            description_he TEXT NOT NULL,
+            PRIMARY KEY (med_id_a, med_id_b),
+            CHECK (med_id_a < med_id_b),
+            FOREIGN KEY (med_id_a) REFERENCES medications(med_id),
+            FOREIGN KEY (med_id_b) REFERENCES medications(med_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS prescriptions (
+            presc_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            med_id INTEGER NOT NULL,
+            refills_left INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL CHECK (status IN ('active', 'completed', 'expired')),
+            expires_at TEXT,  -- UTC 'YYYY-MM-DD HH:MM:SS'; NULL = never expires
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (med_id) REFERENCES medications(med_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_user_id ON prescriptions(user_id);
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_user_status
+            ON prescriptions(user_id, status, presc_id);
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_active_expiry
+            ON prescriptions(expires_at) WHERE status = 'active';
+
+        CREATE TABLE IF NOT EXISTS inventory (
+            store_id INTEGER NOT NULL DEFAULT 1,
+            med_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL DEFAULT 0,
+            restock_eta TEXT,
+            PRIMARY KEY (store_id, med_id),
+            FOREIGN KEY (med_id) REFERENCES medications(med_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS reservations (
+            hold_id TEXT PRIMARY KEY,
+            store_id INTEGER NOT NULL,
+            med_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL CHECK (qty > 0),
+            expires_at REAL NOT NULL,  -- unix epoch seconds
+            FOREIGN KEY (store_id, med_id) REFERENCES inventory(store_id, med_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_reservations_expires_at ON reservations(expires_at);
+
+        -- Bumped by triggers on any catalog or stock change; caches of
+        -- answers derived from this data are keyed by it
+        CREATE TABLE IF NOT EXISTS data_version (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO data_version (name, version) VALUES ('catalog', 0);
+        CREATE TRIGGER IF NOT EXISTS medications_insert_version AFTER INSERT ON medications
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS medications_update_version AFTER UPDATE ON medications
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS medications_delete_version AFTER DELETE ON medications
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS interactions_insert_version AFTER INSERT ON interactions
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS interactions_update_version AFTER UPDATE ON interactions
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS interactions_delete_version AFTER DELETE ON interactions
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS inventory_insert_version AFTER INSERT ON inventory
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS inventory_update_version AFTER UPDATE ON inventory
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+        CREATE TRIGGER IF NOT EXISTS inventory_delete_version AFTER DELETE ON inventory
+        BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+    """
+    )
+
+
+def seed_test_data(conn: sqlite3.Connection) -> None:
+    """Seed test data."""
+    # Users
+    users = [
+        (1, "David Cohen", "050-1234567", "david.cohen@example.com"),
+        (2, "Sarah Levi", "052-2345678", "sarah.levi@example.com"),
+        (3, "Michael Ben-Ari", "054-3456789", "michael.benari@example.com"),
+        (4, "Rachel Mizrachi", "050-4567890", "rachel.m@example.com"),  # No Rx
+    ]
+    conn.executemany(
+        """INSERT INTO users
+           (user_id, name, phone, email, email_norm, phone_e164)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        [
+            (user_id, name, phone, email, normalize_email(email), normalize_phone(phone))
+            for user_id, name, phone, email in users
+        ],
+    )
+
+    # Medications
+    medications = [
+        (
+            1,
+            "Ibuprofen",
+            "איבופרופן",
+            "Ibuprofen",
+            "Take 200-400mg every 4-6 hours as needed.",
+            "קח 200-400 מ״ג כל 4-6 שעות לפי הצורך.",
+            0,
+            "Do not use if allergic to NSAIDs.",
+            "אין להשתמש אם יש רגישות לתרופות נוגדות דלקת.",
+        ),
+        (
+            2,
+            "Amoxicillin",
+            "אמוקסיצילין",
+            "Amoxicillin (as trihydrate)",
+            "Take 500mg every 8 hours for 7-10 days.",
+            "קח 500 מ״ג כל 8 שעות למשך 7-10 ימים.",
+            1,
+            "May cause allergic reactions.",
+            "עלול לגרום לתגובות אלרגיות.",
+        ),
+        (
+            3,
+            "Cetirizine",
+            "צטיריזין",
+            "Cetirizine hydrochloride",
+            "Take 10mg once daily.",
+            "קח 10 מ״ג פעם ביום.",
+            0,
+            "Avoid driving if drowsy.",
+            "להימנע מנהיגה אם מרגישים עייפות.",
+        ),
+    ]
+    conn.executemany(
+        """INSERT INTO medications
+           (med_id, name_en, name_he, active_ingredients, dosage_en, dosage_he,
+            rx_required, warnings_en, warnings_he)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        medications,
+    )
+
+    # Interactions (synthetic, for testing)
+    interactions = [
+        (1, 2, "moderate", "Test interaction EN.", "אינטראקציה לבדיקה."),
+        (2, 3, "minor", "Minor test interaction EN.", "אינטראקציה קלה לבדיקה."),
+    ]
+    conn.executemany(
+        """INSERT INTO interactions
+           (med_id_a, med_id_b, severity, description_en, description_he)
+           VALUES (?, ?, ?, ?, ?)""",
+        interactions,
+    )
+
+    # Prescriptions
+    prescriptions = [
+        (1, 1, 2, 2, "active", "2099-01-01 00:00:00"),  # David - Amoxicillin, 2 refills
+        (2, 1, 1, 0, "completed", None),  # David - Ibuprofen, no refills, completed
+        (3, 2, 2, 0, "completed", None),  # Sarah - Amoxicillin, no refills
+        (4, 3, 2, 3, "active", None),  # Michael - Amoxicillin, 3 refills
+        (5, 2, 1, 0, "expired", "2024-01-01 00:00:00"),  # Sarah - Ibuprofen, expired
+    ]
+    conn.executemany(
+        """INSERT INTO prescriptions
+           (presc_id, user_id, med_id, refills_left, status, expires_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        prescriptions,
+    )
+
+    # Inventory
+    inventory = [
+        (1, 1, 150, None),  # Ibuprofen - in stock
+        (1, 2, 0, "2025-01-15"),  # Amoxicillin - out of stock, ETA
+        (1, 3, 200, None),  # Cetirizine - in stock
+    ]
+    conn.executemany(
+        """INSERT INTO inventory
+           (store_id, med_id, qty, restock_eta)
+           VALUES (?, ?, ?, ?)""",
+        inventory,
+    )
+
+
+@pytest.fixture(scope="function")
+def test_db():
+    """Create a temporary test database with seeded data."""
+    # Create temp file
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    # Create and seed database
+    conn = sqlite3.connect(db_path)
+    try:
+        create_test_schema(conn)
+        seed_test_data(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Set environment variable for database path
+    old_db_path = os.environ.get("DB_PATH")
+    os.environ["DB_PATH"] = db_path
+
+    # Clear cached settings to pick up new DB_PATH
+    from apps.api.config import get_settings
+
+    get_settings.cache_clear()
+
+    yield db_path
+
+    # Cleanup
+    if old_db_path:
+        os.environ["DB_PATH"] = old_db_path
+    else:
+        os.environ.pop("DB_PATH", None)
+
+    get_settings.cache_clear()
+
+    # Drop cached user rows, catalogs and any reservation holds placed
+    # during the test
+    from apps.api.identity import get_user_cache
+    from apps.api.tools.catalog import invalidate_medication_catalog
+    from apps.api.tools.interactions import invalidate_interaction_index
+
+    get_user_cache().clear()
+    invalidate_medication_catalog()
+    invalidate_interaction_index()
+
+    from apps.api.tools.holds import get_hold_registry
+
+    get_hold_registry().clear()
+
+    # Remove temp database
+    Path(db_path).unlink(missing_ok=True)
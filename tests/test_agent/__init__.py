@@ -0,0 +1 @@
+"""Agent orchestration tests."""
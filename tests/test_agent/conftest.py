@@ -0,0 +1,89 @@
+"""Shared fixtures for agent tests."""
+
+import json
+from typing import Any
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from apps.api.agent.answer_cache import get_answer_cache
+from apps.api.config import get_settings
+
+
+@pytest.fixture(autouse=True)
+def clear_answer_cache():
+    """Keep recorded answers from leaking between tests."""
+    get_answer_cache().clear()
+    yield
+    get_answer_cache().clear()
+
+
+@pytest.fixture
+def fast_path_enabled(monkeypatch):
+    """The fast path is opt-in."""
+    monkeypatch.setenv("FAST_PATH_ENABLED", "true")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+class FakeToolCallingModel(GenericFakeChatModel):
+    """Fake chat model that replays scripted AIMessages and accepts bind_tools."""
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeToolCallingModel":
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages, stop=stop, **kwargs).generations[0].message
+        if not message.tool_calls:
+            # Text-only: stream word by word like the parent class
+            for token in str(message.content).split(" "):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": tc["name"],
+                        "args": json.dumps(tc["args"]),
+                        "id": tc["id"],
+                        "index": i,
+                        "type": "tool_call_chunk",
+                    }
+                    for i, tc in enumerate(message.tool_calls)
+                ],
+            )
+        )
+
+
+class RecordingModel(FakeToolCallingModel):
+    """Fake model that also records the prompt of every call."""
+
+    prompts: list = []
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def tool_call_message(*calls: tuple[str, dict]) -> AIMessage:
+    """Build an AIMessage requesting the given (tool name, args) calls."""
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": name, "args": args, "id": f"call_{i}", "type": "tool_call"}
+            for i, (name, args) in enumerate(calls)
+        ],
+    )
+
+
+def parse_sse(events: list[str]) -> list[dict]:
+    """Parse SSE 'data:' lines into payload dicts."""
+    return [json.loads(e.removeprefix("data: ").strip()) for e in events]
@@ -0,0 +1,176 @@
+"""Tests for the whole-turn answer cache."""
+
+import sqlite3
+
+import pytest
+
+from apps.api.agent.answer_cache import answer_cache_key, get_answer_cache
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import _is_recordable, format_sse_event, stream_agent_response
+from apps.api.config import get_settings
+from apps.api.schemas import StreamEventType
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tools.holds import get_hold_registry
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+# Not a fast path match, so the agent runs
+QUESTION = "Should I take Ibuprofen with food?"
+
+
+def _agent():
+    """Build an agent that can answer exactly one turn."""
+    model = FakeToolCallingModel(
+        messages=iter(
+            [
+                tool_call_message(("get_medication_by_name", {"medication_name": "Ibuprofen"})),
+                "Yes, take it with food.",
+            ]
+        )
+    )
+    return build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+
+async def _run(agent, messages, user_identifier=None) -> tuple[TraceContext, list[str]]:
+    trace_ctx = TraceContext()
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            messages=messages,
+            trace_ctx=trace_ctx,
+            user_identifier=user_identifier,
+        )
+    ]
+    return trace_ctx, events
+
+
+def _ask(text: str = QUESTION) -> list[dict]:
+    return [{"role": "user", "content": text}]
+
+
+@pytest.mark.asyncio
+async def test_repeated_question_is_replayed(test_db):
+    """Test a repeat question replays the recorded stream without the agent."""
+    agent = _agent()
+    first_trace, first = await _run(agent, _ask())
+    # The fake model has no responses left, so only a replay can succeed
+    second_trace, second = await _run(agent, _ask("  should I take IBUPROFEN   with food? "))
+
+    assert second == first
+    types = [e["type"] for e in parse_sse(second)]
+    assert types[:2] == ["tool_call", "tool_result"]
+    assert types[-1] == "done"
+    assert first_trace.answer_cache_hit is False
+    assert second_trace.answer_cache_hit is True
+    assert second_trace.tool_calls == []
+
+
+@pytest.mark.asyncio
+async def test_identified_and_multi_turn_requests_are_not_cached(test_db):
+    """Test only anonymous single-message conversations are cacheable."""
+    assert await answer_cache_key(_ask(), user_identifier="david.cohen@example.com") is None
+    assert (
+        await answer_cache_key(
+            [
+                {"role": "user", "content": QUESTION},
+                {"role": "assistant", "content": "Yes."},
+                {"role": "user", "content": QUESTION},
+            ]
+        )
+        is None
+    )
+
+    trace_ctx, _ = await _run(_agent(), _ask(), user_identifier="david.cohen@example.com")
+    assert trace_ctx.answer_cache_hit is None
+    assert len(get_answer_cache()) == 0
+
+
+@pytest.mark.asyncio
+async def test_inventory_change_invalidates(test_db):
+    """Test a stock update in the database moves to a fresh entry."""
+    await _run(_agent(), _ask())
+
+    conn = sqlite3.connect(test_db)
+    conn.execute("UPDATE inventory SET qty = 10 WHERE med_id = 1")
+    conn.commit()
+    conn.close()
+
+    trace_ctx, _ = await _run(_agent(), _ask())
+    assert trace_ctx.answer_cache_hit is False
+
+
+@pytest.mark.asyncio
+async def test_reservation_hold_invalidates(test_db):
+    """Test placing a hold changes the key so held stock is reflected."""
+    before = await answer_cache_key(_ask())
+    get_hold_registry().try_hold(1, 1, qty=1, stock_qty=150, ttl_seconds=60)
+
+    assert await answer_cache_key(_ask()) != before
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(test_db):
+    """Test a turn that ended in an error is not recorded."""
+    agent = build_agent_graph(model=FakeToolCallingModel(messages=iter([])), tools=PHARMACY_TOOLS)
+    _, events = await _run(agent, _ask())
+
+    assert "error" in [e["type"] for e in parse_sse(events)]
+    assert len(get_answer_cache()) == 0
+
+
+@pytest.mark.asyncio
+async def test_disabled(test_db, monkeypatch):
+    """Test ANSWER_CACHE_ENABLED=false bypasses the cache."""
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+
+    trace_ctx, _ = await _run(_agent(), _ask())
+
+    assert trace_ctx.answer_cache_hit is None
+    assert len(get_answer_cache()) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "tool_call",
+    [
+        ("prescription_management", {"action": "LIST", "identifier": "david.cohen@example.com"}),
+        ("reserve_medication", {"medication_name": "Ibuprofen", "quantity": 1}),
+        ("check_drug_interactions", {"medication_name": "Ibuprofen"}),
+        (
+            "get_medication_availability",
+            {"medication_name": "Amoxicillin", "user_identifier": "david.cohen@example.com"},
+        ),
+    ],
+)
+async def test_user_data_turns_are_not_cached(test_db, tool_call):
+    """Test turns that read or write a user's data are never recorded."""
+    model = FakeToolCallingModel(messages=iter([tool_call_message(tool_call), "Done."]))
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+    trace_ctx, _ = await _run(agent, _ask("Refill prescription 12 for david.cohen@example.com"))
+
+    assert trace_ctx.answer_cache_hit is False
+    assert len(get_answer_cache()) == 0
+
+
+def test_prescription_fields_make_turn_unrecordable():
+    """Test a cacheable tool's result carrying prescription data is not recorded."""
+    call = format_sse_event(
+        StreamEventType.TOOL_CALL,
+        {"tool": "get_medication_availability", "input": {"medication_name": "Amoxicillin"}},
+    )
+
+    def result(**fields):
+        return format_sse_event(
+            StreamEventType.TOOL_RESULT,
+            {
+                "tool": "get_medication_availability",
+                "result": {"success": True, "has_active_prescription": None, **fields},
+            },
+        )
+
+    assert _is_recordable([call, result()])
+    assert not _is_recordable([call, result(has_active_prescription=False)])
+    assert not _is_recordable([call, result(prescription={"prescription_id": 1})])
@@ -0,0 +1,104 @@
+"""Tests for concurrent tool execution within one agent step."""
+
+import asyncio
+import time
+
+import pytest
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.config import get_settings
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tools import inventory as inventory_module
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+TOOL_DELAY = 0.3
+
+
+@pytest.fixture
+def slow_inventory(monkeypatch):
+    """Make every inventory query take TOOL_DELAY seconds."""
+    get_row = inventory_module._get_inventory_row
+
+    async def slow_get_row(med_id, store_id):
+        await asyncio.sleep(TOOL_DELAY)
+        return await get_row(med_id, store_id)
+
+    monkeypatch.setattr(inventory_module, "_get_inventory_row", slow_get_row)
+
+
+async def _run_two_inventory_checks() -> tuple[float, TraceContext, list[dict]]:
+    model = FakeToolCallingModel(
+        messages=iter(
+            [
+                tool_call_message(
+                    ("check_inventory", {"medication_id": 1}),
+                    ("check_inventory", {"medication_id": 3}),
+                ),
+                "Both are in stock.",
+            ]
+        )
+    )
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+    trace_ctx = TraceContext()
+
+    start = time.perf_counter()
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            messages=[{"role": "user", "content": "Check stock for two medications"}],
+            trace_ctx=trace_ctx,
+        )
+    ]
+    return time.perf_counter() - start, trace_ctx, parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_in_one_step_run_concurrently(test_db, slow_inventory):
+    """Test wall time is close to max(tool latency), not the sum."""
+    elapsed, trace_ctx, events = await _run_two_inventory_checks()
+
+    results = [e["data"]["result"] for e in events if e["type"] == "tool_result"]
+    assert [r["success"] for r in results] == [True, True]
+
+    assert elapsed < TOOL_DELAY * 1.5
+    parallelism = trace_ctx.parallelism()
+    assert parallelism["max_concurrency"] == 2
+    assert parallelism["tool_wall_ms"] < parallelism["tool_time_ms"] * 0.75
+
+
+@pytest.mark.asyncio
+async def test_tool_concurrency_cap(test_db, slow_inventory, monkeypatch):
+    """Test TOOL_CONCURRENCY=1 serializes the calls."""
+    monkeypatch.setenv("TOOL_CONCURRENCY", "1")
+    get_settings.cache_clear()
+
+    elapsed, trace_ctx, _ = await _run_two_inventory_checks()
+
+    assert elapsed >= TOOL_DELAY * 2
+    # Both calls start together but the second waits for a free slot
+    parallelism = trace_ctx.parallelism()
+    assert parallelism["max_concurrency"] == 1
+    assert parallelism["tool_wall_ms"] >= TOOL_DELAY * 2 * 1000 * 0.9
+    assert parallelism["tool_wait_ms"] >= TOOL_DELAY * 1000 * 0.9
+    assert all(tc.latency_ms < TOOL_DELAY * 1000 * 1.5 for tc in trace_ctx.tool_calls)
+
+
+def test_parallelism_summary():
+    """Test overlap accounting from recorded tool intervals."""
+    trace_ctx = TraceContext()
+    for start, end in [(0.0, 1.0), (0.5, 1.5), (2.0, 3.0)]:
+        call_id = trace_ctx.start_tool("tool")
+        trace_ctx.tool_calls[-1].start_time = start
+        trace_ctx.end_tool(call_id)
+        trace_ctx.tool_calls[-1].end_time = end
+
+    assert trace_ctx.parallelism() == {
+        "max_concurrency": 2,
+        "tool_time_ms": 3000.0,
+        "tool_wall_ms": 2500.0,
+        "tool_wait_ms": 0.0,
+    }
+    assert trace_ctx.to_summary_dict()["tool_parallelism"]["max_concurrency"] == 2
@@ -0,0 +1,213 @@
+"""Tests for server-side conversation state (stateful mode)."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from apps.api.agent.conversations import (
+    close_conversation_store,
+    conversation_config,
+    conversation_exists,
+    conversation_owned_by,
+    conversation_tail,
+    create_conversation,
+    new_conversation_id,
+    open_conversation_store,
+    prune_conversations,
+    touch_conversation,
+)
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.tiers import ModelTier, classify_tier
+from apps.api.main import app
+from apps.api.main import settings as app_settings
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.tools import PHARMACY_TOOLS
+from tests.test_agent.conftest import (
+    FakeToolCallingModel,
+    RecordingModel,
+    parse_sse,
+    tool_call_message,
+)
+
+USER = {"user_id": 1, "name": "David Cohen"}
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    """Open a conversation store in a temporary file."""
+    saver = await open_conversation_store(str(tmp_path / "conversations.db"))
+    yield saver
+    await close_conversation_store()
+
+
+async def _turn(agent, text, conversation_id, resume, user=None) -> list[dict]:
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            messages=[{"role": "user", "content": text}],
+            user=user,
+            user_identifier="david.cohen@example.com" if user else None,
+            conversation_id=conversation_id,
+            resume=resume,
+        )
+    ]
+    return parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_follow_up_resumes_from_checkpoint(test_db, store):
+    """Test a follow-up sends only the new message and sees earlier tool results."""
+    model = RecordingModel(
+        messages=iter(
+            [
+                tool_call_message(("check_inventory", {"medication_id": 3})),
+                "Cetirizine is in stock.",
+                "You're welcome.",
+            ]
+        ),
+        prompts=[],
+    )
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS, checkpointer=store)
+    conversation_id = new_conversation_id()
+
+    assert not await conversation_exists(conversation_id)
+    await _turn(agent, "Can you check stock for medication 3?", conversation_id, False)
+    assert await conversation_exists(conversation_id)
+    events = await _turn(agent, "Thanks a lot", conversation_id, True)
+
+    assert events[-1]["type"] == "done"
+    prompt = model.prompts[-1]
+    assert any(isinstance(m, ToolMessage) for m in prompt)
+    assert [m.content for m in prompt if isinstance(m, HumanMessage)] == [
+        "Can you check stock for medication 3?",
+        "Thanks a lot",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fast_path_turn_is_saved(test_db, store, fast_path_enabled):
+    """Test answers served without the graph are appended to the conversation."""
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter([])), tools=PHARMACY_TOOLS, checkpointer=store
+    )
+    conversation_id = new_conversation_id()
+
+    events = await _turn(agent, "Is Ibuprofen in stock?", conversation_id, False)
+    assert [e["type"] for e in events][:2] == ["tool_call", "tool_result"]
+
+    state = await agent.aget_state(conversation_config(conversation_id))
+    messages = state.values["messages"]
+    assert isinstance(messages[0], HumanMessage)
+    assert messages[1].tool_calls[0]["name"] == events[0]["data"]["tool"]
+    assert isinstance(messages[2], ToolMessage)
+    assert messages[2].tool_call_id == messages[1].tool_calls[0]["id"]
+    assert isinstance(messages[3], AIMessage)
+    assert messages[3].content == events[2]["data"]["text"]
+
+
+@pytest.mark.asyncio
+async def test_resumed_turn_skips_fast_path(test_db, store, fast_path_enabled):
+    """Test a resumed conversation's lookup goes to the agent, which sees the history."""
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter(["Hi.", "Yes, it is."])),
+        tools=PHARMACY_TOOLS,
+        checkpointer=store,
+    )
+    conversation_id = new_conversation_id()
+
+    await _turn(agent, "Hello there", conversation_id, False)
+    events = await _turn(agent, "Is Ibuprofen in stock?", conversation_id, True)
+
+    assert "tool_call" not in [e["type"] for e in events]
+    text = "".join(e["data"]["text"] for e in events if e["type"] == "token")
+    assert text.strip() == "Yes, it is."
+
+
+@pytest.mark.asyncio
+async def test_user_context_is_not_checkpointed(test_db, store):
+    """Test the user context reaches the model but not the saved state."""
+    model = RecordingModel(messages=iter(["Hello David."]), prompts=[])
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS, checkpointer=store)
+    conversation_id = new_conversation_id()
+
+    await _turn(agent, "Hello there", conversation_id, False, user=USER)
+
+    system_prompts = [m.content for m in model.prompts[0] if isinstance(m, SystemMessage)]
+    assert any("David Cohen" in p for p in system_prompts)
+    state = await agent.aget_state(conversation_config(conversation_id))
+    assert not any(isinstance(m, SystemMessage) for m in state.values["messages"])
+
+
+@pytest.mark.asyncio
+async def test_conversation_bound_to_its_user(store):
+    """Test only the user who started a conversation can resume it."""
+    owned = await create_conversation(USER["user_id"])
+    anonymous = await create_conversation(None)
+
+    assert await conversation_owned_by(owned, USER["user_id"])
+    assert not await conversation_owned_by(owned, None)
+    assert not await conversation_owned_by(owned, 2)
+    assert await conversation_owned_by(anonymous, None)
+    assert not await conversation_owned_by(anonymous, USER["user_id"])
+    assert not await conversation_owned_by(new_conversation_id(), None)
+
+
+@pytest.mark.asyncio
+async def test_unused_conversations_are_pruned(test_db, store):
+    """Test conversations past the TTL lose their state and owner, recent ones stay."""
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter(["Hi."])), tools=PHARMACY_TOOLS, checkpointer=store
+    )
+    old = await create_conversation(None)
+    await _turn(agent, "Hello there", old, False)
+    resumed = await create_conversation(None)
+    await asyncio.sleep(0.1)
+    recent = await create_conversation(None)
+    await touch_conversation(resumed)
+    assert await conversation_exists(old)
+
+    assert await prune_conversations(max_age_seconds=0.05) == 1
+
+    assert not await conversation_exists(old)
+    assert not await conversation_owned_by(old, None)
+    assert await conversation_owned_by(resumed, None)
+    assert await conversation_owned_by(recent, None)
+
+
+@pytest.mark.asyncio
+async def test_resume_by_other_user_is_not_found(test_db, store, monkeypatch):
+    """Test resuming someone else's conversation returns 404."""
+    monkeypatch.setattr(app_settings, "conversation_state_enabled", True)
+    conversation_id = await create_conversation(USER["user_id"])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/chat/stream",
+            json={
+                "messages": [{"role": "user", "content": "Show my prescriptions"}],
+                "conversation_id": conversation_id,
+            },
+        )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_resumed_confirmation_uses_large_tier(test_db, store):
+    """Test a stateful "yes" is routed with the question it answers."""
+    model = FakeToolCallingModel(
+        messages=iter(["You have an eligible refill for Lisinopril. Submit it?"])
+    )
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS, checkpointer=store)
+    conversation_id = new_conversation_id()
+    await _turn(agent, "Check my prescriptions", conversation_id, False)
+
+    new_turn = [{"role": "user", "content": "Yes please"}]
+    assert classify_tier(new_turn, small_max_words=20) == ModelTier.SMALL
+    tail = await conversation_tail(conversation_id)
+    assert classify_tier(tail + new_turn, small_max_words=20) == ModelTier.LARGE
+    assert await conversation_tail(new_conversation_id()) == []
@@ -0,0 +1,131 @@
+"""Tests for the per-request deadline."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    deadline_scope,
+    remaining_budget,
+    run_within_deadline,
+)
+from apps.api.main import app
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tools import inventory as inventory_module
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+# Not a fast path match, so the agent runs
+QUESTION = "Should I take Ibuprofen with food?"
+
+
+class StallingModel(FakeToolCallingModel):
+    """Fake model that streams a few words and then stalls."""
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for token in ["Ibuprofen ", "is "]:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        await asyncio.sleep(10)
+
+
+async def _run(agent, timeout: float) -> tuple[TraceContext, list[dict]]:
+    trace_ctx = TraceContext()
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent,
+            [{"role": "user", "content": QUESTION}],
+            trace_ctx=trace_ctx,
+            deadline=Deadline(timeout),
+        )
+    ]
+    return trace_ctx, parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_run_within_deadline():
+    """Test work is bounded only inside a deadline scope."""
+    assert remaining_budget() is None
+    assert await run_within_deadline(asyncio.sleep(0.01, result=1), "work") == 1
+
+    with deadline_scope(Deadline(0.05)):
+        assert 0 < remaining_budget() <= 0.05
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            await run_within_deadline(asyncio.sleep(1), "work")
+    assert exc_info.value.stage == "work"
+
+
+@pytest.mark.asyncio
+async def test_stalled_model_returns_partial_answer(test_db):
+    """Test a stalled model call ends the stream with the text so far."""
+    agent = build_agent_graph(model=StallingModel(messages=iter(["unused"])), tools=PHARMACY_TOOLS)
+
+    trace_ctx, events = await _run(agent, timeout=0.2)
+
+    assert [e["type"] for e in events][-2:] == ["error", "done"]
+    error = events[-2]["data"]
+    assert error["code"] == "DEADLINE_EXCEEDED"
+    assert error["stage"] == "llm"
+    assert error["partial_answer"] == "Ibuprofen is "
+    assert trace_ctx.to_summary_dict()["deadline"] == {
+        "timeout_seconds": 0.2,
+        "exceeded_stage": "llm",
+    }
+
+
+@pytest.mark.asyncio
+async def test_slow_tool_exceeds_deadline(test_db, monkeypatch):
+    """Test the tool running at expiry is reported as the stage."""
+
+    async def stuck_get_row(med_id, store_id):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(inventory_module, "_get_inventory_row", stuck_get_row)
+    model = FakeToolCallingModel(
+        messages=iter([tool_call_message(("check_inventory", {"medication_id": 1}))])
+    )
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+    trace_ctx, events = await _run(agent, timeout=0.2)
+
+    assert events[-2]["data"]["stage"] == "tool:check_inventory"
+    assert trace_ctx.deadline_stage == "tool:check_inventory"
+    assert trace_ctx.errors[0]["error_code"] == "DEADLINE_EXCEEDED"
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_header(test_db):
+    """Test X-Request-Timeout sets the deadline, capped by the max."""
+    deadlines = []
+
+    def fake_stream(*args, deadline=None, **kwargs):
+        deadlines.append(deadline)
+
+        async def events():
+            yield 'data: {"type": "done", "data": {}}\n\n'
+
+        return events()
+
+    with patch("apps.api.main.stream_agent_response", side_effect=fake_stream):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            body = {"messages": [{"role": "user", "content": "Hello"}]}
+            await client.post("/chat/stream", json=body)
+            await client.post("/chat/stream", json=body, headers={"X-Request-Timeout": "5"})
+            await client.post("/chat/stream", json=body, headers={"X-Request-Timeout": "9999"})
+            response = await client.post(
+                "/chat/stream", json=body, headers={"X-Request-Timeout": "-1"}
+            )
+
+    assert [d.timeout_seconds for d in deadlines] == [60, 5, 300]
+    assert response.status_code == 422
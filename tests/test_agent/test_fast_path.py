@@ -0,0 +1,173 @@
+"""Tests for the deterministic fast path."""
+
+import pytest
+
+from apps.api.agent.fast_path import (
+    FastPathIntent,
+    classify,
+    get_fast_path_stats,
+    keyword_pattern,
+)
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tools.catalog import CatalogEntry, MedicationCatalog
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse
+
+CATALOG = MedicationCatalog(
+    [
+        {"med_id": 1, "name_en": "Ibuprofen", "name_he": "איבופרופן"},
+        {"med_id": 2, "name_en": "Amoxicillin", "name_he": "אמוקסיצילין"},
+        {"med_id": 3, "name_en": "Cetirizine", "name_he": "צטיריזין"},
+    ]
+)
+
+
+def _classify(text: str):
+    return classify(text, CATALOG.find(text))
+
+
+pytestmark = pytest.mark.usefixtures("fast_path_enabled")
+
+
+def test_catalog_finds_names_case_insensitive_and_with_hebrew_prefix():
+    """Test name matching in English and Hebrew (with an attached prefix)."""
+    assert [e.med_id for e in CATALOG.find("is IBUPROFEN in stock?")] == [1]
+    assert [e.med_id for e in CATALOG.find("יש לכם את האיבופרופן?")] == [1]
+    assert CATALOG.find("ibuprofenx") == []
+    assert [e.med_id for e in CATALOG.find("Ibuprofen, Cetirizine")] == [1, 3]
+
+
+@pytest.mark.parametrize(
+    "text, intent, language",
+    [
+        ("Is Ibuprofen in stock?", FastPathIntent.INVENTORY, "en"),
+        ("Do you have cetirizine?", FastPathIntent.INVENTORY, "en"),
+        ("Tell me about Amoxicillin", FastPathIntent.MEDICATION_INFO, "en"),
+        ("What is the dosage of Ibuprofen?", FastPathIntent.MEDICATION_INFO, "en"),
+        ("יש לכם איבופרופן במלאי?", FastPathIntent.INVENTORY, "he"),
+        ("ספר לי על צטיריזין", FastPathIntent.MEDICATION_INFO, "he"),
+    ],
+)
+def test_classify_simple_lookups(text, intent, language):
+    """Test that simple lookups are classified confidently."""
+    match = _classify(text)
+
+    assert match is not None
+    assert match.intent == intent
+    assert match.language == language
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Should I take Ibuprofen for a headache?",
+        "What is Ibuprofen used for?",
+        "Is Ibuprofen in stock and what is the dosage?",
+        "Do you have Ibuprofen or Cetirizine?",
+        "Ibuprofen",
+        "Is it in stock?",
+        "Can I refill my Amoxicillin prescription?",
+        "כדאי לי לקחת איבופרופן?",
+    ],
+)
+def test_classify_falls_through(text):
+    """Test that ambiguous or advice-seeking messages fall through."""
+    assert _classify(text) is None
+
+
+def test_keyword_pattern_prefixes():
+    """Test Hebrew prefixes are allowed only when asked for."""
+    assert keyword_pattern("מינון").search("מה המינון?")
+    assert keyword_pattern("לא").search("מלא")
+    assert not keyword_pattern("לא", prefixed=False).search("יש מלאי מלא?")
+    assert not keyword_pattern("עם", "או", prefixed=False).search("העם כאו")
+    assert keyword_pattern("לא", prefixed=False).search("זה לא זמין?")
+
+
+def test_catalog_entry_tool_input_uses_language_name():
+    """Test that medication lookups use the name in the user's language."""
+    match = _classify("ספר לי על צטיריזין")
+
+    assert match.medication == CatalogEntry(3, "Cetirizine", "צטיריזין")
+    assert match.tool_name == "get_medication_by_name"
+    assert match.tool_input == {"medication_name": "צטיריזין"}
+
+
+async def _collect(text: str, trace_ctx: TraceContext, history: list[dict] = ()) -> list[dict]:
+    # A model with no scripted responses fails if the agent is reached
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter([])), tools=PHARMACY_TOOLS
+    )
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            messages=[*history, {"role": "user", "content": text}],
+            trace_ctx=trace_ctx,
+        )
+    ]
+    return parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_fast_path_answers_without_agent(test_db):
+    """Test a fast path hit streams tool events and a templated answer."""
+    stats = get_fast_path_stats()
+    hits = stats.hits
+    trace_ctx = TraceContext()
+
+    events = await _collect("Is Ibuprofen in stock?", trace_ctx)
+
+    assert [e["type"] for e in events] == [
+        "tool_call",
+        "tool_result",
+        "token",
+        "tool_context",
+        "done",
+    ]
+    assert events[0]["data"] == {"tool": "check_inventory", "input": {"medication_id": 1}}
+    assert events[1]["data"]["result"]["inventory"]["qty"] == 150
+    assert "Ibuprofen is in stock (150 units available)." == events[2]["data"]["text"]
+    assert trace_ctx.fast_path_hit is True
+    assert trace_ctx.fast_path_intent == "inventory"
+    assert trace_ctx.tools_called == ["check_inventory"]
+    assert stats.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_fast_path_answers_in_hebrew(test_db):
+    """Test the templated answer uses the user's language."""
+    events = await _collect("יש לכם אמוקסיצילין במלאי?", TraceContext())
+
+    text = next(e for e in events if e["type"] == "token")["data"]["text"]
+    assert "אמוקסיצילין אינו זמין כרגע במלאי" in text
+
+
+@pytest.mark.asyncio
+async def test_fast_path_miss_falls_through_to_agent(test_db):
+    """Test that a miss is recorded and the agent handles the message."""
+    trace_ctx = TraceContext()
+
+    events = await _collect("Should I take Ibuprofen?", trace_ctx)
+
+    # The unscripted fake model errors, proving the agent was reached
+    assert events[0]["type"] == "error"
+    assert trace_ctx.fast_path_hit is False
+    assert trace_ctx.fast_path_intent is None
+
+
+@pytest.mark.asyncio
+async def test_fast_path_skips_follow_up_turns(test_db):
+    """Test only a conversation's first user turn takes the fast path."""
+    trace_ctx = TraceContext()
+    history = [
+        {"role": "user", "content": "I need something for a headache"},
+        {"role": "assistant", "content": "Ibuprofen can help with that."},
+    ]
+
+    events = await _collect("Is Ibuprofen in stock?", trace_ctx, history)
+
+    assert events[0]["type"] == "error"
+    assert trace_ctx.fast_path_hit is False
@@ -0,0 +1,121 @@
+"""Tests for the agent graph's direct-answer mode."""
+
+import pytest
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+
+def _agent(*responses, direct_answer: bool = True):
+    model = FakeToolCallingModel(messages=iter(responses))
+    return build_agent_graph(model=model, tools=PHARMACY_TOOLS, direct_answer=direct_answer)
+
+
+async def _collect(agent, text: str) -> list[dict]:
+    # Follow-up questions without a medication name miss the fast path and
+    # reach the graph
+    messages = [
+        {"role": "user", "content": "Tell me about Ibuprofen"},
+        {"role": "assistant", "content": "Ibuprofen is an NSAID pain reliever."},
+        {"role": "user", "content": text},
+    ]
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent, messages=messages, trace_ctx=TraceContext()
+        )
+    ]
+    return parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_direct_answer_skips_final_model_call(test_db):
+    """Test a simple lookup ends with a templated answer after the tool."""
+    # Only the tool call is scripted; a second model call would error
+    agent = _agent(
+        tool_call_message(("check_inventory", {"medication_name": "Ibuprofen"})),
+    )
+
+    events = await _collect(agent, "Is it in stock?")
+
+    assert [e["type"] for e in events] == [
+        "tool_call",
+        "tool_result",
+        "token",
+        "tool_context",
+        "done",
+    ]
+    assert events[2]["data"]["text"] == "Ibuprofen is in stock (150 units available)."
+
+
+@pytest.mark.asyncio
+async def test_direct_answer_in_hebrew(test_db):
+    """Test the templated answer follows the language of the user's message."""
+    agent = _agent(
+        tool_call_message(("get_medication_by_name", {"medication_name": "Ibuprofen"})),
+    )
+
+    events = await _collect(agent, "מה המינון?")
+
+    text = next(e for e in events if e["type"] == "token")["data"]["text"]
+    assert text.startswith("**איבופרופן** (Ibuprofen)")
+
+
+@pytest.mark.asyncio
+async def test_tool_mismatching_intent_returns_to_model(test_db):
+    """Test the model answers when the tool does not match the user's intent."""
+    agent = _agent(
+        tool_call_message(("get_medication_by_name", {"medication_name": "Ibuprofen"})),
+        "Yes, Ibuprofen is in stock.",
+    )
+
+    events = await _collect(agent, "Is it in stock?")
+
+    text = "".join(e["data"]["text"] for e in events if e["type"] == "token")
+    assert text.strip() == "Yes, Ibuprofen is in stock."
+
+
+@pytest.mark.asyncio
+async def test_tool_error_returns_to_model(test_db):
+    """Test failed tool results are never rendered from a template."""
+    agent = _agent(
+        tool_call_message(("check_inventory", {"medication_name": "NonExistent"})),
+        "I could not find that medication.",
+    )
+
+    events = await _collect(agent, "Is it in stock?")
+
+    text = "".join(e["data"]["text"] for e in events if e["type"] == "token")
+    assert text.strip() == "I could not find that medication."
+
+
+@pytest.mark.asyncio
+async def test_direct_answer_disabled_by_default(test_db):
+    """Test the model rephrases the result unless direct answers are enabled."""
+    agent = _agent(
+        tool_call_message(("check_inventory", {"medication_name": "Ibuprofen"})),
+        "Ibuprofen is available.",
+        direct_answer=False,
+    )
+
+    events = await _collect(agent, "Is it in stock?")
+
+    text = "".join(e["data"]["text"] for e in events if e["type"] == "token")
+    assert text.strip() == "Ibuprofen is available."
+
+
+@pytest.mark.asyncio
+async def test_direct_answer_from_composite_tool(test_db):
+    """Test the composite availability tool also ends with a templated answer."""
+    agent = _agent(
+        tool_call_message(("get_medication_availability", {"medication_name": "Ibuprofen"})),
+    )
+
+    events = await _collect(agent, "Is it available?")
+
+    text = next(e for e in events if e["type"] == "token")["data"]["text"]
+    assert "Ibuprofen is in stock (150 units available)." in text
+    assert text.startswith("**Ibuprofen**")
@@ -0,0 +1,177 @@
+"""Tests for token-budgeted conversation history."""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from apps.api.agent import history as history_module
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.history import (
+    SUMMARY_HEADER,
+    count_tokens,
+    get_summary_cache,
+    manage_history,
+    split_turns,
+    summarize_turns,
+)
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel
+
+FILLER = "lorem ipsum " * 40
+
+
+def _conversation(turns: int) -> list:
+    messages = [SystemMessage(content="User context")]
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"Question {i}. {FILLER}"))
+        messages.append(AIMessage(content=f"Answer {i}. {FILLER}"))
+    messages.append(HumanMessage(content="Latest question"))
+    return messages
+
+
+def _tool_turn() -> list:
+    return [
+        HumanMessage(content="Is Ibuprofen in stock?"),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "check_inventory", "args": {"medication_id": 1}, "id": "c1"}
+            ],
+        ),
+        ToolMessage(content='{"qty": 150}', tool_call_id="c1", name="check_inventory"),
+        AIMessage(content="Yes, 150 units."),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def clear_summary_cache():
+    """Keep rolled-forward summaries from leaking between tests."""
+    get_summary_cache().clear()
+    yield
+    get_summary_cache().clear()
+
+
+def test_split_turns_keeps_tool_calls_with_results():
+    """Test a turn runs from one user message to the next."""
+    leading, turns = split_turns([SystemMessage(content="ctx"), *_tool_turn()])
+
+    assert len(leading) == 1
+    assert len(turns) == 1
+    assert len(turns[0]) == 4
+
+
+def test_history_within_budget_is_unchanged():
+    """Test short conversations are sent as-is."""
+    messages = _conversation(2)
+    window = manage_history(messages, token_budget=10_000, summary_max_tokens=200)
+
+    assert window.messages == messages
+    assert window.summarized_turns == 0
+
+
+def test_old_turns_are_summarized():
+    """Test the latest turns stay verbatim and older ones are condensed."""
+    messages = _conversation(20)
+    window = manage_history(messages, token_budget=1500, summary_max_tokens=300)
+
+    assert window.tokens <= 1500
+    assert window.tokens < window.history_tokens
+    assert window.summarized_turns > 0
+    assert window.messages[0].content == "User context"
+    summary = window.messages[1]
+    assert isinstance(summary, SystemMessage)
+    assert summary.content.startswith(SUMMARY_HEADER)
+    assert window.messages[-1].content == "Latest question"
+    assert window.messages[-2].content.startswith("Answer 19.")
+
+
+def test_latest_turn_kept_even_over_budget():
+    """Test the current question is never dropped."""
+    messages = [HumanMessage(content=FILLER * 10)]
+    window = manage_history(messages, token_budget=50, summary_max_tokens=10)
+
+    assert window.messages == messages
+
+
+def test_tool_result_turns_are_kept():
+    """Test older turns with tool results stay verbatim and complete."""
+    messages = _conversation(3)[:-1] + _tool_turn() + _conversation(20)[1:]
+    window = manage_history(messages, token_budget=1500, summary_max_tokens=300)
+
+    tool_messages = [m for m in window.messages if isinstance(m, ToolMessage)]
+    assert len(tool_messages) == 1
+    index = window.messages.index(tool_messages[0])
+    assert window.messages[index - 1].tool_calls[0]["id"] == "c1"
+    assert window.tokens <= 1500
+
+
+def test_pinned_turns_are_not_summarized(monkeypatch):
+    """Test a turn kept verbatim is not repeated in the summary."""
+    summarized = []
+    summarize = history_module.summarize_turns
+
+    def recording_summarize(turns, max_tokens):
+        summarized.extend(turns)
+        return summarize(turns, max_tokens)
+
+    monkeypatch.setattr(history_module, "summarize_turns", recording_summarize)
+    messages = _conversation(3)[:-1] + _tool_turn() + _conversation(20)[1:]
+    window = manage_history(messages, token_budget=1500, summary_max_tokens=300)
+
+    assert any(isinstance(m, ToolMessage) for m in window.messages)
+    assert summarized
+    assert not any(isinstance(m, ToolMessage) for turn in summarized for m in turn)
+
+
+def test_summary_is_rolled_forward(monkeypatch):
+    """Test a longer prefix only condenses the newly added turns."""
+    condensed = []
+    condense = history_module._condense
+
+    def counting_condense(turn):
+        condensed.append(turn)
+        return condense(turn)
+
+    monkeypatch.setattr(history_module, "_condense", counting_condense)
+    _, turns = split_turns(_conversation(10))
+
+    first = summarize_turns(turns[:5], max_tokens=1000)
+    assert len(condensed) == 5
+    second = summarize_turns(turns[:7], max_tokens=1000)
+    assert len(condensed) == 7
+    assert second.startswith(first)
+    assert "User: Question 6." in second
+
+
+def test_summary_respects_token_limit():
+    """Test the oldest summary lines are dropped first."""
+    _, turns = split_turns(_conversation(30))
+    summary = summarize_turns(turns[:30], max_tokens=200)
+
+    assert count_tokens([SystemMessage(content=summary)]) <= 210
+    assert "earlier line(s) omitted" in summary
+    assert "Question 29." in summary
+
+
+@pytest.mark.asyncio
+async def test_prompt_sizes_in_trace(test_db):
+    """Test windowing is applied per model call and reported in the trace."""
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter(["Done."])),
+        tools=PHARMACY_TOOLS,
+        history_token_budget=1500,
+    )
+    messages = []
+    for i in range(20):
+        messages.append({"role": "user", "content": f"Question {i}. {FILLER}"})
+        messages.append({"role": "assistant", "content": f"Answer {i}. {FILLER}"})
+    messages.append({"role": "user", "content": "Thanks, that is all"})
+
+    trace_ctx = TraceContext()
+    _ = [e async for e in stream_agent_response(agent, messages, trace_ctx=trace_ctx)]
+
+    prompt = trace_ctx.to_summary_dict()["prompt"]
+    assert prompt["summarized_turns"] > 0
+    assert len(prompt["tokens_per_call"]) == 1
+    assert prompt["tokens_per_call"][0] < prompt["history_tokens"]
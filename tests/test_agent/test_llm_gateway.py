@@ -0,0 +1,290 @@
+"""Tests for the LLM gateway (concurrency limit, retries, hedging, breaker)."""
+
+import asyncio
+
+import httpx
+import openai
+import pytest
+from httpx import ASGITransport, AsyncClient
+from langchain_core.messages import AIMessageChunk, HumanMessage
+
+from apps.api.agent import graph as graph_module
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.llm_gateway import (
+    AdaptiveLimiter,
+    BreakerState,
+    CircuitBreaker,
+    LLMGateway,
+    LLMUnavailable,
+)
+from apps.api.main import app
+from apps.api.request_context import RequestContext, get_request_context, request_scope
+from apps.api.tools import PHARMACY_TOOLS
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse
+
+MESSAGES = [HumanMessage(content="Should I take Ibuprofen with food?")]
+
+
+def _status_error(status: int, headers: dict | None = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    error_class = {429: openai.RateLimitError, 400: openai.BadRequestError}.get(
+        status, openai.InternalServerError
+    )
+    return error_class(f"HTTP {status}", response=response, body=None)
+
+
+class ScriptedModel:
+    """Model stand-in whose calls follow a script of errors or (delay, text)."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.run_ids = []  # (run_id, whether it was marked discarded when called)
+
+    async def astream(self, messages, config=None):
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if config and "run_id" in config:
+            ctx = get_request_context()
+            run_id = str(config["run_id"])
+            self.run_ids.append((run_id, ctx is not None and run_id in ctx.discarded_runs))
+        if isinstance(step, Exception):
+            raise step
+        delay, text = step
+        if delay:
+            await asyncio.sleep(delay)
+        for word in text.split(" "):
+            yield AIMessageChunk(content=word + " ")
+
+
+def _gateway(**kwargs) -> LLMGateway:
+    kwargs.setdefault("backoff_seconds", 0.01)
+    return LLMGateway(
+        limiter=AdaptiveLimiter(initial=4, min_limit=1, max_limit=8),
+        breaker=CircuitBreaker(
+            failure_threshold=kwargs.pop("failure_threshold", 5),
+            reset_seconds=kwargs.pop("reset_seconds", 30),
+        ),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_limiter_is_aimd():
+    """Test successes raise the limit additively and overloads halve it."""
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=5)
+    for _ in range(4):
+        await limiter.acquire()
+    assert not limiter.try_acquire()
+
+    limiter.release("success")
+    assert limiter.limit == pytest.approx(4.25)
+    limiter.release("overload")
+    assert limiter.limit == pytest.approx(2.125)
+    limiter.release("overload")
+    limiter.release("overload")
+    assert limiter.limit == 1
+    assert limiter.in_flight == 0
+    assert limiter.stats()["decreases"] == 3
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_callers_in_order():
+    """Test callers over the limit wait and get freed slots first come first served."""
+    limiter = AdaptiveLimiter(initial=1, min_limit=1, max_limit=1)
+    await limiter.acquire()
+    order = []
+
+    async def call(name):
+        await limiter.acquire()
+        order.append(name)
+
+    waiters = [asyncio.create_task(call(name)) for name in ("a", "b")]
+    await asyncio.sleep(0)
+    assert limiter.stats()["waiting"] == 2
+    assert not limiter.try_acquire()
+
+    limiter.release()
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.gather(*waiters)
+    assert order == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_retries_overload_honoring_retry_after(monkeypatch):
+    """Test a 429 is retried after the Retry-After the API asked for."""
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def record_sleep(delay, *args, **kwargs):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr("apps.api.llm_gateway.asyncio.sleep", record_sleep)
+    gateway = _gateway()
+    model = ScriptedModel(_status_error(429, {"retry-after": "1.5"}), (0, "Take it with food."))
+
+    response = await gateway.ainvoke(model, MESSAGES)
+
+    assert response.content.strip() == "Take it with food."
+    assert model.calls == 2
+    assert sleeps == [1.5]
+    assert gateway.stats()["retries"] == 1
+    assert gateway.limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_long_retry_after_is_not_waited_out():
+    """Test a Retry-After above max_backoff_seconds fails at once, carrying it."""
+    gateway = _gateway(max_backoff_seconds=2)
+    model = ScriptedModel(_status_error(429, {"retry-after": "30"}), (0, "unused"))
+
+    with pytest.raises(LLMUnavailable) as exc_info:
+        await gateway.ainvoke(model, MESSAGES)
+
+    assert exc_info.value.reason == "overloaded"
+    assert exc_info.value.retry_after == 30
+    assert model.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    """Test a persistently overloaded upstream ends in LLMUnavailable."""
+    gateway = _gateway(max_retries=2)
+    model = ScriptedModel(_status_error(503))
+
+    with pytest.raises(LLMUnavailable) as exc_info:
+        await gateway.ainvoke(model, MESSAGES)
+
+    assert exc_info.value.reason == "overloaded"
+    assert model.calls == 3
+    assert gateway.limiter.limit < 4
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    """Test a bad request is raised unchanged without a retry."""
+    gateway = _gateway()
+    model = ScriptedModel(_status_error(400), (0, "unused"))
+
+    with pytest.raises(openai.BadRequestError):
+        await gateway.ainvoke(model, MESSAGES)
+    assert model.calls == 1
+    assert gateway.breaker.consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_fails_fast_then_recovers(monkeypatch):
+    """Test an open breaker rejects calls until a probe after the reset succeeds."""
+    gateway = _gateway(max_retries=0, failure_threshold=2, reset_seconds=30)
+    failing = ScriptedModel(_status_error(500))
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            await gateway.ainvoke(failing, MESSAGES)
+    assert gateway.breaker.state == BreakerState.OPEN
+
+    healthy = ScriptedModel((0, "OK"))
+    with pytest.raises(LLMUnavailable) as exc_info:
+        await gateway.ainvoke(healthy, MESSAGES)
+    assert exc_info.value.reason == "circuit_open"
+    assert healthy.calls == 0
+
+    monkeypatch.setattr(gateway.breaker, "_opened_at", 0.0)
+    await gateway.ainvoke(healthy, MESSAGES)
+    assert gateway.breaker.state == BreakerState.CLOSED
+    assert gateway.stats()["breaker"]["trips"] == 1
+    assert gateway.stats()["breaker"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("queued", [True, False])
+async def test_cancelled_probe_is_released(monkeypatch, queued):
+    """Test a half-open probe cancelled while queued or streaming lets the next call probe."""
+    gateway = _gateway(failure_threshold=1)
+    gateway.breaker.record_failure()
+    monkeypatch.setattr(gateway.breaker, "_opened_at", 0.0)
+    if queued:
+        while gateway.limiter.try_acquire():
+            pass
+    held = gateway.limiter.in_flight
+
+    probe = asyncio.create_task(gateway.ainvoke(ScriptedModel((5, "slow")), MESSAGES))
+    await asyncio.sleep(0.01)
+    assert gateway.breaker.state == BreakerState.HALF_OPEN
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    for _ in range(held):
+        gateway.limiter.release()
+
+    await asyncio.wait_for(gateway.ainvoke(ScriptedModel((0, "OK")), MESSAGES), 2)
+    assert gateway.breaker.state == BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_slow_first_chunk_is_hedged():
+    """Test a second call races a slow one and the first to stream wins."""
+    gateway = _gateway(hedge_delay_seconds=0.05)
+    model = ScriptedModel((5, "slow"), (0, "fast"))
+
+    response = await asyncio.wait_for(gateway.ainvoke(model, MESSAGES), 2)
+
+    assert response.content.strip() == "fast"
+    assert gateway.stats()["hedges"] == 1
+    assert gateway.stats()["hedge_wins"] == 1
+    await asyncio.sleep(0)
+    assert gateway.limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_runs_discarded_until_picked():
+    """Test every attempt is held back from the start and only the winner is released."""
+    gateway = _gateway(hedge_delay_seconds=0.05)
+    model = ScriptedModel((5, "slow"), (0, "fast"))
+    ctx = RequestContext()
+
+    with request_scope(ctx):
+        await asyncio.wait_for(gateway.ainvoke(model, MESSAGES), 2)
+
+    (slow, slow_marked), (fast, fast_marked) = model.run_ids
+    assert slow_marked and fast_marked
+    assert ctx.discarded_runs == {slow}
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_streams_clear_error(monkeypatch, test_db):
+    """Test an open breaker ends the stream with an LLM_UNAVAILABLE error."""
+    gateway = _gateway(failure_threshold=1)
+    gateway.breaker.record_failure()
+    monkeypatch.setattr(graph_module, "get_llm_gateway", lambda: gateway)
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter(["unused"])), tools=PHARMACY_TOOLS
+    )
+
+    events = parse_sse(
+        [
+            e
+            async for e in stream_agent_response(
+                agent, [{"role": "user", "content": MESSAGES[0].content}]
+            )
+        ]
+    )
+
+    assert [e["type"] for e in events] == ["error", "done"]
+    assert events[0]["data"]["code"] == "LLM_UNAVAILABLE"
+    assert events[0]["data"]["reason"] == "circuit_open"
+    assert events[0]["data"]["retry_after_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_include_gateway():
+    """Test GET /metrics reports limiter and breaker state."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/metrics")
+
+    gateway = response.json()["llm_gateway"]
+    assert {"limit", "in_flight", "waiting"} <= set(gateway["limiter"])
+    assert gateway["breaker"]["state"] in {"closed", "open", "half_open"}
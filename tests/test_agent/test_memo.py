@@ -0,0 +1,127 @@
+"""Tests for per-request tool result memoization."""
+
+import pytest
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.agent.tool_context import verify_tool_context
+from apps.api.request_context import RequestContext, request_scope
+from apps.api.tools import (
+    PHARMACY_TOOLS,
+    check_inventory,
+    get_medication_by_name,
+    prescription_management,
+    reserve_medication,
+)
+from apps.api.tools import medication as medication_module
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+
+@pytest.fixture
+def search_calls(monkeypatch):
+    """Count medication searches run by get_medication_by_name."""
+    calls = []
+    search = medication_module._search_medications
+
+    async def counting_search(query):
+        calls.append(query)
+        return await search(query)
+
+    monkeypatch.setattr(medication_module, "_search_medications", counting_search)
+    return calls
+
+
+async def _run(*responses) -> tuple[TraceContext, list[dict]]:
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter(responses)), tools=PHARMACY_TOOLS
+    )
+    trace_ctx = TraceContext()
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            # No medication name, so nothing is prefetched
+            messages=[{"role": "user", "content": "Tell me more about that one"}],
+            trace_ctx=trace_ctx,
+        )
+    ]
+    return trace_ctx, parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_repeated_call_is_served_from_memo(test_db, search_calls):
+    """Test a repeat call with equivalent arguments does not query again."""
+    trace_ctx, events = await _run(
+        tool_call_message(("get_medication_by_name", {"medication_name": "Ibuprofen"})),
+        tool_call_message(("get_medication_by_name", {"medication_name": " ibuprofen "})),
+        "Done.",
+    )
+
+    results = [e["data"] for e in events if e["type"] == "tool_result"]
+    assert len(results) == 2
+    assert results[0]["result"] == results[1]["result"]
+    assert "served_from" not in results[0]
+    assert results[1]["served_from"] == "memo"
+    context = next(e for e in events if e["type"] == "tool_context")
+    assert len(verify_tool_context(context["data"]["token"], None)) == 1
+    assert search_calls == ["Ibuprofen"]
+    assert trace_ctx.memo_hits == 1
+    assert [tc.served_from for tc in trace_ctx.tool_calls] == [None, "memo"]
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_share_one_execution(test_db, search_calls):
+    """Test identical calls in one step run the tool once."""
+    trace_ctx, _ = await _run(
+        tool_call_message(
+            ("get_medication_by_name", {"medication_name": "Cetirizine"}),
+            ("get_medication_by_name", {"medication_name": "Cetirizine"}),
+        ),
+        "Done.",
+    )
+
+    assert search_calls == ["Cetirizine"]
+    assert trace_ctx.memo_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_memo_is_request_scoped(test_db, search_calls):
+    """Test results are not reused across requests or outside a request."""
+    with request_scope(RequestContext()):
+        await get_medication_by_name.ainvoke({"medication_name": "Ibuprofen"})
+    with request_scope(RequestContext()):
+        await get_medication_by_name.ainvoke({"medication_name": "Ibuprofen"})
+    await get_medication_by_name.ainvoke({"medication_name": "Ibuprofen"})
+    await get_medication_by_name.ainvoke({"medication_name": "Ibuprofen"})
+
+    assert len(search_calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates_memo(test_db):
+    """Test a reservation makes the next inventory check re-query."""
+    with request_scope(RequestContext()):
+        before = await check_inventory.ainvoke({"medication_id": 1})
+        await reserve_medication.ainvoke({"medication_id": 1, "quantity": 2})
+        after = await check_inventory.ainvoke({"medication_id": 1})
+
+    assert before["inventory"]["qty"] == 150
+    assert after["inventory"]["qty"] == 148
+
+
+@pytest.mark.asyncio
+async def test_refill_requests_are_not_memoized(test_db):
+    """Test each REFILL_REQUEST runs, while LIST is re-read afterwards."""
+    with request_scope(RequestContext(user_id=1, user_name="David Cohen")):
+        first = await prescription_management.ainvoke(
+            {"action": "REFILL_REQUEST", "prescription_id": 1}
+        )
+        second = await prescription_management.ainvoke(
+            {"action": "REFILL_REQUEST", "prescription_id": 1}
+        )
+        listed = await prescription_management.ainvoke({"action": "LIST"})
+
+    assert first["refills_left"] == 1
+    assert second["refills_left"] == 0
+    assert listed["prescriptions"][0]["refills_left"] == 0
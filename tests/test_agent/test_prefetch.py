@@ -0,0 +1,147 @@
+"""Tests for speculative tool prefetch."""
+
+import asyncio
+
+import pytest
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.config import get_settings
+from apps.api.request_context import RequestContext, request_scope
+from apps.api.tools import PHARMACY_TOOLS, get_medication_by_name
+from apps.api.tools import medication as medication_module
+from apps.api.tools.runtime import prefetch_tool_call
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+
+@pytest.fixture(autouse=True)
+def prefetch_enabled(monkeypatch):
+    """Prefetch is opt-in."""
+    monkeypatch.setenv("PREFETCH_ENABLED", "true")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def search_calls(monkeypatch):
+    """Count medication searches run by get_medication_by_name."""
+    calls = []
+    search = medication_module._search_medications
+
+    async def counting_search(query):
+        calls.append(query)
+        return await search(query)
+
+    monkeypatch.setattr(medication_module, "_search_medications", counting_search)
+    return calls
+
+
+async def _run(text: str, *responses) -> tuple[TraceContext, list[dict]]:
+    agent = build_agent_graph(
+        model=FakeToolCallingModel(messages=iter(responses)), tools=PHARMACY_TOOLS
+    )
+    trace_ctx = TraceContext()
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            messages=[{"role": "user", "content": text}],
+            trace_ctx=trace_ctx,
+        )
+    ]
+    return trace_ctx, parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_model_call_served_from_prefetch(test_db, search_calls):
+    """Test a lookup the model asks for is not queried a second time."""
+    trace_ctx, events = await _run(
+        # Not a fast path match, so the agent runs
+        "Should I take Ibuprofen?",
+        tool_call_message(("get_medication_by_name", {"medication_name": "ibuprofen"})),
+        "Here is the information.",
+    )
+
+    result = next(e for e in events if e["type"] == "tool_result")["data"]["result"]
+    assert result["success"] is True
+    assert result["medication"]["name_en"] == "Ibuprofen"
+    assert search_calls == ["Ibuprofen"]  # the prefetch only
+    assert trace_ctx.prefetch_started == 3
+    assert trace_ctx.prefetch_hits == 1
+    assert trace_ctx.to_summary_dict()["prefetch"]["wasted"] == 2
+    assert trace_ctx.tool_calls[0].served_from == "prefetch"
+
+
+@pytest.mark.asyncio
+async def test_hebrew_message_prefetch_matches_english_call(test_db, search_calls):
+    """Test prefetched name lookups are registered under both names."""
+    trace_ctx, _ = await _run(
+        "כדאי לי לקחת איבופרופן?",
+        tool_call_message(("get_medication_by_name", {"medication_name": "Ibuprofen"})),
+        "מידע על התרופה.",
+    )
+
+    assert len(search_calls) == 1
+    assert trace_ctx.prefetch_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_inventory_by_id_served_from_prefetch(test_db):
+    """Test check_inventory by medication_id uses the prefetched result."""
+    trace_ctx, events = await _run(
+        "Should I buy Cetirizine today?",
+        tool_call_message(("check_inventory", {"medication_id": 3})),
+        "It is in stock.",
+    )
+
+    result = next(e for e in events if e["type"] == "tool_result")["data"]["result"]
+    assert result["inventory"]["qty"] == 200
+    assert trace_ctx.prefetch_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_different_arguments_miss_prefetch(test_db, search_calls):
+    """Test calls with other arguments run normally and count as waste."""
+    trace_ctx, _ = await _run(
+        "Should I take Ibuprofen?",
+        tool_call_message(("get_medication_by_name", {"medication_name": "Advil"})),
+        "Not found.",
+    )
+
+    assert search_calls == ["Ibuprofen", "Advil"]
+    assert trace_ctx.prefetch_hits == 0
+
+
+@pytest.mark.asyncio
+async def test_prefetch_requires_request_context():
+    """Test prefetching outside a request is a no-op."""
+    assert prefetch_tool_call(get_medication_by_name, {"medication_name": "Ibuprofen"}) is None
+
+
+@pytest.mark.asyncio
+async def test_prefetch_takes_tool_slots(test_db, monkeypatch):
+    """Test prefetches run under the request's TOOL_CONCURRENCY cap."""
+    running = 0
+    peak = 0
+    search = medication_module._search_medications
+
+    async def tracking_search(query):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return await search(query)
+
+    monkeypatch.setattr(medication_module, "_search_medications", tracking_search)
+    ctx = RequestContext(tool_slots=asyncio.Semaphore(1))
+    with request_scope(ctx):
+        tasks = [
+            prefetch_tool_call(get_medication_by_name, {"medication_name": name})
+            for name in ("Ibuprofen", "Metformin", "Omeprazole")
+        ]
+    await asyncio.gather(*tasks)
+
+    assert peak == 1
@@ -0,0 +1,101 @@
+"""Tests for per-language system prompts and prompt caching metrics."""
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.prompts import SYSTEM_PROMPTS, prompt_language
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import RecordingModel
+
+
+class UsageReportingModel(RecordingModel):
+    """Recording model that reports token usage like a cached OpenAI prompt."""
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                usage_metadata={
+                    "input_tokens": 1200,
+                    "output_tokens": 5,
+                    "total_tokens": 1205,
+                    "input_token_details": {"cache_read": 1024},
+                },
+            )
+        )
+
+
+def test_prompt_variants_carry_one_language():
+    """Test each variant only has its own language's instructions."""
+    assert set(SYSTEM_PROMPTS) == {"en", "he"}
+    assert "respond entirely in English" in SYSTEM_PROMPTS["en"]
+    assert "לייעוץ רפואי" not in SYSTEM_PROMPTS["en"]
+    assert "respond entirely in Hebrew" in SYSTEM_PROMPTS["he"]
+    assert "For medical advice, please consult" not in SYSTEM_PROMPTS["he"]
+
+
+def test_prompt_language_follows_latest_user_message():
+    """Test the variant is picked from the latest user message only."""
+    assert prompt_language([]) == "en"
+    assert prompt_language([HumanMessage(content="האם יש אקמול במלאי?")]) == "he"
+    assert (
+        prompt_language(
+            [
+                HumanMessage(content="האם יש אקמול במלאי?"),
+                AIMessage(content="כן, יש במלאי."),
+                HumanMessage(content="Thanks, and Ibuprofen?"),
+            ]
+        )
+        == "en"
+    )
+
+
+@pytest.mark.asyncio
+async def test_static_prefix_then_user_context(test_db):
+    """Test the system prompt is sent unchanged and user context follows it."""
+    model = UsageReportingModel(messages=iter(["Hello.", "שלום."]), prompts=[])
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+    users = [
+        ({"user_id": 1, "name": "David Cohen"}, "Hello"),
+        ({"user_id": 2, "name": "Sarah Levi"}, "שלום"),
+    ]
+    for user, text in users:
+        _ = [
+            e
+            async for e in stream_agent_response(
+                agent, [{"role": "user", "content": text}], user=user
+            )
+        ]
+
+    english, hebrew = model.prompts
+    assert english[0] == SystemMessage(content=SYSTEM_PROMPTS["en"])
+    assert hebrew[0] == SystemMessage(content=SYSTEM_PROMPTS["he"])
+    assert "David Cohen" in english[1].content
+    assert "Sarah Levi" in hebrew[1].content
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_usage_in_trace(test_db):
+    """Test reported prompt and cached prompt tokens are in the trace."""
+    model = UsageReportingModel(messages=iter(["Hello."]), prompts=[])
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+    trace_ctx = TraceContext()
+    _ = [
+        e
+        async for e in stream_agent_response(
+            agent, [{"role": "user", "content": "Hello"}], trace_ctx=trace_ctx
+        )
+    ]
+
+    prompt = trace_ctx.to_summary_dict()["prompt"]
+    assert prompt["language"] == "en"
+    assert prompt["input_tokens_per_call"] == [1200]
+    assert prompt["cached_tokens_per_call"] == [1024]
+    assert prompt["cache_hits"] == 1
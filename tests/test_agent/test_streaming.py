@@ -0,0 +1,61 @@
+"""Tests for the SSE streaming adapter."""
+
+import pytest
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import stream_agent_response
+from apps.api.tools import PHARMACY_TOOLS
+from apps.api.tracing import TraceContext
+from tests.test_agent.conftest import FakeToolCallingModel, parse_sse, tool_call_message
+
+
+def _agent(*responses):
+    model = FakeToolCallingModel(messages=iter(responses))
+    return build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+
+async def _collect(agent, **kwargs) -> list[dict]:
+    events = [
+        e
+        async for e in stream_agent_response(
+            agent=agent,
+            messages=[{"role": "user", "content": "What are my prescriptions?"}],
+            trace_ctx=TraceContext(),
+            **kwargs,
+        )
+    ]
+    return parse_sse(events)
+
+
+@pytest.mark.asyncio
+async def test_resolved_user_is_trusted_by_tools(test_db):
+    """Test that tools use the pre-resolved user_id, not an LLM-supplied identifier."""
+    agent = _agent(
+        # The model passes someone else's identifier; it must be ignored
+        tool_call_message(
+            ("prescription_management", {"action": "LIST", "user_identifier": "sarah.levi@example.com"})
+        ),
+        "Here are your prescriptions.",
+    )
+    user = {"user_id": 1, "name": "David Cohen"}
+
+    events = await _collect(agent, user_identifier="050-1234567", user=user)
+
+    result = next(e for e in events if e["type"] == "tool_result")["data"]["result"]
+    assert result["user_name"] == "David Cohen"
+    assert events[-1]["type"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_unverified_user_needs_identifier(test_db):
+    """Test that without a resolved user, the tool requires an identifier."""
+    agent = _agent(
+        tool_call_message(("prescription_management", {"action": "LIST"})),
+        "Please share your email.",
+    )
+
+    events = await _collect(agent)
+
+    result = next(e for e in events if e["type"] == "tool_result")["data"]["result"]
+    assert result["success"] is False
+    assert result["error_code"] == "UNAUTHORIZED"
@@ -0,0 +1,128 @@
+"""Tests for model tier routing and per-tier agent compilation."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from apps.api.agent import graph as graph_module
+from apps.api.agent.graph import _build_tier_agents, get_pharmacy_agent
+from apps.api.agent.tiers import ModelTier, classify_tier, tier_models
+from apps.api.config import get_settings
+
+
+@pytest.fixture
+def clear_settings():
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def _tier(*contents: str) -> ModelTier:
+    roles = ["user", "assistant"]
+    messages = [
+        {"role": roles[i % 2], "content": content} for i, content in enumerate(contents)
+    ]
+    return classify_tier(messages, small_max_words=20)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Hi!",
+        "Thanks, that's all",
+        "Is Ibuprofen in stock?",
+        "ספר לי על אקמול",
+        "What are the warnings for Omeprazole?",
+    ],
+)
+def test_easy_turns_use_small_tier(text):
+    """Test chit-chat and simple lookups go to the small model."""
+    assert _tier(text) == ModelTier.SMALL
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Can I take Ibuprofen with my current medications?",
+        "Is it safe to take Acetaminophen while pregnant?",
+        "Please refill my prescription",
+        "Reserve two boxes for me",
+        "האם מותר לקחת אקמול בהריון?",
+        "What does it cost? And do you deliver?",
+        " ".join(["word"] * 21),
+    ],
+)
+def test_complex_turns_use_large_tier(text):
+    """Test policy-sensitive, multi-part and long turns go to the large model."""
+    assert _tier(text) == ModelTier.LARGE
+
+
+def test_reply_to_assistant_question_uses_large_tier():
+    """Test confirmations are routed with the question they answer."""
+    assert (
+        _tier(
+            "Check my prescriptions",
+            "You have an eligible refill for Lisinopril. Submit it?",
+            "Yes please",
+        )
+        == ModelTier.LARGE
+    )
+    assert _tier("Hello", "Hi, how can I help?", "Hello again") == ModelTier.LARGE
+    assert _tier("Hello", "Hi, how can I help.", "Thanks") == ModelTier.SMALL
+
+
+def test_tier_models(monkeypatch, clear_settings):
+    """Test an empty small model routes every tier to OPENAI_MODEL."""
+    monkeypatch.setenv("OPENAI_MODEL", "large-model")
+    monkeypatch.setenv("OPENAI_SMALL_MODEL", "small-model")
+    get_settings.cache_clear()
+    assert tier_models(get_settings()) == {
+        ModelTier.SMALL: "small-model",
+        ModelTier.LARGE: "large-model",
+    }
+
+    monkeypatch.setenv("OPENAI_SMALL_MODEL", "")
+    get_settings.cache_clear()
+    assert set(tier_models(get_settings()).values()) == {"large-model"}
+
+
+def test_tiers_with_same_model_share_a_graph(monkeypatch, clear_settings):
+    """Test one graph is compiled per distinct model."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_SMALL_MODEL", "small-model")
+    get_settings.cache_clear()
+    agents = _build_tier_agents()
+    assert agents[ModelTier.SMALL] is not agents[ModelTier.LARGE]
+
+    monkeypatch.setenv("OPENAI_SMALL_MODEL", "")
+    get_settings.cache_clear()
+    agents = _build_tier_agents()
+    assert agents[ModelTier.SMALL] is agents[ModelTier.LARGE]
+
+
+def test_agents_compiled_once_on_first_use(monkeypatch, clear_settings):
+    """Test concurrent first calls share one compile per model."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_SMALL_MODEL", "small-model")
+    monkeypatch.setattr(graph_module, "_agents", {})
+    monkeypatch.setattr(graph_module, "_checkpointer", None)
+    compiled = []
+    lock = threading.Lock()
+
+    def slow_build(model_name, checkpointer=None):
+        time.sleep(0.05)
+        with lock:
+            compiled.append(model_name)
+        return object()
+
+    monkeypatch.setattr(graph_module, "_build_pharmacy_agent", slow_build)
+    tiers = [ModelTier.SMALL, ModelTier.LARGE] * 4
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        agents = list(pool.map(lambda tier: get_pharmacy_agent(tier=tier), tiers))
+
+    assert len(compiled) == 2
+    assert len({id(a) for a in agents}) == 2
+    with pytest.raises(RuntimeError):
+        get_pharmacy_agent(stateful=True)
@@ -0,0 +1,180 @@
+"""Tests for signed tool-result summaries carried by clients."""
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from pydantic import ValidationError
+
+from apps.api.agent.graph import build_agent_graph
+from apps.api.agent.streaming import convert_messages, stream_agent_response
+from apps.api.agent.tool_context import (
+    MAX_TOOL_CONTEXT_CHARS,
+    sign_tool_context,
+    tool_context_messages,
+    verify_tool_context,
+)
+from apps.api.config import get_settings
+from apps.api.schemas import ChatMessage
+from apps.api.tools import PHARMACY_TOOLS
+from tests.test_agent.conftest import RecordingModel, parse_sse, tool_call_message
+
+# Not a fast path match, so the agent runs
+QUESTION = "Should I take Ibuprofen with food?"
+
+RECORD = {
+    "tool": "check_inventory",
+    "input": {"medication_id": 1},
+    "result": {"success": True, "medication_id": 1, "quantity": 150, "restock_date": None},
+}
+
+
+@pytest.fixture
+def clear_settings():
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_round_trip():
+    """Test a signed summary verifies back to its compacted records."""
+    token = sign_tool_context([RECORD], user_id=1)
+
+    records = verify_tool_context(token, user_id=1)
+    assert records == [
+        {
+            "tool": "check_inventory",
+            "input": {"medication_id": 1},
+            "result": {"success": True, "medication_id": 1, "quantity": 150},
+        }
+    ]
+
+
+def test_tampered_token_is_rejected():
+    """Test a client can't alter the tool results."""
+    token = sign_tool_context([RECORD], user_id=None)
+    payload, signature = token.split(".")
+    forged = sign_tool_context([{**RECORD, "result": {"success": True, "quantity": 9999}}], None)
+
+    assert verify_tool_context(f"{forged.split('.')[0]}.{signature}", None) is None
+    assert verify_tool_context(f"{payload}.", None) is None
+    assert verify_tool_context("not a token", None) is None
+
+
+@pytest.mark.parametrize("token", ["abc.déf", "ébc.def", "אבג.דהו"])
+def test_non_ascii_token_is_rejected(token):
+    """Test a token with non-ASCII characters is treated as invalid."""
+    assert verify_tool_context(token, None) is None
+
+
+def test_token_is_bound_to_user():
+    """Test a summary issued for one user is ignored for another."""
+    token = sign_tool_context([RECORD], user_id=1)
+
+    assert verify_tool_context(token, user_id=2) is None
+    assert verify_tool_context(token, user_id=None) is None
+
+
+def test_expired_token_is_rejected(monkeypatch, clear_settings):
+    """Test summaries older than TOOL_CONTEXT_MAX_AGE_SECONDS are ignored."""
+    token = sign_tool_context([RECORD], user_id=None)
+    monkeypatch.setenv("TOOL_CONTEXT_MAX_AGE_SECONDS", "-1")
+    get_settings.cache_clear()
+
+    assert verify_tool_context(token, user_id=None) is None
+
+
+def test_oldest_records_dropped_when_too_large():
+    """Test the summary fits the message size limit."""
+    big = {"success": True, "notes": "x" * 6000}
+    records = [{"tool": "t", "input": {"i": i}, "result": big} for i in range(4)]
+
+    token = sign_tool_context(records, user_id=None)
+
+    assert len(token) <= MAX_TOOL_CONTEXT_CHARS
+    kept = verify_tool_context(token, user_id=None)
+    assert 0 < len(kept) < 4
+    assert kept[-1]["input"] == {"i": 3}
+
+
+def test_messages_pair_calls_with_results():
+    """Test rehydrated ToolMessages answer the rebuilt tool calls."""
+    messages = tool_context_messages([RECORD, {**RECORD, "tool": "get_medication_by_name"}])
+
+    assert isinstance(messages[0], AIMessage)
+    call_ids = [c["id"] for c in messages[0].tool_calls]
+    assert [m.tool_call_id for m in messages[1:]] == call_ids
+    assert [m.name for m in messages[1:]] == ["check_inventory", "get_medication_by_name"]
+
+
+def test_convert_messages_rehydrates_before_answer():
+    """Test tool results are placed before the assistant text they support."""
+    messages = convert_messages(
+        [
+            {"role": "user", "content": "Is Ibuprofen in stock?"},
+            {
+                "role": "assistant",
+                "content": "Yes, 150 units.",
+                "tool_context": sign_tool_context([RECORD], user_id=None),
+            },
+        ]
+    )
+
+    assert [type(m) for m in messages[1:]] == [AIMessage, ToolMessage, AIMessage]
+    assert messages[-1].content == "Yes, 150 units."
+
+
+def test_tool_context_only_on_assistant_messages():
+    """Test clients can't attach tool results to their own messages."""
+    with pytest.raises(ValidationError):
+        ChatMessage(role="user", content="hi", tool_context="abc.def")
+
+
+@pytest.mark.asyncio
+async def test_follow_up_reuses_tool_results(test_db):
+    """Test a follow-up with the returned tool context needs no tool calls."""
+    model = RecordingModel(
+        messages=iter(
+            [
+                tool_call_message(("get_medication_by_name", {"medication_name": "Ibuprofen"})),
+                "Yes, take it with food.",
+                "It requires no prescription.",
+            ]
+        ),
+        prompts=[],
+    )
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+
+    first = parse_sse(
+        [e async for e in stream_agent_response(agent, [{"role": "user", "content": QUESTION}])]
+    )
+    assert [e["type"] for e in first][-2:] == ["tool_context", "done"]
+    token = first[-2]["data"]["token"]
+
+    history = [
+        {"role": "user", "content": QUESTION},
+        {"role": "assistant", "content": "Yes, take it with food.", "tool_context": token},
+        {"role": "user", "content": "Do I need a prescription for it?"},
+    ]
+    second = parse_sse([e async for e in stream_agent_response(agent, history)])
+
+    assert not any(e["type"] == "tool_call" for e in second)
+    tool_messages = [m for m in model.prompts[-1] if isinstance(m, ToolMessage)]
+    assert len(tool_messages) == 1
+    assert "Ibuprofen" in tool_messages[0].content
+
+
+@pytest.mark.asyncio
+async def test_malformed_token_still_streams_answer(test_db):
+    """Test a garbage tool context is ignored and the turn ends normally."""
+    model = RecordingModel(messages=iter(["Take it with food."]), prompts=[])
+    agent = build_agent_graph(model=model, tools=PHARMACY_TOOLS)
+    history = [
+        {"role": "user", "content": QUESTION},
+        {"role": "assistant", "content": "Yes.", "tool_context": "ébc.déf"},
+        {"role": "user", "content": "Anything else?"},
+    ]
+
+    events = parse_sse([e async for e in stream_agent_response(agent, history)])
+
+    assert events[-1]["type"] == "done"
+    assert not any(e["type"] == "error" for e in events)
+    assert not any(isinstance(m, ToolMessage) for m in model.prompts[-1])
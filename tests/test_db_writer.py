@@ -0,0 +1,81 @@
+"""Tests for the single-writer database queue."""
+
+import asyncio
+
+import pytest
+
+from apps.api.database import get_connection
+from apps.api.db_writer import get_db_writer, stop_db_writer
+
+
+async def _set_qty(med_id: int, qty: int):
+    async def write(db):
+        await db.execute(
+            "UPDATE inventory SET qty = ? WHERE med_id = ?", (qty, med_id)
+        )
+        return qty
+
+    return await get_db_writer().submit(write)
+
+
+async def _qty(med_id: int) -> int:
+    async with get_connection() as db:
+        async with db.execute(
+            "SELECT qty FROM inventory WHERE med_id = ?", (med_id,)
+        ) as cursor:
+            return (await cursor.fetchone())["qty"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_batched(test_db):  # noqa: F811
+    """Test that a burst of writes is committed in fewer transactions."""
+    writer = get_db_writer()
+    results = await asyncio.gather(*[_set_qty(1, n) for n in range(20)])
+
+    assert results == list(range(20))
+    assert await _qty(1) == 19
+    assert writer.batches_committed < 20
+    await stop_db_writer()
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_roll_back_batch(test_db):  # noqa: F811
+    """Test that one failing write only rolls back its own changes."""
+
+    async def bad_write(db):
+        await db.execute("UPDATE inventory SET qty = 999 WHERE med_id = 3")
+        raise ValueError("boom")
+
+    writer = get_db_writer()
+    good = asyncio.ensure_future(_set_qty(1, 42))
+    bad = asyncio.ensure_future(writer.submit(bad_write))
+    await asyncio.wait([good, bad])
+
+    assert good.result() == 42
+    with pytest.raises(ValueError):
+        bad.result()
+    assert await _qty(1) == 42
+    assert await _qty(3) == 200
+    await stop_db_writer()
+
+
+@pytest.mark.asyncio
+async def test_write_abandoned_by_caller_is_skipped(test_db):  # noqa: F811
+    """Test a queued write whose caller gave up before it ran is not applied."""
+    release = asyncio.Event()
+
+    async def blocking_write(db):
+        await release.wait()
+
+    writer = get_db_writer()
+    first = asyncio.ensure_future(writer.submit(blocking_write))
+    await asyncio.sleep(0.05)  # the writer is now inside blocking_write
+    abandoned = asyncio.ensure_future(_set_qty(1, 42))
+    await asyncio.sleep(0)
+    abandoned.cancel()
+    release.set()
+
+    await first
+    assert await _set_qty(3, 7) == 7  # queued after the abandoned write
+    assert await _qty(1) == 150
+    await stop_db_writer()
@@ -0,0 +1,103 @@
+"""Tests for the shared OpenAI HTTP client."""
+
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from apps.api import http_client as http_client_module
+from apps.api.config import get_settings
+from apps.api.http_client import (
+    ConnectionStats,
+    close_http_client,
+    get_http_client,
+    http_client_stats,
+    openai_client_kwargs,
+)
+from apps.api.main import app
+
+
+@pytest_asyncio.fixture
+async def fresh_client(monkeypatch):
+    """Start each test without a shared client and with fresh settings."""
+    await close_http_client()
+    monkeypatch.setattr(http_client_module, "_stats", ConnectionStats())
+    get_settings.cache_clear()
+    yield
+    await close_http_client()
+    get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_client_configured_from_settings(monkeypatch, fresh_client):
+    """Test pool limits and timeouts come from Settings."""
+    monkeypatch.setenv("LLM_HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "3")
+    monkeypatch.setenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")
+    monkeypatch.setenv("LLM_HTTP_CONNECT_TIMEOUT_SECONDS", "2")
+    monkeypatch.setenv("LLM_HTTP_READ_TIMEOUT_SECONDS", "45")
+    get_settings.cache_clear()
+
+    client = get_http_client()
+    pool = client._transport._pool
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert pool._keepalive_expiry == 30
+    assert client.timeout == httpx.Timeout(45, connect=2)
+    assert openai_client_kwargs()["timeout"] == client.timeout
+
+
+@pytest.mark.asyncio
+async def test_http2_falls_back_without_h2(monkeypatch, fresh_client):
+    """Test LLM_HTTP2_ENABLED without h2 installed still creates a client."""
+    monkeypatch.setenv("LLM_HTTP2_ENABLED", "true")
+    monkeypatch.setattr(http_client_module.importlib.util, "find_spec", lambda name: None)
+    get_settings.cache_clear()
+
+    client = get_http_client()
+    assert client._transport._pool._http2 is False
+
+
+@pytest.mark.asyncio
+async def test_client_shared_until_closed(fresh_client):
+    """Test every model gets the same client, and close starts a new one."""
+    client = get_http_client()
+    assert openai_client_kwargs()["http_async_client"] is client
+    assert http_client_stats()["open"] is True
+
+    await close_http_client()
+    assert client.is_closed
+    assert http_client_stats()["open"] is False
+    assert get_http_client() is not client
+
+
+@pytest.mark.asyncio
+async def test_stats_count_requests_and_connections(fresh_client):
+    """Test the request hook and trace callback update the counters."""
+    stats = http_client_module._stats
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    await stats.on_request(request)
+    assert request.extensions["trace"] == stats.trace
+
+    await stats.trace("connection.connect_tcp.complete", {})
+    await stats.trace("connection.start_tls.complete", {})
+    await stats.trace("http11.send_request_headers.complete", {})
+
+    result = http_client_stats()
+    assert result["requests"] == 1
+    assert result["connections_opened"] == 1
+    assert result["tls_handshakes"] == 1
+    assert result["pool"]["connections"] == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(fresh_client):
+    """Test GET /metrics reports the shared client's pool."""
+    get_http_client()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    llm_http = response.json()["llm_http"]
+    assert llm_http["open"] is True
+    assert llm_http["pool"]["max_connections"] == get_settings().llm_http_max_connections
@@ -0,0 +1,77 @@
+"""Tests for user identity normalization and the resolver cache."""
+
+import time
+
+import pytest
+
+from apps.api.cache import TTLCache
+from apps.api.identity import (
+    get_user_cache,
+    normalize_email,
+    normalize_identifier,
+    normalize_phone,
+    resolve_user,
+)
+
+
+class TestNormalization:
+    """Unit tests for identifier normalization."""
+
+    @pytest.mark.parametrize(
+        "raw",
+        ["050-1234567", "0501234567", "050 123 4567", "+972 50-123-4567", "00972501234567"],
+    )
+    def test_phone_variants_normalize_to_e164(self, raw):
+        assert normalize_phone(raw) == "+972501234567"
+
+    @pytest.mark.parametrize("raw", ["", "12345", "david@example.com", "call me"])
+    def test_invalid_phone(self, raw):
+        assert normalize_phone(raw) is None
+
+    def test_email_is_lowercased_and_stripped(self):
+        assert normalize_email("  David.Cohen@Example.COM ") == "david.cohen@example.com"
+
+    def test_identifier_picks_column(self):
+        assert normalize_identifier("a@b.com") == ("email_norm", "a@b.com")
+        assert normalize_identifier("050-1234567") == ("phone_e164", "+972501234567")
+        assert normalize_identifier("not an id") is None
+
+
+class TestTTLCache:
+    """Unit tests for the LRU+TTL cache."""
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # refresh a
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = TTLCache(maxsize=2, ttl_seconds=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_user_caches_hits(test_db):  # noqa: F811
+    """Test that a resolved user is cached under its normalized key."""
+    user = await resolve_user("050-1234567")
+    assert user["name"] == "David Cohen"
+
+    cache = get_user_cache()
+    hits_before = cache.hits
+    assert await resolve_user("0501234567") == user
+    assert cache.hits == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_user_not_found(test_db):  # noqa: F811
+    """Test that unknown identifiers resolve to None."""
+    assert await resolve_user("nobody@example.com") is None
+    assert await resolve_user("") is None
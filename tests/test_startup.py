@@ -0,0 +1,36 @@
+"""Tests for API cold start (import time)."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+# Generous for slow CI machines; the API imports in about 1s on a laptop
+BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2000"))
+
+
+@pytest.fixture(scope="module")
+def report() -> dict:
+    """Run the startup benchmark once for this module."""
+    result = subprocess.run(
+        [sys.executable, "scripts/bench_startup.py", "--json", "--budget-ms", str(BUDGET_MS)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_agent_stack_is_not_imported_at_startup(report):
+    """Test LangGraph and the OpenAI client load on first use, not on import."""
+    assert report["deferred_loaded"] == []
+
+
+def test_import_time_within_budget(report):
+    """Test importing the API stays within the startup budget."""
+    assert report["import_ms"] <= BUDGET_MS, report["slowest"]
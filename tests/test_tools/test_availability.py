@@ -0,0 +1,86 @@
+"""Tests for get_medication_availability tool."""
+
+import pytest
+
+from apps.api.request_context import RequestContext, request_scope
+from apps.api.tools import get_medication_availability, reserve_medication
+from apps.api.tools.schemas import ToolErrorCode
+
+
+@pytest.mark.asyncio
+async def test_otc_medication_with_stock(test_db):
+    """Test medication details and stock are returned in one call."""
+    result = await get_medication_availability.ainvoke({"medication_name": "Ibuprofen"})
+
+    assert result["success"] is True
+    assert result["medication"]["name_en"] == "Ibuprofen"
+    assert result["medication"]["dosage_en"]
+    assert result["inventory"]["in_stock"] is True
+    assert result["inventory"]["qty"] == 150
+    # OTC medications skip the prescription lookup
+    assert result["has_active_prescription"] is None
+    assert result["prescription"] is None
+
+
+@pytest.mark.asyncio
+async def test_out_of_stock_by_hebrew_name(test_db):
+    """Test an out-of-stock medication looked up by Hebrew name."""
+    result = await get_medication_availability.ainvoke({"medication_name": "אמוקסיצילין"})
+
+    assert result["success"] is True
+    assert result["inventory"]["in_stock"] is False
+    assert result["inventory"]["qty"] is None
+    assert result["inventory"]["restock_eta"] == "2025-01-15"
+
+
+@pytest.mark.asyncio
+async def test_stock_is_net_of_holds(test_db):
+    """Test reported stock excludes units on hold, like check_inventory."""
+    await reserve_medication.ainvoke({"medication_id": 1, "quantity": 10})
+
+    result = await get_medication_availability.ainvoke({"medication_name": "Ibuprofen"})
+
+    assert result["inventory"]["qty"] == 140
+
+
+@pytest.mark.asyncio
+async def test_rx_medication_with_active_prescription(test_db):
+    """Test the user's active prescription is reported for Rx medications."""
+    result = await get_medication_availability.ainvoke(
+        {"medication_name": "Amoxicillin", "user_identifier": "david.cohen@example.com"}
+    )
+
+    assert result["has_active_prescription"] is True
+    assert result["prescription"]["presc_id"] == 1
+    assert result["prescription"]["refills_left"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rx_medication_without_active_prescription(test_db):
+    """Test a verified user with only a completed prescription."""
+    with request_scope(RequestContext(user_id=2, user_name="Sarah Levi")):
+        result = await get_medication_availability.ainvoke(
+            {"medication_name": "Amoxicillin"}
+        )
+
+    assert result["has_active_prescription"] is False
+    assert result["prescription"] is None
+
+
+@pytest.mark.asyncio
+async def test_rx_medication_without_user(test_db):
+    """Test prescription status is omitted when no user is known."""
+    result = await get_medication_availability.ainvoke({"medication_name": "Amoxicillin"})
+
+    assert result["success"] is True
+    assert result["has_active_prescription"] is None
+
+
+@pytest.mark.asyncio
+async def test_not_found(test_db):
+    """Test NOT_FOUND error for an unknown medication."""
+    result = await get_medication_availability.ainvoke({"medication_name": "NonExistent"})
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.NOT_FOUND.value
+    assert result["query"] == "NonExistent"
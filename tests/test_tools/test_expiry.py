@@ -0,0 +1,56 @@
+"""Tests for the prescription expiry sweeper."""
+
+import sqlite3
+
+import pytest
+
+from apps.api.tools import prescription_management
+from apps.api.tools.expiry import expire_due_prescriptions
+from apps.api.tools.schemas import ToolErrorCode
+
+
+def _add_due_prescriptions(db_path: str, count: int) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        """INSERT INTO prescriptions
+           (user_id, med_id, refills_left, status, expires_at)
+           VALUES (3, 3, 2, 'active', '2020-01-01 00:00:00')""",
+        [()] * count,
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_sweeper_expires_due_prescriptions_in_batches(test_db):
+    """Test that all due prescriptions expire, across several batches."""
+    _add_due_prescriptions(test_db, 5)
+
+    expired = await expire_due_prescriptions(batch_size=2)
+
+    assert expired == 5
+    result = await prescription_management.ainvoke({
+        "user_identifier": "michael.benari@example.com",
+        "action": "LIST",
+        "status_filter": "all",
+    })
+    assert result["status_counts"] == {"active": 1, "expired": 5}
+
+    # Prescription without expires_at is untouched; a second sweep is a no-op
+    assert await expire_due_prescriptions() == 0
+
+
+@pytest.mark.asyncio
+async def test_refill_request_blocked_when_due_but_not_swept(test_db):
+    """Test REFILL_REQUEST re-checks expires_at before the sweeper runs."""
+    _add_due_prescriptions(test_db, 1)
+
+    result = await prescription_management.ainvoke({
+        "user_identifier": "michael.benari@example.com",
+        "action": "REFILL_REQUEST",
+        "prescription_id": 6,
+    })
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.INVALID_STATE.value
+    assert "expired" in result["error_message"].lower()
@@ -0,0 +1,126 @@
+"""Tests for check_drug_interactions tool."""
+
+import pytest
+
+from apps.api.request_context import RequestContext, request_scope
+from apps.api.tools import check_drug_interactions
+from apps.api.tools.interactions import InteractionIndex, get_interaction_index
+from apps.api.tools.schemas import ToolErrorCode
+
+
+@pytest.mark.asyncio
+async def test_interaction_with_active_prescription(test_db):
+    """Test that an interaction with an active prescription is flagged."""
+    result = await check_drug_interactions.ainvoke(
+        {"medication_name": "Ibuprofen", "user_identifier": "david.cohen@example.com"}
+    )
+
+    assert result["success"] is True
+    assert result["medication"]["med_id"] == 1
+    assert result["checked_prescriptions"] == 1
+    assert result["already_prescribed"] is False
+    assert len(result["interactions"]) == 1
+    interaction = result["interactions"][0]
+    assert interaction["presc_id"] == 1
+    assert interaction["medication_name_en"] == "Amoxicillin"
+    assert interaction["severity"] == "moderate"
+    assert interaction["description_en"] == "Test interaction EN."
+    assert interaction["description_he"] == "אינטראקציה לבדיקה."
+
+
+@pytest.mark.asyncio
+async def test_interaction_index_is_symmetric(test_db):
+    """Test that interactions are found from either medication's side."""
+    result = await check_drug_interactions.ainvoke(
+        {"medication_name": "צטיריזין", "user_identifier": "050-1234567"}
+    )
+
+    assert result["success"] is True
+    assert [i["severity"] for i in result["interactions"]] == ["minor"]
+
+
+@pytest.mark.asyncio
+async def test_inactive_prescriptions_are_ignored(test_db):
+    """Test that completed/expired prescriptions are not checked."""
+    # Sarah only has a completed Amoxicillin and an expired Ibuprofen
+    result = await check_drug_interactions.ainvoke(
+        {"medication_id": 3, "user_identifier": "sarah.levi@example.com"}
+    )
+
+    assert result["success"] is True
+    assert result["checked_prescriptions"] == 0
+    assert result["interactions"] == []
+
+
+@pytest.mark.asyncio
+async def test_already_prescribed(test_db):
+    """Test that checking a medication the user already takes is reported."""
+    result = await check_drug_interactions.ainvoke(
+        {"medication_name": "Amoxicillin", "user_identifier": "michael.benari@example.com"}
+    )
+
+    assert result["success"] is True
+    assert result["already_prescribed"] is True
+    assert result["interactions"] == []
+
+
+@pytest.mark.asyncio
+async def test_uses_verified_user_from_request_context(test_db):
+    """Test that the request's verified user is checked without an identifier."""
+    with request_scope(RequestContext(user_id=1, user_name="David Cohen")):
+        result = await check_drug_interactions.ainvoke({"medication_name": "Ibuprofen"})
+
+    assert result["success"] is True
+    assert len(result["interactions"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_user(test_db):
+    """Test error for an unknown user."""
+    result = await check_drug_interactions.ainvoke(
+        {"medication_name": "Ibuprofen", "user_identifier": "nobody@example.com"}
+    )
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.UNAUTHORIZED.value
+
+
+@pytest.mark.asyncio
+async def test_unknown_medication(test_db):
+    """Test error for a medication that does not exist."""
+    result = await check_drug_interactions.ainvoke(
+        {"medication_name": "NonExistent", "user_identifier": "david.cohen@example.com"}
+    )
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.NOT_FOUND.value
+
+
+@pytest.mark.asyncio
+async def test_index_loaded_once(test_db):
+    """Test that the index is cached between checks."""
+    first = await get_interaction_index()
+    second = await get_interaction_index()
+
+    assert first is second
+    assert len(first) == 2
+
+
+def test_interaction_index_adjacency():
+    """Test that each row is indexed under both medications."""
+    index = InteractionIndex(
+        [
+            {
+                "med_id_a": 1,
+                "med_id_b": 4,
+                "severity": "major",
+                "description_en": "EN",
+                "description_he": "HE",
+            }
+        ]
+    )
+
+    assert set(index.interacting(1)) == {4}
+    assert set(index.interacting(4)) == {1}
+    assert index.interacting(2) == {}
+    assert len(index) == 1
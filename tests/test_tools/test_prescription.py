@@ -8,7 +8,7 @@ from apps.api.tools.schemas import ToolErrorCode
 
 @pytest.mark.asyncio
 async def test_prescription_list_by_email(test_db):
-    """Test listing prescriptions by email."""
+    """Test listing prescriptions by email (active only by default)."""
     result = await prescription_management.ainvoke({
         "user_identifier": "david.cohen@example.com",
         "action": "LIST",
@@ -16,15 +16,20 @@ async def test_prescription_list_by_email(test_db):
 
     assert result["success"] is True
     assert result["user_name"] == "David Cohen"
-    assert len(result["prescriptions"]) == 2
+    assert result["status_filter"] == "active"
+    assert [p["presc_id"] for p in result["prescriptions"]] == [1]
+    assert result["status_counts"] == {"active": 1, "completed": 1}
+    assert result["total_count"] == 2
+    assert result["next_cursor"] is None
 
 
 @pytest.mark.asyncio
 async def test_prescription_list_by_phone(test_db):
-    """Test listing prescriptions by phone number."""
+    """Test listing all prescriptions by phone number."""
     result = await prescription_management.ainvoke({
         "user_identifier": "050-1234567",
         "action": "LIST",
+        "status_filter": "all",
     })
 
     assert result["success"] is True
@@ -32,6 +37,105 @@ async def test_prescription_list_by_phone(test_db):
     assert len(result["prescriptions"]) == 2
 
 
+@pytest.mark.asyncio
+async def test_prescription_list_status_filter(test_db):
+    """Test LIST filtered to a non-default status."""
+    result = await prescription_management.ainvoke({
+        "user_identifier": "sarah.levi@example.com",
+        "action": "LIST",
+        "status_filter": "expired",
+    })
+
+    assert result["success"] is True
+    assert [p["presc_id"] for p in result["prescriptions"]] == [5]
+    assert result["status_counts"] == {"completed": 1, "expired": 1}
+
+
+@pytest.mark.asyncio
+async def test_prescription_list_invalid_status_filter(test_db):
+    """Test INVALID_STATE for an unknown status filter."""
+    result = await prescription_management.ainvoke({
+        "user_identifier": "sarah.levi@example.com",
+        "action": "LIST",
+        "status_filter": "pending",
+    })
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.INVALID_STATE.value
+
+
+@pytest.mark.asyncio
+async def test_prescription_list_keyset_pagination(test_db, monkeypatch):
+    """Test that LIST pages through history with next_cursor."""
+    monkeypatch.setenv("PRESCRIPTION_PAGE_SIZE", "1")
+    from apps.api.config import get_settings
+
+    get_settings.cache_clear()
+
+    seen = []
+    cursor = None
+    while True:
+        result = await prescription_management.ainvoke({
+            "user_identifier": "david.cohen@example.com",
+            "action": "LIST",
+            "status_filter": "all",
+            "cursor": cursor,
+        })
+        assert result["success"] is True
+        assert len(result["prescriptions"]) <= 1
+        seen.extend(p["presc_id"] for p in result["prescriptions"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [1, 2]
+    get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "identifier",
+    ["0501234567", "+972-50-123-4567", "972501234567", " DAVID.Cohen@Example.com "],
+)
+async def test_prescription_list_normalized_identifier(test_db, identifier):
+    """Test that phone/email formatting variants resolve to the same user."""
+    result = await prescription_management.ainvoke({
+        "user_identifier": identifier,
+        "action": "LIST",
+    })
+
+    assert result["success"] is True
+    assert result["user_name"] == "David Cohen"
+
+
+@pytest.mark.asyncio
+async def test_prescription_list_user_without_prescriptions(test_db):
+    """Test that a known user with no prescriptions gets an empty list."""
+    result = await prescription_management.ainvoke({
+        "user_identifier": "rachel.m@example.com",
+        "action": "LIST",
+    })
+
+    assert result["success"] is True
+    assert result["user_name"] == "Rachel Mizrachi"
+    assert result["prescriptions"] == []
+
+
+@pytest.mark.asyncio
+async def test_prescription_repeat_lookup_uses_cached_user(test_db):
+    """Test that a repeat identifier is served from the user cache."""
+    from apps.api.identity import get_user_cache
+
+    for _ in range(2):
+        result = await prescription_management.ainvoke({
+            "user_identifier": "050-1234567",
+            "action": "LIST",
+        })
+        assert len(result["prescriptions"]) == 1
+
+    assert get_user_cache().hits >= 1
+
+
 @pytest.mark.asyncio
 async def test_prescription_user_not_found(test_db):
     """Test UNAUTHORIZED error for non-existent user."""
@@ -131,6 +235,7 @@ async def test_prescription_can_refill_field(test_db):
     result = await prescription_management.ainvoke({
         "user_identifier": "david.cohen@example.com",
         "action": "LIST",
+        "status_filter": "all",
     })
 
     assert result["success"] is True
@@ -148,3 +253,62 @@ async def test_prescription_can_refill_field(test_db):
         if p["status"] == "completed"
     )
     assert completed_presc["can_refill"] is False
+
+
+@pytest.mark.asyncio
+async def test_prescription_refill_request_decrements(test_db):
+    """Test REFILL_REQUEST consumes one refill."""
+    result = await prescription_management.ainvoke({
+        "user_identifier": "david.cohen@example.com",
+        "action": "REFILL_REQUEST",
+        "prescription_id": 1,
+    })
+
+    assert result["success"] is True
+    assert result["refills_left"] == 1
+    assert result["prescription"]["can_refill"] is True
+
+    status = await prescription_management.ainvoke({
+        "user_identifier": "david.cohen@example.com",
+        "action": "REFILL_STATUS",
+        "prescription_id": 1,
+    })
+    assert status["prescription"]["refills_left"] == 1
+
+
+@pytest.mark.asyncio
+async def test_prescription_refill_request_not_eligible(test_db):
+    """Test REFILL_REQUEST on a completed prescription is rejected."""
+    result = await prescription_management.ainvoke({
+        "user_identifier": "david.cohen@example.com",
+        "action": "REFILL_REQUEST",
+        "prescription_id": 2,
+    })
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.INVALID_STATE.value
+    assert "completed" in result["error_message"].lower()
+
+
+@pytest.mark.asyncio
+async def test_prescription_refill_request_concurrent(test_db):
+    """Test concurrent REFILL_REQUESTs never over-consume refills."""
+    import asyncio
+
+    results = await asyncio.gather(*[
+        prescription_management.ainvoke({
+            "user_identifier": "michael.benari@example.com",
+            "action": "REFILL_REQUEST",
+            "prescription_id": 4,
+        })
+        for _ in range(10)
+    ])
+
+    succeeded = [r for r in results if r["success"]]
+    assert len(succeeded) == 3  # Michael's prescription has 3 refills
+    assert sorted(r["refills_left"] for r in succeeded) == [0, 1, 2]
+    assert all(
+        r["error_code"] == ToolErrorCode.INVALID_STATE.value
+        for r in results
+        if not r["success"]
+    )
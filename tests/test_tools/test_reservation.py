@@ -0,0 +1,147 @@
+"""Tests for reserve_medication tool and the hold registry."""
+
+import sqlite3
+import time
+
+import pytest
+
+from apps.api.tools import check_inventory, reserve_medication
+from apps.api.db_writer import get_db_writer
+from apps.api.tools.holds import (
+    HoldRegistry,
+    get_hold_registry,
+    load_holds,
+    sync_holds,
+)
+from apps.api.tools.schemas import ToolErrorCode
+
+
+@pytest.mark.asyncio
+async def test_reserve_reduces_reported_inventory(test_db):
+    """Test that a hold is subtracted from check_inventory's qty."""
+    result = await reserve_medication.ainvoke({"medication_id": 1, "quantity": 3})
+
+    assert result["success"] is True
+    assert result["reservation"]["qty"] == 3
+    assert result["reservation"]["available_after_hold"] == 147
+
+    inventory = await check_inventory.ainvoke({"medication_id": 1})
+    assert inventory["inventory"]["qty"] == 147
+
+
+@pytest.mark.asyncio
+async def test_reserve_by_hebrew_name(test_db):
+    """Test reserving by Hebrew medication name."""
+    result = await reserve_medication.ainvoke({"medication_name": "צטיריזין"})
+
+    assert result["success"] is True
+    assert result["reservation"]["medication_name_en"] == "Cetirizine"
+
+
+@pytest.mark.asyncio
+async def test_reserve_out_of_stock(test_db):
+    """Test INVALID_STATE when no stock is available to hold."""
+    result = await reserve_medication.ainvoke({"medication_id": 2})
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.INVALID_STATE.value
+
+
+@pytest.mark.asyncio
+async def test_reserve_cannot_exceed_stock(test_db):
+    """Test that holds never oversubscribe on-hand stock."""
+    first = await reserve_medication.ainvoke({"medication_id": 1, "quantity": 149})
+    second = await reserve_medication.ainvoke({"medication_id": 1, "quantity": 2})
+    third = await reserve_medication.ainvoke({"medication_id": 1, "quantity": 1})
+
+    assert first["success"] is True
+    assert second["success"] is False
+    assert third["success"] is True
+
+    inventory = await check_inventory.ainvoke({"medication_id": 1})
+    assert inventory["inventory"]["in_stock"] is False
+
+
+@pytest.mark.asyncio
+async def test_reserve_not_found(test_db):
+    """Test NOT_FOUND for unknown medication."""
+    result = await reserve_medication.ainvoke({"medication_name": "Unknownium"})
+
+    assert result["success"] is False
+    assert result["error_code"] == ToolErrorCode.NOT_FOUND.value
+
+
+def test_registry_expires_and_releases_holds():
+    """Test TTL expiry and explicit release in the registry."""
+    registry = HoldRegistry(shards=4)
+
+    expired = registry.try_hold(1, 1, qty=2, stock_qty=5, ttl_seconds=-1)
+    assert expired is not None
+    assert registry.held_qty(1, 1) == 0
+
+    hold = registry.try_hold(1, 1, qty=2, stock_qty=5, ttl_seconds=60)
+    assert registry.held_qty(1, 1) == 2
+    assert registry.release(hold.hold_id) is not None
+    assert registry.held_qty(1, 1) == 0
+    assert registry.release(hold.hold_id) is None
+
+
+def test_registry_version_tracks_held_quantities():
+    """Test the version changes on hold, expiry and release only."""
+    registry = HoldRegistry(shards=4)
+    v0 = registry.version()
+    assert registry.version() == v0
+
+    hold = registry.try_hold(1, 1, qty=2, stock_qty=5, ttl_seconds=60)
+    v1 = registry.version()
+    assert v1 != v0
+    assert registry.try_hold(1, 1, qty=10, stock_qty=5, ttl_seconds=60) is None
+    assert registry.version() == v1
+
+    registry.release(hold.hold_id)
+    v2 = registry.version()
+    assert v2 != v1
+
+    registry.try_hold(1, 1, qty=1, stock_qty=5, ttl_seconds=0.01)
+    v3 = registry.version()
+    time.sleep(0.02)  # expire without touching the shard
+    v4 = registry.version()
+    assert v4 != v3
+    assert registry.version() == v4
+
+
+@pytest.mark.asyncio
+async def test_holds_round_trip_through_sqlite(test_db):
+    """Test that reconciled holds are restored after a registry reset."""
+    await reserve_medication.ainvoke({"medication_id": 1, "quantity": 4})
+    assert await sync_holds() == 1
+
+    registry = get_hold_registry()
+    registry.clear()
+    assert registry.held_qty(1, 1) == 0
+
+    assert await load_holds() == 1
+    assert registry.held_qty(1, 1) == 4
+    assert all(h.expires_at > time.time() for h in registry.snapshot())
+
+
+@pytest.mark.asyncio
+async def test_sync_writes_only_this_process_changes(test_db):
+    """Test a sync upserts new holds, deletes released ones and keeps other rows."""
+    with sqlite3.connect(test_db) as conn:
+        conn.execute(
+            "INSERT INTO reservations VALUES ('other-worker', 1, 3, 2, ?)", (time.time() + 600,)
+        )
+
+    result = await reserve_medication.ainvoke({"medication_id": 1, "quantity": 4})
+    assert await sync_holds() == 1
+
+    batches = get_db_writer().batches_committed
+    assert await sync_holds() == 0
+    assert get_db_writer().batches_committed == batches
+
+    get_hold_registry().release(result["reservation"]["hold_id"])
+    assert await sync_holds() == 1
+    with sqlite3.connect(test_db) as conn:
+        rows = conn.execute("SELECT hold_id FROM reservations").fetchall()
+    assert rows == [("other-worker",)]
@@ -0,0 +1,124 @@
+"""Tests for single-flight coalescing of concurrent lookups."""
+
+import asyncio
+
+import pytest
+
+from apps.api.tools.inventory import _get_inventory_row
+from apps.api.tools.medication import _search_medications
+from apps.api.tools.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for the SingleFlight group."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test identical concurrent calls run once and fan out the result."""
+        group = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"rows": [1, 2]}
+
+        results = await asyncio.gather(*(group.do("key", fetch) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(r == {"rows": [1, 2]} for r in results)
+        assert (group.executed, group.shared) == (1, 4)
+        assert len(group) == 0
+
+    @pytest.mark.asyncio
+    async def test_followers_get_copies(self):
+        """Test a caller mutating its result doesn't affect the others."""
+        group = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return {"rows": [1]}
+
+        first, second = await asyncio.gather(group.do("key", fetch), group.do("key", fetch))
+        first["rows"].append(2)
+
+        assert second == {"rows": [1]}
+
+    @pytest.mark.asyncio
+    async def test_no_result_kept_after_completion(self):
+        """Test a call after the in-flight one finished runs again."""
+        group = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        assert await group.do("key", fetch) == 1
+        assert await group.do("key", fetch) == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_callers(self):
+        """Test followers see the leader's exception."""
+        group = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            group.do("key", fail), group.do("key", fail), return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert group.executed == 1
+
+    @pytest.mark.asyncio
+    async def test_follower_retries_when_leader_cancelled(self):
+        """Test cancelling the leader doesn't cancel the followers."""
+        group = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        leader = asyncio.create_task(group.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "ok"
+        assert len(calls) == 2
+
+
+class TestCoalescedQueries:
+    """Tests for the coalesced DB lookups."""
+
+    @pytest.mark.asyncio
+    async def test_search_medications_coalesced(self, test_db):
+        """Test concurrent identical searches hit the database once."""
+        group = _search_medications.single_flight
+        executed = group.executed
+
+        results = await asyncio.gather(*(_search_medications("Ibuprofen") for _ in range(10)))
+
+        assert group.executed - executed == 1
+        assert all(r == results[0] for r in results)
+        assert results[0][0]["name_en"] == "Ibuprofen"
+
+    @pytest.mark.asyncio
+    async def test_inventory_row_coalesced_per_key(self, test_db):
+        """Test only identical inventory lookups are coalesced."""
+        group = _get_inventory_row.single_flight
+        executed = group.executed
+
+        rows = await asyncio.gather(
+            _get_inventory_row(1, 1), _get_inventory_row(1, 1), _get_inventory_row(3, 1)
+        )
+
+        assert group.executed - executed == 2
+        assert rows[0]["qty"] == rows[1]["qty"] == 150
+        assert rows[2]["qty"] == 200
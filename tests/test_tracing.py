@@ -217,7 +217,7 @@ def test_db():
     import tempfile
     from pathlib import Path
 
-    from tests.test_tools.conftest import create_test_schema, seed_test_data
+    from tests.conftest import create_test_schema, seed_test_data
 
     # Create temp file
     fd, db_path = tempfile.mkstemp(suffix=".db")